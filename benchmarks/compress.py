@@ -0,0 +1,62 @@
+"""Benchmark compressing large file contents of a config.
+
+Builds a config with inline text files and local random binary files of the
+given total size in MiB each and reports the time of translating it to
+ignition as is and after encoding the contents with *compress*, as well as the
+bytes saved and the size of the resulting ignition config:
+
+.. code-block:: sh
+   python -m benchmarks.compress [MIB] [REPEAT]
+"""
+
+from typing import Callable
+from pathlib import PosixPath as Path
+from tempfile import TemporaryDirectory
+from contextlib import chdir
+from random import Random
+import sys
+import time
+
+from pyromaniac.compiler.compress import compress
+from pyromaniac.compiler.translate import translate, dump
+
+
+def config(root: Path, size: int) -> dict:
+    random = Random(42)
+    files = []
+    for i in range(size // 2 ** 17):
+        text = "".join(f"line {j} of file {i}\n" for j in range(4096))
+        root.joinpath(f"{i}.bin").write_bytes(random.randbytes(2 ** 17))
+        files.append({'inline': text})
+        files.append({'local': f"{i}.bin"})
+    files = [
+        {'path': f"/srv/{i}", 'mode': 0o644, 'contents': contents}
+        for i, contents in enumerate(files)
+    ]
+    return {'variant': "fcos", 'version': "1.5.0", 'storage': {'files': files}}
+
+
+def measure(function: Callable, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+size = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+with TemporaryDirectory() as temp, chdir(temp):
+    value = config(Path(temp), size * 2 ** 20)
+    results = {
+        "translate": lambda: translate(value),
+        "compress and translate": lambda: translate(compress(value, 4096)[0]),
+    }
+
+    print(f"saved: {compress(value, 4096)[1] / 2 ** 20:.1f} MiB")
+    print(f"ignition: {len(dump(translate(value))) / 2 ** 20:.1f} MiB")
+    for name, function in results.items():
+        best = measure(function, repeat)
+        print(f"{name}: {best * 1000:.0f} ms (best of {repeat})")
@@ -0,0 +1,95 @@
+"""Benchmark embedding ignition configs into live images.
+
+Creates an ISO 9660 image of the given size in MiB with an area for embedding
+ignition configs and reports the time of writing the given number of copies
+with an embedded config by piping the image through a script standing in for
+CoreOS Installer, by copying it and writing the config in place, and by
+sending it to standard output redirected to a file:
+
+.. code-block:: sh
+   python -m benchmarks.embed [IMAGES] [SIZE]
+"""
+
+from typing import Callable
+from unittest.mock import patch
+from tempfile import TemporaryDirectory
+from pathlib import PosixPath as Path
+import os
+import sys
+import time
+
+from pyromaniac.iso.customize import customize_base_image
+
+INSTALLER = """#!/bin/sh
+cat "$3" - > "$5"
+"""
+
+
+def create(path: Path, size: int):
+    with path.open('wb') as file:
+        for _ in range(size):
+            file.write(os.urandom(1024 * 1024))
+        file.seek(16 * 2048)
+        file.write(b"\x01CD001\x01".ljust(2048, b"\0"))
+        file.seek(16 * 2048 + 128)
+        file.write((2048).to_bytes(2, 'little'))
+        file.seek(16 * 2048 + 156)
+        file.write(record(b"\0", 18, 2048, True))
+        file.seek(18 * 2048)
+        file.write(record(b"IMAGES", 19, 2048, True).ljust(2048, b"\0"))
+        file.write(record(b"IGNITION.IMG;1", 20, 262144, False).ljust(
+            2048 + 262144, b"\0",
+        ))
+
+
+def record(name: bytes, extent: int, length: int, directory: bool) -> bytes:
+    size = 33 + len(name) + (len(name) + 1) % 2
+    return b"".join([
+        bytes([size, 0]),
+        extent.to_bytes(4, 'little'), extent.to_bytes(4, 'big'),
+        length.to_bytes(4, 'little'), length.to_bytes(4, 'big'),
+        bytes(7), bytes([2 if directory else 0, 0, 0]),
+        (1).to_bytes(2, 'little'), (1).to_bytes(2, 'big'), bytes([len(name)]),
+        name.ljust(size - 33, b"\0"),
+    ])
+
+
+def measure(function: Callable, count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        function(i)
+    return time.perf_counter() - start
+
+
+def stdout(base: Path, config: str, path: Path):
+    with path.open('wb') as file, patch('sys.stdout', file):
+        customize_base_image(base, config, None, None, [])
+
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+size = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+config = '{"ignition": {"version": "3.4.0"}}'
+
+with TemporaryDirectory() as temp:
+    root = Path(temp)
+    root.joinpath("installer").write_text(INSTALLER)
+    root.joinpath("installer").chmod(0o755)
+    create(root / "base.iso", size)
+    base = root / "base.iso"
+
+    with (
+        patch('pyromaniac.paths.installer', root / "installer"),
+        patch('pyromaniac.iso.customize.embed', lambda *args: False),
+    ):
+        piped = measure(lambda i: customize_base_image(
+            base, config, None, None, [], root / f"piped{i}.iso",
+        ), count)
+    copied = measure(lambda i: customize_base_image(
+        base, config, None, None, [], root / f"copied{i}.iso",
+    ), count)
+    sent = measure(
+        lambda i: stdout(base, config, root / f"sent{i}.iso"), count,
+    )
+
+for name, duration in [("piped", piped), ("copied", copied), ("sent", sent)]:
+    print(f"{name}: {duration / count * 1000:.1f} ms per image")
@@ -0,0 +1,60 @@
+"""Benchmark composite key expansion on a large config.
+
+Builds a config resembling the output of *std.tree* with the given number of
+leaves, half of them in composite keys and some under underscore keys, and
+reports the time and peak memory of expanding and cleaning it. Also reports
+the time of expanding it again alongside another key, as the compiler does
+with results of components expanding their own configs:
+
+.. code-block:: sh
+   python -m benchmarks.expand [LEAVES] [REPEAT]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from pyromaniac.compiler.expand import expand
+
+
+def config(leaves: int) -> dict:
+    files = [
+        {
+            'path': f"/srv/tree/{i // 100}/{i}.txt",
+            'mode': 0o644,
+            'user.name': "core",
+            'contents.inline': f"file {i}\n",
+            '_local': {'index': i},
+        }
+        for i in range(leaves // 4)
+    ]
+    return {'storage.files': files, 'storage.directories[0].path': "/srv"}
+
+
+def measure(value: dict, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        expand(value, True, True)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+leaves = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+value = config(leaves)
+
+best = measure(value, repeat)
+again = measure(
+    {**expand(value, True), 'passwd.users[0].name': "core"}, repeat,
+)
+
+tracemalloc.start()
+expand(value, True, True)
+peak = tracemalloc.get_traced_memory()[1]
+tracemalloc.stop()
+
+print(f"leaves: {leaves}")
+print(f"time: {best * 1000:.1f} ms (best of {repeat})")
+print(f"time expanding again: {again * 1000:.1f} ms (best of {repeat})")
+print(f"peak memory: {peak / 2 ** 20:.1f} MiB")
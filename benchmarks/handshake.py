@@ -0,0 +1,80 @@
+"""Benchmark TLS handshakes with the config server.
+
+Starts the config server with HTTPS on port 8000 for each key type, using
+certificates in a temporary directory. Reports the time of creating the
+certificates on the first start and of loading them on the next, as well as
+the time of fetching the config the given number of times with full
+handshakes and with handshakes resuming the session of a previous connection:
+
+.. code-block:: sh
+   python -m benchmarks.handshake [REQUESTS]
+"""
+
+from typing import Callable
+from unittest.mock import patch
+from tempfile import TemporaryDirectory
+from threading import Thread
+from pathlib import PosixPath as Path
+import socket
+import ssl
+import sys
+import time
+
+from pyromaniac.server.server import Server
+from pyromaniac.server import certs
+
+REQUEST = b"GET /config.ign HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n"
+
+
+def fetch(
+    context: ssl.SSLContext, session: ssl.SSLSession | None = None,
+) -> tuple[ssl.SSLSession, bool]:
+    with socket.create_connection(("127.0.0.1", 8000)) as sock:
+        with context.wrap_socket(
+            sock, server_hostname="127.0.0.1", session=session,
+        ) as tls:
+            tls.sendall(REQUEST)
+            while tls.recv(65536) != b"":
+                pass
+            return tls.session, tls.session_reused
+
+
+def measure(function: Callable, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        function()
+    return time.perf_counter() - start
+
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+for key_type in ['rsa', 'ecdsa']:
+    with (
+        TemporaryDirectory() as temp, patch('sys.stdout'),
+        patch('pyromaniac.server.certs.ROOT_KEY', Path(temp, "root.key")),
+        patch('pyromaniac.server.certs.ROOT_CRT', Path(temp, "root.cert")),
+        patch('pyromaniac.server.certs.key_type', key_type),
+    ):
+        created = measure(lambda: certs.server("127.0.0.1"), 1)
+        loaded = measure(lambda: certs.server("127.0.0.1"), 1)
+        server = Server('https', "127.0.0.1", None, lambda: "{}")
+        Thread(target=server.serve_forever, daemon=True).start()
+        context = ssl.create_default_context(cafile=Path(temp, "root.cert"))
+
+        full = measure(lambda: fetch(context), count)
+        session, _ = fetch(context)
+        resumed = measure(lambda: fetch(context, session), count)
+        reused = fetch(context, session)[1]
+
+        server.shutdown()
+        server.server_close()
+
+    print(
+        f"{key_type}: certificates created in {created * 1000:.1f} ms, "
+        f"loaded in {loaded * 1000:.1f} ms"
+    )
+    print(
+        f"{key_type}: full {full / count * 1000:.2f} ms, resumed "
+        f"{resumed / count * 1000:.2f} ms per request "
+        f"(resumption {'works' if reused else 'failed'})"
+    )
@@ -0,0 +1,72 @@
+"""Benchmark generating ISO images for a batch of hosts.
+
+Replaces CoreOS Installer with a script copying a base image of the given
+size in MiB to the output with the ignition config appended, which is what
+customizing an image mostly amounts to, and reports the time of generating
+the given number of images one after another, in parallel, and again with
+the images stored by a previous run:
+
+.. code-block:: sh
+   python -m benchmarks.iso [IMAGES] [SIZE]
+"""
+
+from typing import Callable
+from unittest.mock import patch
+from tempfile import TemporaryDirectory
+from pathlib import PosixPath as Path
+import os
+import sys
+import time
+
+from pyromaniac.iso import customize_batch
+
+INSTALLER = """#!/bin/sh
+cat "$3" - > "$5"
+"""
+
+
+def measure(function: Callable) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+size = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+jobs = len(os.sched_getaffinity(0))
+
+with TemporaryDirectory() as temp:
+    root = Path(temp)
+    root.joinpath("installer").write_text(INSTALLER)
+    root.joinpath("installer").chmod(0o755)
+    with root.joinpath("base.iso").open('wb') as file:
+        for _ in range(size):
+            file.write(os.urandom(1024 * 1024))
+
+    images = {
+        f"host{i}": (f'{{"host": {i}}}', "x86_64", None, None, [])
+        for i in range(count)
+    }
+    with (
+        patch('pyromaniac.paths.installer', root / "installer"),
+        patch('pyromaniac.paths.isos', root / "isos"),
+        patch(
+            'pyromaniac.iso.customize.get_base_image',
+            lambda arch, ttl, offline: root / "base.iso",
+        ),
+    ):
+        serial = measure(lambda: customize_batch(images, root / "serial", 1))
+        parallel = measure(
+            lambda: customize_batch(images, root / "parallel", jobs),
+        )
+        customize_batch(images, root / "stored", jobs, cache=2 ** 40)
+        cached = measure(lambda: customize_batch(
+            images, root / "cached", jobs, cache=2 ** 40,
+        ))
+
+print(f"serial: {serial:.2f} s ({serial / count * 1000:.0f} ms per image)")
+print(
+    f"parallel ({jobs} jobs): {parallel:.2f} s "
+    f"({parallel / count * 1000:.0f} ms per image)"
+)
+print(f"cached: {cached:.2f} s ({cached / count * 1000:.0f} ms per image)")
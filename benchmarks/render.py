@@ -0,0 +1,64 @@
+"""Benchmark rendering and parsing a large YAML template.
+
+Builds a component template generating a file entry for each of the given
+number of iterations of a loop and reports the time and peak memory of
+executing it, which parses the output while it's being rendered, as well as
+of rendering the complete output first and parsing it afterwards:
+
+.. code-block:: sh
+   python -m benchmarks.render [ITERATIONS] [REPEAT]
+"""
+
+from typing import Callable
+import sys
+import time
+import tracemalloc
+
+from pyromaniac.compiler import serialize
+from pyromaniac.compiler.code.yaml import Yaml
+
+TEMPLATE = """
+storage.files:
+{%- for i in range(count) %}
+- path: /srv/tree/`(i // 100) | raw`/`i | raw`.txt
+  mode: 0o644
+  user.name: `user`
+  contents.inline: |
+    file `i | raw`
+    generated by `user | raw`
+{%- endfor %}
+"""
+
+
+def measure(function: Callable, repeat: int) -> tuple[float, int]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(times), peak
+
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+yaml = Yaml.create(TEMPLATE)
+context = {'count': count, 'user': "core"}
+code = "".join(yaml.render(context))
+
+results = {
+    "streamed": lambda: yaml.execute(context),
+    "render then parse": lambda: serialize.load("".join(yaml.render(context))),
+}
+
+print(f"size: {len(code) / 2 ** 20:.1f} MiB of yaml")
+for name, function in results.items():
+    best, peak = measure(function, repeat)
+    print(
+        f"{name}: {best * 1000:.0f} ms, {peak / 2 ** 20:.1f} MiB peak "
+        f"(best of {repeat})"
+    )
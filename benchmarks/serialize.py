@@ -0,0 +1,64 @@
+"""Benchmark the YAML and JSON backends on a large config.
+
+Builds an expanded config with many files of the given total size in MiB and
+reports the time of serializing it for butane with the pure Python YAML
+dumper, the libyaml based dumper, and JSON, as well as the time of parsing the
+resulting YAML with the pure Python and the libyaml based loader:
+
+.. code-block:: sh
+   python -m benchmarks.serialize [MIB] [REPEAT]
+"""
+
+from typing import Callable
+import sys
+import time
+import yaml
+
+from pyromaniac.compiler import serialize
+
+
+def config(size: int) -> dict:
+    files = [
+        {
+            'path': f"/srv/tree/{i // 100}/{i}.txt",
+            'mode': 0o644,
+            'user': {'name': "core"},
+            'contents': {'inline': f"line {i}\n" * 20},
+        }
+        for i in range(size // 512)
+    ]
+    return {'variant': "fcos", 'version': "1.5.0", 'storage': {'files': files}}
+
+
+def measure(function: Callable, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+class PureDumper(yaml.SafeDumper):
+    pass
+
+
+PureDumper.add_multi_representer(dict, yaml.SafeDumper.represent_dict)
+
+size = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+value = config(size * 2 ** 20)
+code = serialize.dump(value)
+
+results = {
+    "dump pure yaml": lambda: yaml.dump(value, Dumper=PureDumper),
+    f"dump {serialize.SafeDumper.__name__}": lambda: serialize.dump(value),
+    "dump json": lambda: serialize.dump(value, 'json'),
+    "load pure yaml": lambda: yaml.load(code, yaml.SafeLoader),
+    f"load {serialize.SafeLoader.__name__}": lambda: serialize.load(code),
+}
+
+print(f"size: {len(code) / 2 ** 20:.1f} MiB of yaml")
+for name, function in results.items():
+    best = measure(function, repeat)
+    print(f"{name}: {best * 1000:.0f} ms (best of {repeat})")
@@ -0,0 +1,78 @@
+"""Benchmark serving a config to many clients at once.
+
+Starts the config server on port 8000 with a config of the given size in KiB
+and an empty directory to watch for changes, keeps a secret request waiting
+for the prompt, and lets the given number of clients request the config
+concurrently, once without compression, once accepting gzip, and once
+revalidating their copy. Reports the total time, the slowest response, and
+the bytes received per client for each round:
+
+.. code-block:: sh
+   python -m benchmarks.serve [CLIENTS] [KIB]
+"""
+
+from unittest.mock import patch
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+from threading import Thread, Event
+from tempfile import TemporaryDirectory
+from pathlib import PosixPath as Path
+import sys
+import time
+
+from pyromaniac.server.server import Server, Content
+
+
+def fetch(path: str, headers: dict = {}) -> tuple[float, int]:
+    start = time.perf_counter()
+    connection = HTTPConnection("127.0.0.1", 8000, timeout=60)
+    try:
+        connection.request("GET", path, headers=headers)
+        size = len(connection.getresponse().read())
+    finally:
+        connection.close()
+    return time.perf_counter() - start, size
+
+
+clients = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+size = int(sys.argv[2]) if len(sys.argv) > 2 else 1024
+entry = '{"path": "/srv/%06d", "mode": 420, "contents": {"source": "%s"}},'
+files = "".join(
+    entry % (i, f"data:,{i * 7919 % 1000003:07d}")
+    for i in range(size * 1024 // len(entry % (0, "data:,0000000")))
+)
+config = f'{{"storage": {{"files": [{files[:-1]}]}}}}'
+etag = Content(config).etag
+rounds = {
+    "plain": {}, "gzip": {'Accept-Encoding': "gzip"},
+    "revalidate": {'If-None-Match': etag},
+}
+answer = Event()
+
+watch = TemporaryDirectory()
+server = Server('http', "127.0.0.1", None, lambda: config, Path(watch.name))
+with patch('sys.stdout'), patch.object(server.prompt, 'ask', lambda: (
+    answer.wait(), "secret",
+)[1]):
+    Thread(target=server.serve_forever, daemon=True).start()
+    with ThreadPoolExecutor(clients + 1) as pool:
+        secret = pool.submit(fetch, "/foo.secret")
+        results = {}
+        for name, headers in rounds.items():
+            start = time.perf_counter()
+            times, sizes = zip(*pool.map(
+                lambda _: fetch("/config.ign", headers), range(clients),
+            ))
+            results[name] = time.perf_counter() - start, max(times), sizes[0]
+        answer.set()
+        secret.result()
+    server.shutdown()
+    server.server_close()
+    watch.cleanup()
+
+print(f"clients: {clients}, config: {len(config) // 1024} KiB")
+for name, (total, slowest, received) in results.items():
+    print(
+        f"{name}: total {total * 1000:.0f} ms, slowest {slowest * 1000:.0f} "
+        f"ms, {received} bytes per client"
+    )
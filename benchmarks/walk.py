@@ -0,0 +1,75 @@
+"""Benchmark listing a large local directory tree.
+
+Creates a temporary tree with the given number of files, a tenth of them in a
+directory excluded by a pattern, and reports the time of listing and
+classifying its entries the way *std.tree* used to with *Path.glob* and of
+doing the same with *walk*, with and without excluding the directory and with
+several threads:
+
+.. code-block:: sh
+   python -m benchmarks.walk [FILES] [REPEAT]
+"""
+
+from typing import Callable
+from pathlib import PosixPath as Path
+from tempfile import TemporaryDirectory
+import sys
+import time
+
+from pyromaniac.compiler.walk import walk
+
+
+def create(root: Path, files: int):
+    for i in range(files):
+        name = ".git" if i % 10 == 0 else f"{i // 1000}"
+        path = root.joinpath(name, f"{i // 100 % 10}", f"{i}.txt")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"file {i}\n")
+
+
+def measure(function: Callable, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def glob(root: Path) -> list:
+    nodes = []
+    for p in [root, *root.glob("**/*")]:
+        if p.is_symlink():
+            nodes.append((p, p.readlink()))
+        elif p.is_dir() or p.is_file():
+            nodes.append((p, p.lstat().st_mode))
+    return nodes
+
+
+def scan(root: Path, *args) -> list:
+    nodes = [(root, root.lstat().st_mode)]
+    for entry in walk(root, *args):
+        if entry.is_symlink():
+            nodes.append((Path(entry), Path(entry).readlink()))
+        else:
+            nodes.append((Path(entry), entry.stat(follow_symlinks=False)))
+    return nodes
+
+
+files = int(sys.argv[1]) if len(sys.argv) > 1 else 30000
+repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+with TemporaryDirectory() as temp:
+    root = Path(temp)
+    create(root, files)
+    results = {
+        "glob": lambda: glob(root),
+        "walk": lambda: scan(root),
+        "walk excluding": lambda: scan(root, [], [".git"]),
+        "walk with 4 threads": lambda: scan(root, [], [], 4),
+    }
+
+    print(f"entries: {len(glob(root))}")
+    for name, function in results.items():
+        best = measure(function, repeat)
+        print(f"{name}: {best * 1000:.0f} ms (best of {repeat})")
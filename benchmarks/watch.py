@@ -0,0 +1,63 @@
+"""Benchmark checking a large directory tree for changes.
+
+Creates a temporary tree with the given number of files, a tenth of them in a
+".git" directory, and reports the time of checking it for changes by hashing
+the stat results of all paths found by *Path.glob* like the server used to,
+by polling, and by reading inotify events:
+
+.. code-block:: sh
+   python -m benchmarks.watch [FILES] [REPEAT]
+"""
+
+from typing import Callable
+from pathlib import PosixPath as Path
+from tempfile import TemporaryDirectory
+from hashlib import md5
+import sys
+import time
+
+from pyromaniac.server.watch import Poll, Inotify
+
+
+def create(root: Path, files: int):
+    for i in range(files):
+        name = ".git" if i % 10 == 0 else f"{i // 1000}"
+        path = root.joinpath(name, f"{i // 100 % 10}", f"{i}.txt")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"file {i}\n")
+
+
+def measure(function: Callable, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def glob(root: Path) -> bytes:
+    stat = "\n".join(
+        f"{f},{f.lstat().st_mtime},{f.lstat().st_ctime}"
+        for f in sorted(root.glob("**/*"))
+    )
+    return md5(stat.encode()).digest()
+
+
+files = int(sys.argv[1]) if len(sys.argv) > 1 else 30000
+repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+with TemporaryDirectory() as temp:
+    root = Path(temp)
+    create(root, files)
+    poll, inotify = Poll(root), Inotify(root)
+    results = {
+        "glob": lambda: glob(root),
+        "poll": poll.changed,
+        "inotify": inotify.changed,
+    }
+
+    for name, function in results.items():
+        best = measure(function, repeat)
+        print(f"{name}: {best * 1000:.3f} ms (best of {repeat})")
+    inotify.close()
@@ -1,19 +1,28 @@
+from typing import Any
 from pathlib import PosixPath as Path
 
 from .errors import PyromaniacError, MainComponentIOError
 from .args import parse
 from .remote import Remote
-from .compiler.butane import configure
-from .iso import customize
-from .server import serve
-from .compile import compile
+from .compiler.butane import configure, report
+from .iso import customize, customize_batch
+from .server import serve, certs
+from .server.watch import IGNORE
+from .server.inventory import Inventory
+from .compiler import Compiler
+from .compiler.component import Component
+from .compiler.depend import depfile
+from .batch import batch, load
 
 args = parse()
-configure(args.butane)
+configure(args.butane, args.butane_format, args.compress)
+certs.configure(args.key_type)
 remote = Remote.create(args.address, args.auth)
+iso_cache = args.iso_cache_size if args.iso_cache else None
+compiler = Compiler.create(Path("."))
 
 
-def ignition():
+def read() -> str:
     # only reload source if not from a character device (like standard input)
     global source
     if 'source' not in globals() or not args.input.is_char_device():
@@ -22,19 +31,81 @@ def ignition():
         except IOError as e:
             raise MainComponentIOError() from e
 
-    return compile(source, remote, tuple(args.args))
+    return source
+
+
+def ignition(*values: Any, **kwargs: Any) -> str:
+    # keep library across compilations in serve mode, dropping changed parts
+    compiler.refresh()
+    values = values or tuple(args.args)
+    config = compiler.compile(read(), remote, values, kwargs)
+    report(compiler.saved)
+    return config
+
+
+def parameters(*values: Any, **kwargs: Any) -> list[str]:
+    # name main component parameters left for query parameters in serve mode
+    values = values or tuple(args.args)
+    return Component.create(read()).sig.unbound(*values, **kwargs)
+
+
+def images(configs: dict[str, str]) -> dict[str, Path]:
+    # generate ISO images for the configs of a batch
+    entries = {
+        name: (config, args.iso_arch, args.iso_net, args.iso_disk,
+               args.installer)
+        for name, config in configs.items()
+    }
+    return customize_batch(
+        entries, args.batch_dir, args.batch_jobs, args.iso_ttl,
+        args.iso_offline, iso_cache,
+    )
+
+
+def depend(*inputs: Path, rules: dict[Path, set[Path]] | None = None):
+    # write make rules for the compiled targets if requested
+    if args.depfile is None:
+        return
+    if rules is None:
+        rules = {args.depfile.with_suffix(""): compiler.dependencies}
+    paths = {p for p in inputs if p.is_file() and not p.is_relative_to("/dev")}
+    args.depfile.write_text("".join(
+        depfile(str(target), deps | paths) for target, deps in rules.items()
+    ))
 
 
 try:
     match args.mode:
+        case 'ign' if args.batch is not None:
+            rules = batch(
+                read(), remote, load(args.batch), args.batch_dir,
+                args.batch_jobs,
+            )
+            depend(args.input, args.batch, rules=rules)
         case 'ign':
             print(ignition())
+            depend(args.input)
+        case 'iso' if args.batch is not None:
+            rules = batch(
+                read(), remote, load(args.batch), args.batch_dir,
+                args.batch_jobs, images,
+            )
+            depend(args.input, args.batch, rules=rules)
         case 'iso':
             customize(
                 ignition(), args.iso_arch, args.iso_net, args.iso_disk,
-                args.installer,
+                args.installer, args.iso_ttl, args.iso_offline, iso_cache,
             )
+            depend(args.input)
         case 'serve':
-            serve(remote, ignition, Path("."))
+            inventory = None
+            if args.serve_inventory is not None:
+                inventory = Inventory(load(args.serve_inventory))
+            serve(
+                remote, ignition, Path("."), IGNORE + args.serve_ignore,
+                inventory, parameters,
+            )
+        case 'precompile':
+            compiler.precompile()
 except PyromaniacError as e:
     exit(f"Error: {e}")
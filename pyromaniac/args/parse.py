@@ -10,4 +10,18 @@ def parse(args: list[str] | None = None) -> Namespace:
     :returns: representation of the parsed arguments
     """
     namespace = parser.parse_args(args)
+    if namespace.batch is not None:
+        if namespace.mode not in ['ign', 'iso']:
+            parser.error("--batch can only be used for compiling configs")
+        if namespace.args != []:
+            parser.error("--batch can't be combined with component arguments")
+    if namespace.serve_inventory is not None:
+        if namespace.mode != 'serve':
+            parser.error("--serve-inventory can only be used in serve mode")
+        if namespace.args != []:
+            parser.error(
+                "--serve-inventory can't be combined with component arguments"
+            )
+    if namespace.depfile is not None and namespace.mode not in ['ign', 'iso']:
+        parser.error("--depfile can only be used for compiling configs")
     return namespace
@@ -1,6 +1,7 @@
 """Construct argument parser"""
 
 from argparse import ArgumentParser
+from pathlib import PosixPath as Path
 
 from .. import paths
 from .formatter import Formatter
@@ -58,6 +59,29 @@ parser.add_argument(
     help="Make butane fail on any warnings.",
 )
 
+parser.add_argument(
+    "--butane-format", choices=['yaml', 'json'], default='yaml', help=(
+        "Set the format to feed configs to butane in. JSON is faster to "
+        "produce for large configs, YAML makes for more readable error "
+        "messages. (default: %(default)s)"
+    ),
+)
+
+parser.add_argument("--compress", type=types.size, metavar="SIZE", help=(
+    "Encode file contents of at least SIZE bytes (or K, M, or G suffixed "
+    "sizes) as data URLs before passing configs to butane and report the "
+    "bytes saved by compressing them. Contents that barely compress are "
+    "detected from a sample and not compressed at all, which saves time on "
+    "large binary files. (default: leave all contents to butane)"
+))
+
+parser.add_argument("--depfile", type=Path, metavar="FILE", help=(
+    "Write the local files and directories the compilation read to FILE as "
+    "a make rule, as understood by make and ninja. The rule's target is the "
+    'path of FILE without its suffix, e.g. "host.ign" for "host.ign.d", or '
+    "the ignition files in batch mode."
+))
+
 parser.add_argument(
     "--iso", action='store_const', dest='mode', const='iso', default='ign',
     help=(
@@ -81,6 +105,32 @@ parser.add_argument("--iso-disk", help=(
     "of creating a live image from it."
 ))
 
+parser.add_argument(
+    "--iso-ttl", type=types.duration, default=86400, metavar="DURATION",
+    help=(
+        "Use a downloaded base image for this many seconds, or minutes, "
+        'hours, or days with an "m", "h", or "d" suffix, before checking for '
+        "a newer one. (default: 1d)"
+    ),
+)
+parser.add_argument("--iso-offline", action='store_true', help=(
+    "Only use base images downloaded before, regardless of their age, and "
+    "never contact the download server."
+))
+parser.add_argument("--iso-cache", action='store_true', help=(
+    f"Store generated ISO images in {paths.isos} and send an image stored "
+    "before instead of generating it again if the base image, the config, "
+    "and all ISO options are the same."
+))
+parser.add_argument(
+    "--iso-cache-size", type=types.size, default="8G", metavar="SIZE",
+    help=(
+        "Remove the least recently used stored ISO images when they take up "
+        "more than SIZE bytes (or K, M, or G suffixed sizes). (default: "
+        "%(default)s)"
+    ),
+)
+
 parser.add_argument(
     "--serve", action='store_const', dest='mode', const='serve',
     help=(
@@ -92,6 +142,54 @@ parser.add_argument(
     ),
 )
 
+parser.add_argument(
+    "--serve-ignore", action='append', default=[], metavar="PATTERN",
+    help=(
+        "Ignore changes to files matching a glob pattern when deciding "
+        "whether to recompile the config in serve mode. Patterns without a "
+        "slash match file names, others paths relative to the working "
+        'directory. Can be passed multiple times. Changes in ".git" are '
+        "always ignored."
+    ),
+)
+
+parser.add_argument("--serve-inventory", type=Path, metavar="MATRIX", help=(
+    'Serve the configs of the hosts in a matrix file under "/config/NAME.ign" '
+    "in serve mode. The matrix has the same format as for --batch. Hosts "
+    "named after an IP or MAC address also get their config from "
+    '"/config.ign". Query parameters are passed to the main component as '
+    "additional keyword arguments."
+))
+
+parser.add_argument(
+    "--precompile", action='store_const', dest='mode', const='precompile',
+    help=(
+        "Parse all components in the working directory and the standard "
+        f"library and store them in {paths.components} instead of compiling "
+        "a config. This speeds up subsequent runs if the directory is "
+        "persisted as a volume."
+    ),
+)
+
+parser.add_argument("--batch", type=Path, metavar="MATRIX", help=(
+    "Compile the config once for every entry of a matrix file and write the "
+    "results, or ISO images in ISO mode, to the batch directory instead of "
+    "standard output. The matrix maps output names to the arguments for the "
+    "main component, either as a CSV file with the name in the first column "
+    "and positional arguments in the remaining ones, or as a YAML mapping "
+    "from names to lists of positional arguments or dicts of keyword "
+    "arguments."
+))
+parser.add_argument("--batch-dir", type=Path, default=Path("."), help=(
+    'Set the directory to write the "NAME.ign" or "NAME.iso" files of a '
+    "batch to. (default: the working directory)"
+))
+parser.add_argument("--batch-jobs", type=int, metavar="N", help=(
+    "Set the number of processes compiling batch entries and generating "
+    "their ISO images in parallel. (default: the number of available "
+    "processor cores)"
+))
+
 parser.add_argument(
     "--address", default="http://127.0.0.1:8000/", type=types.address,
     help=(
@@ -103,6 +201,14 @@ parser.add_argument(
         "connection. (default: %(default)s)"
     ),
 )
+parser.add_argument(
+    "--key-type", choices=['rsa', 'ecdsa'], default='rsa', help=(
+        "Set the type of newly generated TLS keys. ECDSA P-256 keys make TLS "
+        "handshakes much cheaper for the server than 2048 bit RSA keys. "
+        "Existing root keys are kept, server keys are replaced. (default: "
+        "%(default)s)"
+    ),
+)
 parser.add_argument("--auth", help=(
     "Set the credentials for HTTP(S) basic authentication in the format "
     '"USER:PASS". Use "auto" to generate credentials from a cryptographic '
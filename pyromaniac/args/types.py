@@ -6,6 +6,8 @@ ADDRESS_RE = re.compile("".join([
     r'(\[[0-9a-f:]+\]|[0-9.]+|[a-z0-9-.]+)',
     r'(?::([1-9][0-9]*))?',
 ]))
+SIZE_RE = re.compile(r'([0-9]+)([kmg]?)')
+DURATION_RE = re.compile(r'([0-9]+)([smhd]?)')
 OptStr = str | None
 
 
@@ -46,3 +48,19 @@ def address(value: str) -> tuple[str, str, int]:
 def input(value: str) -> Path:
     path = Path(value)
     return path.joinpath("main.pyro") if path.is_dir() else path
+
+
+def size(value: str) -> int:
+    match = SIZE_RE.fullmatch(value.lower())
+    if not match:
+        raise ValueError(f'invalid size "{value}"')
+    return int(match[1]) * 1024 ** " kmg".index(match[2] or " ")
+
+
+def duration(value: str) -> int:
+    match = DURATION_RE.fullmatch(value.lower())
+    if not match:
+        raise ValueError(f'invalid duration "{value}"')
+    return int(match[1]) * {"s": 1, "m": 60, "h": 3600, "d": 86400}[
+        match[2] or "s"
+    ]
@@ -0,0 +1,5 @@
+from .errors import BatchError
+from .matrix import load
+from .batch import batch
+
+__all__ = [batch, load, BatchError]
@@ -0,0 +1,105 @@
+from typing import Iterable, Callable
+import os
+import sys
+import traceback
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import PosixPath as Path
+
+from ..errors import PyromaniacError
+from ..remote import Remote
+from ..compiler import Compiler, CompilerError
+from ..compiler.component import Component
+from ..compiler.butane import report
+from .matrix import Entry
+from .errors import EntriesFailedError
+
+# compiler, main component, and remote for the workers
+state: tuple[Compiler, Component, Remote] | None = None
+
+# compiled config, its dependencies, and bytes saved by compression or error
+Result = tuple[str, set[Path], int] | str
+
+
+def batch(
+    source: str, remote: Remote, matrix: dict[str, Entry], output: Path,
+    jobs: int | None = None,
+    build: Callable[[dict[str, str]], dict[str, Path]] | None = None,
+) -> dict[Path, set[Path]]:
+    """Compile config for every entry of a matrix into an output directory.
+
+    Loads the library and parses the main component once and compiles the
+    entries in a pool of forked worker processes sharing them. Writes one
+    ignition file named after each entry, or passes the configs to *build*
+    for generating other files from them. Failing entries are reported on
+    standard error without aborting the others. The bytes saved by compressing
+    file contents are reported once for all entries.
+
+    :param source: pyromaniac config source text
+    :param remote: remote object with address and authentication secret
+    :param matrix: dict mapping entry names to component arguments
+    :param output: directory to write the ignition files to
+    :param jobs: number of worker processes, defaults to the number of cores
+    :param build: function generating files from the configs by entry name
+        and returning their paths by entry name
+    :returns: dict mapping the generated files to the paths they depend on
+    """
+    global state
+    compiler = Compiler.create(Path("."))
+    try:
+        compiler.precompile()
+    except CompilerError:
+        pass  # broken components are reported by the entries using them
+    comp = Component.create(source)
+    output.mkdir(parents=True, exist_ok=True)
+
+    jobs = jobs or len(os.sched_getaffinity(0))
+    state = compiler, comp, remote
+    try:
+        results = dict(run(matrix.items(), min(jobs, len(matrix))))
+    finally:
+        state = None
+
+    failed = [name for name in matrix if isinstance(results[name], str)]
+    for name in failed:
+        print(f'Error in "{name}": {results[name]}', file=sys.stderr)
+
+    configs = {
+        name: result[0] for name, result in results.items()
+        if not isinstance(result, str)
+    }
+    report(sum(results[name][2] for name in configs))
+    if build is None:
+        targets = {name: output.joinpath(f"{name}.ign") for name in configs}
+        for name, config in configs.items():
+            targets[name].write_text(config + "\n")
+    else:
+        targets = build(configs)
+
+    if failed != []:
+        raise EntriesFailedError(failed, len(matrix))
+    return {targets[name]: results[name][1] for name in configs}
+
+
+# compile entries in process or in a pool of forked processes
+def run(
+    entries: Iterable[tuple[str, Entry]], jobs: int,
+) -> Iterable[tuple[str, Result]]:
+    if jobs <= 1:
+        return list(map(compile_entry, entries))
+    context = get_context("fork")
+    with ProcessPoolExecutor(jobs, mp_context=context) as pool:
+        return list(pool.map(compile_entry, entries))
+
+
+# compile entry returning config and dependencies or error message
+def compile_entry(item: tuple[str, Entry]) -> tuple[str, Result]:
+    name, (args, kwargs) = item
+    compiler, comp, remote = state
+    try:
+        ignition = compiler.compile_component(comp, remote, args, kwargs)
+    except PyromaniacError as e:
+        return name, str(e)
+    except Exception as e:
+        return name, "".join(traceback.format_exception_only(e)).strip()
+    return name, (ignition, compiler.dependencies, compiler.saved)
@@ -0,0 +1,38 @@
+from ..errors import PyromaniacError
+
+
+class BatchError(PyromaniacError):
+    """Base class for batch compilation errors."""
+
+
+class MatrixError(BatchError):
+    """Error raised when the batch matrix is invalid.
+
+    :param reason: description of the problem
+    """
+
+    def __init__(self, reason: str):
+        super().__init__()
+        self.reason = reason
+
+    def __str__(self) -> str:
+        return f"Loading the batch matrix failed: {self.reason}"
+
+
+class EntriesFailedError(BatchError):
+    """Error raised when compiling some of the batch entries failed.
+
+    :param failed: names of the failed entries
+    :param total: total number of entries
+    """
+
+    def __init__(self, failed: list[str], total: int):
+        super().__init__()
+        self.failed = failed
+        self.total = total
+
+    def __str__(self) -> str:
+        return (
+            f"Compiling {len(self.failed)} of {self.total} batch entries "
+            "failed."
+        )
@@ -0,0 +1,71 @@
+from typing import Any
+import csv
+from io import StringIO
+from pathlib import PosixPath as Path
+import yaml
+
+from ..compiler import serialize
+from .errors import MatrixError
+
+# positional and keyword arguments for compiling an entry
+Entry = tuple[tuple, dict[str, Any]]
+
+
+def load(path: Path) -> dict[str, Entry]:
+    """Load batch matrix mapping output names to component arguments.
+
+    CSV files, recognized by their suffix, contain one entry per row with the
+    name in the first column and positional arguments in the remaining ones.
+    Other files are parsed as YAML mapping names to lists of positional
+    arguments, dicts of keyword arguments, or single positional arguments.
+
+    :param path: path of the matrix file
+    :returns: dict mapping entry names to component arguments
+    """
+    try:
+        text = path.read_text()
+    except OSError as e:
+        raise MatrixError(f'Reading "{path}" failed.') from e
+
+    if path.suffix.lower() == ".csv":
+        entries = load_csv(text)
+    else:
+        entries = load_yaml(text)
+
+    for name in entries:
+        if name in ["", ".", ".."] or "/" in name or "\0" in name:
+            raise MatrixError(f"{repr(name)} is not a valid file name.")
+    return entries
+
+
+def load_csv(text: str) -> dict[str, Entry]:
+    entries = {}
+    for row in csv.reader(StringIO(text)):
+        if row == []:
+            continue
+        if row[0] in entries:
+            raise MatrixError(f'Duplicate entry "{row[0]}".')
+        entries[row[0]] = tuple(row[1:]), {}
+    return entries
+
+
+def load_yaml(text: str) -> dict[str, Entry]:
+    try:
+        matrix = serialize.load(text)
+    except yaml.YAMLError as e:
+        raise MatrixError("Invalid YAML.") from e
+    if not isinstance(matrix, dict):
+        raise MatrixError("Expected a mapping of names to arguments.")
+
+    entries = {}
+    for name, value in matrix.items():
+        match value:
+            case None: entries[str(name)] = (), {}
+            case list(): entries[str(name)] = tuple(value), {}
+            case dict() if all(isinstance(k, str) for k in value):
+                entries[str(name)] = (), value
+            case dict(): raise MatrixError(
+                f'Keyword names of "{name}" must be strings.'
+            )
+            case _: entries[str(name)] = (value,), {}
+    return entries
@@ -0,0 +1,154 @@
+import os
+import shutil
+from pathlib import PosixPath as Path
+from tempfile import NamedTemporaryFile
+from hashlib import sha256
+
+
+class Store:
+    """Directory of files addressed by a hash of the inputs they depend on.
+
+    All operations are best-effort: Failing to read or write the directory,
+    e.g. because it doesn't exist or isn't writable, is treated like a cache
+    miss instead of raising an error.
+
+    If a size is given, reading a file marks it as recently used and storing a
+    file evicts the least recently used ones until the total size fits. Files
+    larger than the size aren't stored at all.
+
+    :param path: directory to keep the files in
+    :param size: maximum total size of the files in bytes
+    """
+
+    def __init__(self, path: Path, size: int | None = None):
+        self.path = path
+        self.size = size
+
+    @staticmethod
+    def key(*parts: str | bytes) -> str:
+        """Create a key by hashing the given parts unambiguously.
+
+        :param parts: strings and byte strings to derive the key from
+        :returns: hex digest to address a file with
+        """
+        digest = sha256()
+        for part in parts:
+            if isinstance(part, str):
+                part = part.encode()
+            digest.update(len(part).to_bytes(8, 'big'))
+            digest.update(part)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> bytes | None:
+        """Read the file stored under the given key.
+
+        :param key: key of the file
+        :returns: content of the file or None if it isn't available
+        """
+        file = self.path.joinpath(key)
+        try:
+            data = file.read_bytes()
+        except OSError:
+            return None
+
+        if self.size is not None:
+            try:
+                os.utime(file)
+            except OSError:
+                pass
+        return data
+
+    def put(self, key: str, data: bytes):
+        """Atomically store a file under the given key.
+
+        :param key: key of the file
+        :param data: content to write to the file
+        """
+        if self.size is not None and len(data) > self.size:
+            return
+
+        temp = None
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            with NamedTemporaryFile(dir=self.path, delete=False) as file:
+                temp = Path(file.name)
+                file.write(data)
+            temp.replace(self.path.joinpath(key))
+        except OSError:
+            if temp is not None:
+                temp.unlink(missing_ok=True)
+            return
+
+        if self.size is not None:
+            self.evict()
+
+    def find(self, key: str) -> Path | None:
+        """Get the path of the file stored under the given key.
+
+        For files too large to read into memory at once. Marks the file as
+        recently used like *get*.
+
+        :param key: key of the file
+        :returns: path of the file or None if it isn't available
+        """
+        file = self.path.joinpath(key)
+        try:
+            if self.size is not None:
+                os.utime(file)
+            elif not file.is_file():
+                return None
+        except OSError:
+            return None
+        return file
+
+    def add(self, key: str, source: Path, move: bool = False) -> Path | None:
+        """Atomically store a copy of a file under the given key.
+
+        :param key: key of the file
+        :param source: path of the file to store
+        :param move: whether to move the file into the directory instead of
+            copying it, which requires it to be on the same file system
+        :returns: path of the stored file or None if it wasn't stored
+        """
+        temp = None
+        try:
+            if self.size is not None and source.stat().st_size > self.size:
+                return None
+            self.path.mkdir(parents=True, exist_ok=True)
+            if move:
+                source.replace(self.path.joinpath(key))
+            else:
+                with NamedTemporaryFile(dir=self.path, delete=False) as file:
+                    temp = Path(file.name)
+                shutil.copyfile(source, temp)
+                temp.replace(self.path.joinpath(key))
+        except OSError:
+            if temp is not None:
+                temp.unlink(missing_ok=True)
+            return None
+
+        if self.size is not None:
+            self.evict()
+        return self.path.joinpath(key)
+
+    def evict(self):
+        """Remove least recently used files until the total size fits."""
+        try:
+            with os.scandir(self.path) as entries:
+                files = sorted(
+                    (stat.st_mtime_ns, stat.st_size, entry.path)
+                    for entry in entries if entry.is_file()
+                    for stat in [entry.stat()]
+                )
+        except OSError:
+            return
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.size:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            total -= size
@@ -8,6 +8,7 @@ from .compiler import Compiler
 def compile(
     source: str, remote: Remote,
     args: tuple = tuple(), kwargs: dict[str, Any] = {},
+    dependencies: set[Path] | None = None,
 ) -> str:
     """Compile config to ingnition.
 
@@ -15,7 +16,12 @@ def compile(
     :param remote: remote object with address and authentication secret
     :param args: positional arguments to pass to the component
     :param kwargs: keyword arguments to pass to the component
+    :param dependencies: set to add the local files and directories read to
     :returns: compiled ignition config
     """
     compiler = Compiler.create(Path("."))
-    return compiler.compile(source, remote, args, kwargs)
+    try:
+        return compiler.compile(source, remote, args, kwargs)
+    finally:
+        if dependencies is not None:
+            dependencies.update(compiler.dependencies)
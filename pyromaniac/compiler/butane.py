@@ -1,40 +1,117 @@
-from typing import Any
+from typing import Any, Iterator
 import sys
 import re
+import json
+import posixpath
 import subprocess
+from functools import cache
+from contextvars import ContextVar
 from pathlib import PosixPath as Path
-import yaml
 
 from .. import paths
+from ..cache import Store
 from .errors import NotADictError, ButaneError
-from .url import URL
+from .translate import translate, dump, Unsupported
+from .compress import compress
+from .depend import depend
+from . import serialize
 
 LINE_RE = re.compile(
     '^((?:warning|error) at .*), line [0-9]+ col [0-9]+(: .*)$',
 )
 
 config: list[str] = []
+source_format = 'yaml'
+threshold: int | None = None
 
+# bytes of file contents saved by compression in the current compilation
+saved: ContextVar[int] = ContextVar('saved', default=0)
 
-def configure(new: list[str]):
+# command line parameters the in-process translator can handle
+NATIVE = {'--pretty', '--strict'}
+
+# fields referencing files in the files directory
+LOCAL_FIELDS = ['local', 'contents_local', 'ssh_authorized_keys_local']
+
+# maximum total size of cached translations in bytes
+CACHE_SIZE = 64 * 1024 * 1024
+
+
+def configure(
+    new: list[str], format: str = 'yaml', compression: int | None = None,
+):
     """Configure butane command line parameters.
 
     :param new: list of butane command line parameters
+    :param format: format to feed configs to butane in, "yaml" or "json"
+    :param compression: minimum size of file contents to compress or None
     """
-    global config
-    config = new
+    global config, source_format, threshold
+    config, source_format, threshold = new, format, compression
 
 
 def butane(source: dict) -> str:
     """Transpile butane config to ignition.
 
+    Translates configs in process if possible and runs the butane executable
+    for everything the translator doesn't support.
+
     :param source: butane config structured dict
     :returns: ignition config as string
     """
     if not isinstance(source, dict):
         raise NotADictError(source)
 
-    code = yaml.dump(source)
+    depend(*(
+        posixpath.normpath("./" + str(path)) for path in local_paths(source)
+        if isinstance(path, str | Path)
+    ))
+
+    if threshold is not None:
+        source, count = compress(source, threshold)
+        saved.set(saved.get() + count)
+
+    if NATIVE.issuperset(config):
+        try:
+            return dump(translate(source), '--pretty' in config)
+        except Unsupported:
+            pass
+
+    return run(source)
+
+
+def report(count: int):
+    """Print the number of bytes saved by compression to standard error.
+
+    :param count: bytes of file contents saved, nothing is printed if zero
+    """
+    if count > 0:
+        print(
+            f"Compression saved {count} bytes of file contents.",
+            file=sys.stderr,
+        )
+
+
+def run(source: dict) -> str:
+    """Transpile butane config to ignition using the butane executable.
+
+    Results are cached persistently, keyed by the config, the command line
+    parameters, the butane version, and the contents of referenced local files.
+
+    :param source: butane config structured dict
+    :returns: ignition config as string
+    """
+    code = serialize.dump(source, source_format)
+    store, key = Store(paths.translations, CACHE_SIZE), cache_key(source, code)
+    if key is not None and (data := store.get(key)) is not None:
+        try:
+            output, warning = json.loads(data)
+        except (ValueError, TypeError):
+            pass
+        else:
+            warning == "" or print(warning, file=sys.stderr)
+            return output
+
     res = subprocess.run(
         [paths.butane, "--files-dir", ".", *config],
         input=code, capture_output=True, text=True,
@@ -42,10 +119,63 @@ def butane(source: dict) -> str:
     if res.returncode != 0:
         raise ButaneError(clean(res.stderr.strip()), code)
 
-    warning = res.stderr.strip()
-    warning == "" or print(clean(warning), file=sys.stderr)
-
-    return res.stdout.strip()
+    output, warning = res.stdout.strip(), clean(res.stderr.strip())
+    warning == "" or print(warning, file=sys.stderr)
+
+    if key is not None:
+        store.put(key, json.dumps([output, warning]).encode())
+    return output
+
+
+# derive translation cache key or return None if not cacheable
+def cache_key(source: dict, code: str) -> str | None:
+    butane_version = version()
+    files = local_files(source)
+    if butane_version is None or files is None:
+        return None
+    return Store.key(butane_version, code, "\0".join(config), *files)
+
+
+# get version of the butane executable once
+@cache
+def version() -> str | None:
+    try:
+        res = subprocess.run(
+            [paths.butane, "--version"], capture_output=True, text=True,
+        )
+    except OSError:
+        return None
+    return res.stdout.strip() if res.returncode == 0 else None
+
+
+# read local files referenced in config relative to the files directory
+def local_files(value: Any) -> list[bytes] | None:
+    files = [local_file(path) for path in local_paths(value)]
+    return None if None in files else files
+
+
+# find values of fields referencing files in the files directory
+def local_paths(value: Any) -> Iterator[Any]:
+    match value:
+        case dict():
+            for key, item in value.items():
+                if key in LOCAL_FIELDS:
+                    yield from item if isinstance(item, list) else [item]
+                else:
+                    yield from local_paths(item)
+        case list():
+            for item in value:
+                yield from local_paths(item)
+
+
+def local_file(path: Any) -> bytes | None:
+    if not isinstance(path, str | Path):
+        return None
+    path = posixpath.normpath("./" + str(path))
+    try:
+        return path.encode() + b"\0" + Path(path).read_bytes()
+    except OSError:
+        return None
 
 
 def clean(text: str) -> str:
@@ -55,12 +185,3 @@ def clean(text: str) -> str:
         if match:
             lines[i] = match[1] + match[2]
     return "\n".join(lines)
-
-
-# configure Path and URL serialization
-def representer(dumper: yaml.Dumper, data: Any):
-    return dumper.represent_scalar("tag:yaml.org,2002:str", str(data))
-
-
-yaml.add_representer(Path, representer)
-yaml.add_representer(URL, representer)
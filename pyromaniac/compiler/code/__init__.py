@@ -2,6 +2,7 @@ from .signature import Signature
 from .python import Python
 from .yaml import Yaml
 from .parse import parse
+from .docstring import pure
 
 
-__all__ = [parse, Signature, Python, Yaml]
+__all__ = [parse, pure, Signature, Python, Yaml]
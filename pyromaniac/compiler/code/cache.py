@@ -0,0 +1,56 @@
+from types import CodeType
+from pathlib import PosixPath as Path
+from functools import cache
+import marshal
+from importlib.util import MAGIC_NUMBER
+from jinja2 import __version__ as jinja_version
+
+from ... import paths
+from ...cache import Store
+
+# package of the modules generating the cached code
+MODULES = Path(__file__).parent
+
+Compiled = tuple[str | None, CodeType, CodeType | None, CodeType | None]
+
+
+def load(source: str) -> Compiled | None:
+    """Load compiled component code from the persistent cache.
+
+    :param source: component source code
+    :returns: doc string and compiled code segments or None if not cached
+    """
+    data = Store(paths.components).get(key(source))
+    if data is None:
+        return None
+
+    try:
+        compiled = marshal.loads(data)
+    except (EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(compiled, tuple) or len(compiled) != 4:
+        return None
+    return compiled
+
+
+def store(source: str, compiled: Compiled):
+    """Store compiled component code in the persistent cache.
+
+    :param source: component source code
+    :param compiled: doc string and compiled code segments
+    """
+    Store(paths.components).put(key(source), marshal.dumps(compiled))
+
+
+# derive cache key from source and everything the compiled code depends on
+def key(source: str) -> str:
+    return Store.key(MAGIC_NUMBER, jinja_version, modules(), source)
+
+
+# hash the modules generating the cached code, so changing them invalidates it
+@cache
+def modules() -> str:
+    return Store.key(*(
+        part for path in sorted(MODULES.rglob("*.py"))
+        for part in (str(path.relative_to(MODULES)), path.read_bytes())
+    ))
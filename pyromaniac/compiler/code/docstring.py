@@ -2,6 +2,9 @@ import ast
 
 from .errors import InvalidDocstringError
 
+# doc string line declaring a component pure
+PURE = ":pure:"
+
 
 def parse(code: str) -> str:
     # parse doc string source code
@@ -16,3 +19,17 @@ def parse(code: str) -> str:
 
     # return string content
     return tree.body[0].value.value
+
+
+def pure(doc: str | None) -> bool:
+    """Check whether a doc string declares its component pure.
+
+    A pure component's result only depends on its arguments, so it may be
+    reused for subsequent calls with equal arguments.
+
+    :param doc: parsed doc string or None
+    :returns: whether a line consists of the *:pure:* marker
+    """
+    if doc is None:
+        return False
+    return any(line.strip() == PURE for line in doc.splitlines())
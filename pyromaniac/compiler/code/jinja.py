@@ -3,8 +3,10 @@ from datetime import date, datetime, time
 from pathlib import PosixPath as Path
 from json import dumps as json_dumps, JSONEncoder as JSONEncoderBase
 from jinja2 import Environment
+from jinja2.compiler import CodeGenerator as CodeGeneratorBase
 
 from ..url import URL
+from . import splice
 
 
 # Raw object wrapper
@@ -34,9 +36,40 @@ def json_finalize(obj: Any) -> str:
         case _: return json_dumps(obj, cls=JSONEncoder)
 
 
+# YAML environment splicing in values as placeholders while rendering
+def yaml_finalize(obj: Any) -> str:
+    match obj:
+        case Raw(content): return str(content)
+
+    current = splice.current.get()
+    token = current.add(obj) if current is not None else None
+    if token is not None:
+        return token
+    return yaml_buffer_finalize(obj)
+
+
+# finalize values rendered into buffers or blocks, whose output can be captured
+def yaml_buffer_finalize(obj: Any) -> str:
+    match obj:
+        case Raw(content): return str(content)
+        case _: return splice.join_surrogates(json_dumps(obj, cls=JSONEncoder))
+
+
+# code generator finalizing output that can be captured without placeholders,
+# hooking into internals of the Jinja2 3.1 releases pyproject.toml allows
+class CodeGenerator(CodeGeneratorBase):
+    def _output_child_pre(self, node: Any, frame: Any, finalize: Any):
+        captured = frame.buffer is not None or frame.block is not None
+        if captured and finalize.src is not None:
+            finalize = finalize._replace(src="environment.buffer_finalize(")
+        super()._output_child_pre(node, frame, finalize)
+
+
 pyro_env = Environment(
-    variable_start_string="`", variable_end_string="`", finalize=json_finalize
+    variable_start_string="`", variable_end_string="`", finalize=yaml_finalize
 )
+pyro_env.code_generator_class = CodeGenerator
+pyro_env.buffer_finalize = yaml_buffer_finalize
 pyro_env.filters['raw'] = lambda c: Raw(c)
 pyro_env.tests['ellipsis'] = ellipsis
 
@@ -1,8 +1,11 @@
+from types import CodeType
+
 from .segment import segment
 from .docstring import parse as docstring_parse
-from .signature import Signature
+from .signature import Signature, DEFAULT
 from .python import Python
 from .yaml import Yaml
+from . import cache
 
 
 def parse(
@@ -10,13 +13,38 @@ def parse(
 ) -> tuple[str | None, Signature, Python | None, Yaml | None]:
     """Parse component code and return compiled code segments.
 
+    Compiled code segments are loaded from and added to the persistent
+    component cache to skip parsing components that have been seen before.
+
     :param code: component source code
     :returns: tuple with doc string, signature, and compiled python and yaml
     """
+    compiled = cache.load(code)
+    if compiled is None:
+        compiled = compile(code)
+        cache.store(code, compiled)
+
+    doc, sig, python, yaml = compiled
+    return (
+        doc,
+        Signature.load(sig),
+        Python(python) if python is not None else None,
+        Yaml.load(yaml) if yaml is not None else None,
+    )
+
+
+def compile(
+    code: str,
+) -> tuple[str | None, CodeType, CodeType | None, CodeType | None]:
+    """Segment and compile component code.
+
+    :param code: component source code
+    :returns: tuple with doc string and compiled signature, python, and yaml
+    """
     doc, sig, python, yaml = segment(code)
     return (
         docstring_parse(doc) if doc is not None else None,
-        Signature.create(sig) if sig is not None else Signature.default(),
-        Python.create(python, yaml is None) if python is not None else None,
-        Yaml.create(yaml) if yaml is not None else None,
+        Signature.compile(sig if sig is not None else DEFAULT),
+        Python.compile(python, yaml is None) if python is not None else None,
+        Yaml.compile(yaml) if yaml is not None else None,
     )
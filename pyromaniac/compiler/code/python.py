@@ -1,33 +1,49 @@
 from typing import Self
+from types import CodeType
 import ast
 
 from ..errors import CompilerError
+from ..context import Namespace
 from .errors import PythonSyntaxError, PythonRuntimeError
 
 
 class Python:
-    """Component python code."""
+    """Component python code.
 
-    def __init__(self, code: str):
+    :param code: compiled component python code
+    """
+
+    def __init__(self, code: CodeType):
         self.code = code
 
     @classmethod
     def create(cls, code: str, pure: bool) -> Self:
         """Create component python code and check syntax.
 
+        :param code: component python source code
+        :param pure: whether is pure python component
+        :returns: constructed component python code object
+        """
+        return cls(cls.compile(code, pure))
+
+    @staticmethod
+    def compile(code: str, pure: bool) -> CodeType:
+        """Compile component python code and check syntax.
+
         Modifies python code to store result of trailing expression in variable
         named *result* if a pure python component.
 
         :param code: component python source code
-        :param last: whether is pure python component
-        :returns: constructed component python code object
+        :param pure: whether is pure python component
+        :returns: compiled python code
         """
         if pure:
             code = add_assignment(code)
-        else:
-            check_syntax(code)
 
-        return cls(code)
+        try:
+            return compile(code, "<string>", "exec")
+        except SyntaxError as e:
+            raise PythonSyntaxError() from e
 
     def execute(self, context: dict):
         """Execute component python code in given context.
@@ -38,22 +54,26 @@ class Python:
         In pure python components the result of the trailing expression will be
         stored in the contexts *result* field if no error occurs.
 
+        If the context's *__builtins__* is a namespace, python's builtins are
+        made available as a fallback to it during execution.
+
         :param context: context to execute code in
         """
+        names = context.get('__builtins__')
+        if isinstance(names, Namespace):
+            context['__builtins__'] = names.builtins
+
         try:
             exec(self.code, context)
-            del context['__builtins__']
         except CompilerError as e:
             raise e
         except Exception as e:
             raise PythonRuntimeError() from e
-
-
-def check_syntax(code: str):
-    try:
-        ast.parse(code)
-    except SyntaxError as e:
-        raise PythonSyntaxError() from e
+        finally:
+            if names is None:
+                context.pop('__builtins__', None)
+            else:
+                context['__builtins__'] = names
 
 
 def add_assignment(code: str) -> str:
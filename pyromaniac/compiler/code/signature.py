@@ -1,5 +1,5 @@
 from typing import Self, Any
-from types import EllipsisType
+from types import EllipsisType, CodeType
 from inspect import Parameter
 import inspect
 from pathlib import PosixPath as Path
@@ -8,6 +8,11 @@ from .errors import InvalidSignatureError, InvalidArgumentError
 from ..url import URL
 from .type import Type
 
+DEFAULT = "*args, **kwargs"
+
+# kinds of parameters that can be passed by keyword
+KEYWORDS = [Parameter.POSITIONAL_OR_KEYWORD, Parameter.KEYWORD_ONLY]
+
 
 class Signature:
     """Component signature.
@@ -27,9 +32,30 @@ class Signature:
         :param code: signature code enclosed in parantheses
         :returns: compiled signature object
         """
+        return cls.load(cls.compile(code))
+
+    @staticmethod
+    def compile(code: str) -> CodeType:
+        """Compile signature source code into a function definition.
+
+        :param code: signature code enclosed in parantheses
+        :returns: compiled python code defining a function named *func*
+        """
+        try:
+            return compile(f"def func({code}): pass", "<string>", "exec")
+        except Exception as e:
+            raise InvalidSignatureError() from e
+
+    @classmethod
+    def load(cls, code: CodeType) -> Self:
+        """Create signature from compiled function definition.
+
+        :param code: compiled signature as returned by *compile*
+        :returns: compiled signature object
+        """
         context = {'Any': Any, 'Path': Path, 'URL': URL}
         try:
-            exec(f"def func({code}): pass", context)
+            exec(code, context)
         except Exception as e:
             raise InvalidSignatureError() from e
         sig = inspect.signature(context['func'])
@@ -42,7 +68,7 @@ class Signature:
 
         :returns: compiled signature object
         """
-        return cls.create("*args, **kwargs")
+        return cls.create(DEFAULT)
 
     def parse(self, *args, **kwargs) -> dict[str, Any]:
         """Match arguments to signature and check and coerce types.
@@ -59,6 +85,20 @@ class Signature:
             for n, v in params.arguments.items()
         }
 
+    def unbound(self, *args, **kwargs) -> list[str]:
+        """Find named parameters the given arguments leave unset.
+
+        :returns: names of the parameters that can still be passed by keyword
+        """
+        try:
+            bound = self.sig.bind_partial(*args, **kwargs).arguments
+        except TypeError as e:
+            raise InvalidArgumentError() from e
+        return [
+            n for n, p in self.sig.parameters.items()
+            if n not in bound and p.kind in KEYWORDS
+        ]
+
 
 # get expected type for parameter
 def get_type(param: inspect.Parameter) -> Type:
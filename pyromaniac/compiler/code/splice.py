@@ -0,0 +1,188 @@
+from typing import Any, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import PosixPath as Path
+from secrets import token_hex
+import re
+import json
+import yaml
+
+from ..serialize import SafeLoader, load
+from ..url import URL
+from .stream import Stream
+
+TAG = "tag:pyromaniac,2024:splice"
+TOKEN_RE = re.compile(r'_pyro_([0-9a-f]{16})_(0|[1-9][0-9]*)')
+SURROGATE_RE = re.compile('[\ud800-\udfff]')
+PAIR_RE = re.compile(
+    r'(?<!\\)((?:\\\\)*)\\u(d[89ab][0-9a-f]{2})\\u(d[c-f][0-9a-f]{2})'
+)
+
+# splice of the template currently being rendered
+current: ContextVar['Splice | None'] = ContextVar('splice', default=None)
+
+
+class Unsupported(Exception):
+    """Raised for values that can't be converted without serializing them."""
+
+
+class Fallback(Exception):
+    """Raised for placeholders that can't be spliced into the parsed tree."""
+
+
+class Splice:
+    """Values rendered into a YAML template as placeholders.
+
+    Values standing alone as YAML values are replaced by placeholder tokens
+    while rendering and spliced into the parsed tree afterwards, skipping
+    serializing them to JSON and parsing them back. Values are converted
+    exactly the way the round trip would, so the result is the same. If a
+    placeholder ends up anywhere else, e.g. inside a string, the JSON code is
+    substituted for all placeholders and the code is parsed again instead.
+    Output of macros, blocks, and other tags that can be captured as values
+    is rendered without placeholders, so placeholders never end up inside
+    values, where they might have been transformed.
+    """
+
+    def __init__(self):
+        self.nonce = token_hex(8)
+        self.values = []
+
+    @contextmanager
+    def active(self) -> Iterator[None]:
+        """Make this the splice to add the values of rendering to."""
+        reset = current.set(self)
+        try:
+            yield
+        finally:
+            current.reset(reset)
+
+    def add(self, value: Any) -> str | None:
+        """Add value to splice and get its placeholder token.
+
+        :param value: value of a template expression
+        :returns: placeholder token or None if value must be serialized
+        """
+        try:
+            converted = convert(value)
+        except Unsupported:
+            return None
+        self.values.append(converted)
+        return f"_pyro_{self.nonce}_{len(self.values) - 1}"
+
+    def load(self, stream: Stream) -> Any:
+        """Parse rendered YAML code and splice in the values.
+
+        The code is parsed while it's being rendered. It's read completely and
+        parsed again if that fails, so the errors are the same as for parsing
+        the code at once.
+
+        :param stream: stream of rendered YAML code with placeholder tokens
+        :returns: parsed value
+        :raises Interrupted: if rendering the code failed
+        """
+        try:
+            result = self.parse(stream)
+        except Exception:
+            # errors are reported for the code without placeholders
+            pass
+        else:
+            if stream.error is None:
+                return result
+
+        code = stream.getvalue()
+        if self.values != []:
+            code = TOKEN_RE.sub(self.serialize, code)
+        return load(code)
+
+    # parse code with placeholders, failing unless all of them are spliced
+    def parse(self, stream: Stream) -> Any:
+        loader = Loader(stream)
+        loader.splice, loader.spliced = self, set()
+        try:
+            result = loader.get_single_data()
+        finally:
+            loader.dispose()
+        if len(loader.spliced) != len(self.values):
+            raise Fallback()
+        return result
+
+    # serialize value of placeholder token matched in rendered code
+    def serialize(self, match: re.Match) -> str:
+        if match[1] != self.nonce:
+            return match[0]
+        return join_surrogates(json.dumps(self.values[int(match[2])]))
+
+
+class Loader(SafeLoader):
+    """YAML loader resolving placeholder tokens to the spliced values."""
+
+    def flatten_mapping(self, node: yaml.MappingNode):
+        # merge keys require the node of the merged mapping
+        for key, value in node.value:
+            if key.tag == "tag:yaml.org,2002:merge" and any(
+                n.tag == TAG for n in [value, *getattr(value, 'value', [])]
+                if isinstance(n, yaml.ScalarNode)
+            ):
+                raise Fallback()
+        super().flatten_mapping(node)
+
+
+# resolve placeholder tokens standing alone as plain scalars
+def construct(loader: Loader, node: yaml.ScalarNode) -> Any:
+    match = TOKEN_RE.fullmatch(node.value)
+    if match[1] != loader.splice.nonce:
+        raise Fallback()
+    index = int(match[2])
+    loader.spliced.add(index)
+    return loader.splice.values[index]
+
+
+Loader.add_implicit_resolver(TAG, re.compile(f"^{TOKEN_RE.pattern}$"), "_")
+Loader.add_constructor(TAG, construct)
+
+
+def convert(value: Any) -> Any:
+    """Convert value like serializing it to JSON and parsing it as YAML.
+
+    :param value: value to convert
+    :returns: converted value
+    :raises Unsupported: if the value can't be converted without serializing
+    """
+    if value is None or type(value) in (bool, int):
+        return value
+
+    match value:
+        case float() if type(value) is float and "." in repr(value):
+            return value
+        case str() if type(value) is str and not SURROGATE_RE.search(value):
+            return value
+        case Path() | URL():
+            return convert(str(value))
+        case dict():
+            converted = {}
+            for key, item in value.items():
+                if type(key) is not str or SURROGATE_RE.search(key):
+                    raise Unsupported()
+                converted[key] = convert(item)
+            return converted
+        case list() | tuple():
+            return [convert(item) for item in value]
+        case _:
+            raise Unsupported()
+
+
+def join_surrogates(code: str) -> str:
+    """Replace escaped UTF-16 surrogate pairs in JSON code by the characters.
+
+    The YAML parser rejects surrogate escapes, while it accepts the characters
+    from outside the basic multilingual plane they encode.
+
+    :param code: JSON code
+    :returns: JSON code without escaped surrogate pairs
+    """
+    if "\\ud" not in code:
+        return code
+    return PAIR_RE.sub(lambda m: m[1] + chr(
+        0x10000 + (int(m[2], 16) - 0xd800 << 10) + int(m[3], 16) - 0xdc00
+    ), code)
@@ -0,0 +1,83 @@
+from typing import Self, Iterator
+
+
+class Interrupted(Exception):
+    """Raised when reading the rest of a stream interrupted by an error."""
+
+
+class Stream:
+    """File-like object reading rendered code from an iterator of chunks.
+
+    Lets the YAML parser consume the output of a template while it's being
+    rendered instead of concatenating it first. The code returned by reads is
+    kept, so the complete code is still available when it has to be parsed
+    again.
+    Errors raised by the iterator end the stream and are kept in *error*.
+    """
+
+    # parse errors are reported the same as for code passed as a string
+    name = "<unicode string>"
+
+    def __init__(self, chunks: Iterator[str]):
+        self.chunks = chunks
+        self.buffer = ""
+        self.error: Exception | None = None
+        self.parts: list[str] = []
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def read(self, size: int = -1) -> str:
+        """Read up to *size* characters or everything if negative.
+
+        :param size: maximum number of characters to read
+        :returns: code read or empty string at the end of the stream
+        """
+        parts, length = [self.buffer], len(self.buffer)
+        while size < 0 or length < size:
+            chunk = self.next()
+            if chunk is None:
+                break
+            parts.append(chunk)
+            length += len(chunk)
+
+        code = "".join(parts)
+        if 0 <= size < length:
+            code, self.buffer = code[:size], code[size:]
+        else:
+            self.buffer = ""
+        self.parts.append(code)
+        return code
+
+    def getvalue(self) -> str:
+        """Read the rest of the stream and get the complete code.
+
+        :returns: all code of the stream
+        :raises Interrupted: if the iterator raised an error
+        """
+        self.read()
+        if self.error is not None:
+            raise Interrupted()
+        return "".join(self.parts)
+
+    def close(self):
+        """Stop the iterator and drop the code read."""
+        close = getattr(self.chunks, 'close', None)
+        if close is not None:
+            close()
+        self.parts = []
+
+    # get next chunk from iterator or None at the end of the stream
+    def next(self) -> str | None:
+        if self.error is not None:
+            return None
+        try:
+            return next(self.chunks)
+        except StopIteration:
+            return None
+        except Exception as e:
+            self.error = e
+            return None
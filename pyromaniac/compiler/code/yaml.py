@@ -1,11 +1,15 @@
-from typing import Self, Any
-from yaml import safe_load as yaml_load, MarkedYAMLError
+from typing import Self, Any, Iterator
+from types import CodeType
+from collections import ChainMap
+from yaml import MarkedYAMLError
 from jinja2.exceptions import TemplateSyntaxError
 from jinja2 import Template
 
 from ..errors import CompilerError
 from .errors import YamlTemplateError, YamlExecutionError, YamlParseError
 from .jinja import pyro_env as environment
+from .splice import Splice
+from .stream import Stream, Interrupted
 
 
 class Yaml:
@@ -24,29 +28,66 @@ class Yaml:
         :param code: component yaml source code
         :returns: constructed component yaml code object
         """
+        return cls.load(cls.compile(code))
+
+    @staticmethod
+    def compile(code: str) -> CodeType:
+        """Compile component yaml code into Jinja template code.
+
+        :param code: component yaml source code
+        :returns: compiled python code of the Jinja template
+        """
         try:
-            template = environment.from_string(code)
+            return environment.compile(code)
         except TemplateSyntaxError as e:
             raise YamlTemplateError() from e
 
+    @classmethod
+    def load(cls, code: CodeType) -> Self:
+        """Create component yaml code from compiled Jinja template code.
+
+        :param code: compiled template as returned by *compile*
+        :returns: constructed component yaml code object
+        """
+        globals = environment.make_globals(None)
+        template = environment.template_class.from_code(
+            environment, code, globals,
+        )
         return cls(template)
 
     def execute(self, context: dict) -> Any:
         """Execute component yaml code in given context.
 
         All fields from the context will be avaiable to the Jinja template.
+        Names missing from it are looked up in the context's *__builtins__*
+        namespace if present.
+
+        Values of expressions standing alone as YAML values are spliced into
+        the parsed result instead of being serialized and parsed again. The
+        output of the template is parsed while it's being rendered.
 
         :param context: context to execute Jinja template in
         :returns: template execution result parsed as yaml source
         """
-        try:
-            yaml = self.template.render(context)
-        except CompilerError as e:
-            raise e
-        except Exception as e:
-            raise YamlExecutionError() from e
+        splice = Splice()
+        with splice.active(), Stream(self.render(context)) as stream:
+            try:
+                return splice.load(stream)
+            except Interrupted:
+                error = stream.error
+            except MarkedYAMLError as e:
+                raise YamlParseError() from e
+
+        if isinstance(error, CompilerError):
+            raise error
+        raise YamlExecutionError() from error
 
+    # render template like Template.generate but without copying the context
+    def render(self, context: dict) -> Iterator[str]:
+        names = context.get('__builtins__', {})
+        parent = ChainMap(context, names, self.template.globals)
+        ctx = self.template.new_context(parent, shared=True)
         try:
-            return yaml_load(yaml)
-        except MarkedYAMLError as e:
-            raise YamlParseError() from e
+            yield from self.template.root_render_func(ctx)
+        except Exception:
+            environment.handle_exception()
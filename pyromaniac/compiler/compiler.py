@@ -5,21 +5,30 @@ from pathlib import PosixPath as Path
 from tempfile import TemporaryDirectory
 
 from .. import paths
-from .butane import butane
+from .butane import butane, saved
 from .expand import expand
 from .component import Component
 from .library import Library
-from .context import context
+from .context import CONTEXT, context
+from .depend import Dependencies
 
 if TYPE_CHECKING:
     from ..remote import Remote
 
 
 class Compiler:
-    """Pyromaniac config compiler."""
+    """Pyromaniac config compiler.
+
+    The local files and directories read by the last compilation, including
+    component files and files referenced by butane, are available as the set
+    of paths *dependencies*. The number of bytes of file contents compression
+    saved in all its translations is available as *saved*.
+    """
 
     def __init__(self, lib: Library):
         self.lib = lib
+        self.dependencies: set[Path] = set()
+        self.saved = 0
 
     @classmethod
     def create(cls, path: Path) -> Self:
@@ -42,11 +51,53 @@ class Compiler:
         :param kwargs: keyword arguments to pass to the component
         :returns: compiled ignition config
         """
-        ctx = context(self.lib, self.lib.view(), remote=remote)
         comp = Component.create(source)
-        with python_context(self.lib.root):
-            result = comp.execute(ctx, args, kwargs)
-        return butane(expand(result, True, True))
+        return self.compile_component(comp, remote, args, kwargs)
+
+    def compile_component(
+        self, comp: Component, remote: 'Remote',
+        args: tuple = tuple(), kwargs: dict[str, Any] = {},
+    ) -> str:
+        """Compile already parsed main component to ignition.
+
+        Clears the *GLOBAL* dict first, so state from earlier compilations
+        doesn't leak into this one.
+
+        :param comp: main component
+        :param remote: remote object with address and authentication secret
+        :param args: positional arguments to pass to the component
+        :param kwargs: keyword arguments to pass to the component
+        :returns: compiled ignition config
+        """
+        CONTEXT['GLOBAL'].clear()
+        ctx = context(self.lib, self.lib.view(), remote=remote)
+        reset = saved.set(0)
+        with Dependencies().active() as deps:
+            try:
+                with python_context(self.lib.root):
+                    result = comp.execute(ctx, args, kwargs)
+                return butane(expand(result, True, True))
+            finally:
+                self.dependencies = deps.paths
+                self.saved = saved.get()
+                saved.reset(reset)
+
+    def refresh(self) -> bool:
+        """Drop changed components and directory listings from the library.
+
+        Allows keeping a compiler around for compiling repeatedly, only loading
+        again what changed in between.
+
+        :returns: whether any files or directories changed
+        """
+        return self.lib.refresh()
+
+    def precompile(self) -> int:
+        """Load all library components to populate the component cache.
+
+        :returns: number of components loaded
+        """
+        return self.lib.precompile()
 
 
 # Add temporary directory containing link to root to python path
@@ -1,6 +1,6 @@
 from typing import Self, Any
 
-from .code import parse, Signature, Python, Yaml
+from .code import parse, pure, Signature, Python, Yaml
 
 
 class Component:
@@ -13,6 +13,7 @@ class Component:
         self.sig = sig
         self.python = python
         self.yaml = yaml
+        self.pure = pure(doc)
 
     @classmethod
     def create(cls, source: str) -> Self:
@@ -31,7 +32,16 @@ class Component:
         :param ctx: context to execute in
         :returns: result of the components execution
         """
-        ctx.update(self.sig.parse(*args, **kwargs))
+        return self.run(ctx, self.sig.parse(*args, **kwargs))
+
+    def run(self, ctx: dict, params: dict[str, Any]) -> Any:
+        """Execute component with the given context and parsed arguments.
+
+        :param ctx: context to execute in
+        :param params: arguments as returned by the signature's parse method
+        :returns: result of the components execution
+        """
+        ctx.update(params)
         if self.python is not None:
             self.python.execute(ctx)
         if self.yaml is None:
@@ -0,0 +1,76 @@
+from typing import Any
+from pathlib import PosixPath as Path
+import zlib
+
+from .translate import data_url, local, Unsupported
+
+# size of the sample checked for compressibility in bytes
+SAMPLE_SIZE = 64 * 1024
+
+# ratio a sample must at least be compressed by to compress the contents
+RATIO = 0.9
+
+
+def compress(source: dict, threshold: int) -> tuple[dict, int]:
+    """Encode large file contents of a butane config as data URLs.
+
+    Inline and local contents of files of at least *threshold* bytes are
+    replaced by data URL sources, gzip compressed if that makes them shorter,
+    like butane would. Contents whose first bytes barely compress with the
+    fastest compression level are encoded without trying to compress them at
+    all, which speeds up configs with large binary or already compressed
+    files. Contents that can't be read are left for butane to report.
+
+    :param source: butane config structured dict
+    :param threshold: minimum size of the contents to encode in bytes
+    :returns: config with encoded contents and number of bytes saved
+    """
+    storage = source.get('storage')
+    if not isinstance(storage, dict) or \
+            not isinstance(storage.get('files'), list):
+        return source, 0
+
+    files, saved = [], 0
+    for node in storage['files']:
+        if isinstance(node, dict):
+            node = node.copy()
+            if 'contents' in node:
+                node['contents'], count = encode(node['contents'], threshold)
+                saved += count
+            if isinstance(node.get('append'), list):
+                node['append'] = node['append'].copy()
+                for index, item in enumerate(node['append']):
+                    node['append'][index], count = encode(item, threshold)
+                    saved += count
+        files.append(node)
+
+    return {**source, 'storage': {**storage, 'files': files}}, saved
+
+
+# encode contents dict as data URL, returning it and the bytes saved
+def encode(value: Any, threshold: int) -> tuple[Any, int]:
+    match value:
+        case {'inline': str(inline), **rest} if rest == {}:
+            data = inline.encode()
+        case {'local': str() | Path() as path, **rest} if rest == {}:
+            try:
+                data = local(str(path))
+            except Unsupported:
+                return value, 0
+        case _:
+            return value, 0
+    if len(data) < threshold:
+        return value, 0
+
+    url, compression = data_url(data, compressible(data))
+    if compression == "":
+        return {'source': url, 'compression': compression}, 0
+    encoded = url.split(",", 1)[1]
+    size = len(encoded) * 3 // 4 - encoded[-2:].count("=")
+    return {'source': url, 'compression': compression}, len(data) - size
+
+
+# check whether a sample of the data compresses well
+def compressible(data: bytes) -> bool:
+    sample = data[:SAMPLE_SIZE]
+    return len(zlib.compress(sample, 1)) < len(sample) * RATIO
@@ -1,23 +1,81 @@
 from typing import Any, TYPE_CHECKING
+from collections.abc import Mapping
+from functools import cached_property
 from pathlib import PosixPath as Path
+import builtins
 
 from .url import URL
 from .expand import expand
 from .butane import butane
+from .walk import walk
+from .depend import depend
 
 if TYPE_CHECKING:
     from .library import Library, View
 
 CONTEXT = {
     'Any': Any, 'Path': Path, 'URL': URL,
-    'butane': butane, 'expand': expand,
+    'butane': butane, 'expand': expand, 'walk': walk, 'depend': depend,
     'GLOBAL': {}
 }
 
 
+class Namespace(dict):
+    """Namespace resolving names in a stack of mappings on first access.
+
+    Names are looked up in the mappings in the given order the first time they
+    are accessed and cached afterwards. A namespace can therefore be shared
+    between component executions without being copied.
+
+    :param layers: mappings to look up names in
+    """
+
+    def __init__(self, *layers: Mapping):
+        super().__init__()
+        self.layers = layers
+
+    @cached_property
+    def builtins(self) -> 'Namespace':
+        """Namespace falling back to python's builtins for executing code."""
+        namespace = Namespace(self, vars(builtins))
+        # the interpreter looks up __import__ without calling __missing__
+        namespace['__import__']
+        return namespace
+
+    def __missing__(self, name: str) -> Any:
+        for layer in self.layers:
+            try:
+                value = layer[name]
+            except KeyError:
+                continue
+            self[name] = value
+            return value
+        raise KeyError(name)
+
+    def __contains__(self, name: str) -> bool:
+        try:
+            self[name]
+        except KeyError:
+            return False
+        return True
+
+
 def context(lib: 'Library', view: 'View', **kwargs) -> dict:
+    """Create context for executing a component.
+
+    Names not defined in the context are resolved in the library's shared
+    namespace, which is passed as *__builtins__*.
+
+    :param lib: library the component belongs to
+    :param view: view on the package the component is located in
+    :param kwargs: additional values to add to the context
+    :returns: the created context
+    """
     match view._View__path:
         case "": pkg = "_main_"
         case path: pkg = f"_main_.{path}"
 
-    return {**CONTEXT, **lib, **{"_": view}, **kwargs, **{"__package__": pkg}}
+    return {
+        **{"_": view}, **kwargs,
+        **{"__package__": pkg, "__builtins__": lib.namespace},
+    }
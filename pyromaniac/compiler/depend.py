@@ -0,0 +1,64 @@
+from typing import Iterable, Iterator, Self
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import PosixPath as Path
+
+# dependencies of the compilation currently in progress
+current: ContextVar['Dependencies | None'] = ContextVar(
+    'dependencies', default=None,
+)
+
+
+class Dependencies:
+    """Set of local files and directories read by a compilation.
+
+    Paths are recorded while the dependencies are active. Paths recorded
+    while another set is active inside this one are recorded in both, so the
+    dependencies of a component also end up in those of the configuration
+    using it.
+    """
+
+    def __init__(self):
+        self.paths: set[Path] = set()
+        self.parent: Self | None = None
+
+    @contextmanager
+    def active(self) -> Iterator[Self]:
+        """Make this the set to record the paths read from now on in."""
+        self.parent = current.get()
+        reset = current.set(self)
+        try:
+            yield self
+        finally:
+            current.reset(reset)
+            self.parent = None
+
+
+def depend(*paths: str | Path):
+    """Record local files or directories as dependencies of the compilation.
+
+    Does nothing if no compilation is in progress.
+
+    :param paths: paths of the files or directories read
+    """
+    deps = current.get()
+    while deps is not None:
+        deps.paths.update(Path(path) for path in paths)
+        deps = deps.parent
+
+
+def depfile(target: str, paths: Iterable[Path]) -> str:
+    """Format dependencies as a make rule as understood by make and ninja.
+
+    :param target: name of the file generated from the dependencies
+    :param paths: paths of the dependencies
+    :returns: rule listing the sorted paths as prerequisites of the target
+    """
+    return f"{escape(target)}:" + "".join(
+        f" \\\n  {escape(str(path))}" for path in sorted(paths)
+    ) + "\n"
+
+
+# escape characters with a special meaning in make rules
+def escape(path: str) -> str:
+    return path.replace("$", "$$").replace("#", "\\#").replace(" ", "\\ ")
@@ -106,6 +106,20 @@ class NotADictError(RenderError):
         )
 
 
+class SerializationError(RenderError):
+    """Error raised when the assembled config can't be serialized for butane.
+
+    :param reason: description of the problem
+    """
+
+    def __init__(self, reason: str):
+        super().__init__()
+        self.reason = reason
+
+    def message(self) -> str:
+        return f"Serializing assembled config failed: {self.reason}."
+
+
 class ButaneError(RenderError):
     """Error raised when rendering butane to ignition failed.
 
@@ -1,12 +1,53 @@
-from typing import Any
-from itertools import groupby
+from typing import Any, Self
+from functools import lru_cache
 
 from .errors import KeyExpandError
 from .errors import DuplicateKeyError, MixedKeysError, MissingIndexError
 from . import keys
 
 FCOS_DEFAULTS = {'variant': "fcos", 'version': "1.5.0"}
-FlatType = list[tuple[list[str | int], Any]]
+
+# parse recurring keys only once, the parts are never modified
+parse = lru_cache(maxsize=1024)(keys.parse)
+
+
+class Node:
+    """Node of the trie composite keys are expanded into.
+
+    Holds the values inserted at exactly this node and the child nodes by
+    key part.
+    """
+
+    __slots__ = ['leaves', 'children']
+
+    def __init__(self):
+        self.leaves = []
+        self.children = {}
+
+    def child(self, parts: list[str | int]) -> Self:
+        """Get descendant node at the given key parts, creating it if needed.
+
+        :param parts: key parts relative to this node
+        :returns: the descendant node
+        """
+        node = self
+        for part in parts:
+            child = node.children.get(part)
+            if child is None:
+                child = node.children[part] = Node()
+            node = child
+        return node
+
+    def prune(self, parts: list[str | int]):
+        """Remove empty descendant nodes along the given key parts.
+
+        :param parts: key parts relative to this node
+        """
+        child = self.children[parts[0]]
+        if len(parts) > 1:
+            child.prune(parts[1:])
+        if child.leaves == [] and child.children == {}:
+            del self.children[parts[0]]
 
 
 def expand(config: Any, clean: bool = False, fcos: bool = False) -> Any:
@@ -17,77 +58,80 @@ def expand(config: Any, clean: bool = False, fcos: bool = False) -> Any:
     :param fcos: apply FCOS default fields if config is a dict
     :returns: expanded config
     """
-    flat = flatten(config)
-    if clean:
-        # clean and use original type if no keys left
-        flat = clean_flat(flat) or [([], type(config)())]
+    root = Node()
+    if not insert(root, config, clean):
+        # use original type if no keys left after cleaning
+        expanded = type(config)()
+    else:
+        expanded = collect(root)
 
-    expanded = collect(flat)
     if isinstance(expanded, dict) and fcos:
         expanded = {**FCOS_DEFAULTS, **expanded}
 
     return expanded
 
 
-def flatten(value: Any) -> FlatType:
+def insert(node: Node, value: Any, clean: bool) -> bool:
+    # insert leaves below node skipping underscore keys before descending
     match value:
         case dict() if len(value) > 0:
-            return [
-                ([*keys.parse(k), *ks], v)
-                for k, item in value.items()
-                for ks, v in flatten(item)
-            ]
+            inserted = False
+            for key, item in value.items():
+                parts = parse(key)
+                if clean and "_" in key and any(
+                    isinstance(p, str) and p.startswith("_") for p in parts
+                ):
+                    continue
+                if insert(node.child(parts), item, clean):
+                    inserted = True
+                else:
+                    node.prune(parts)
+            return inserted
         case list() if len(value) > 0:
-            return [
-                ([i, *ks], v)
-                for i, item in enumerate(value)
-                for ks, v in flatten(item)
-            ]
+            inserted = False
+            for i, item in enumerate(value):
+                if insert(node.child([i]), item, clean):
+                    inserted = True
+                else:
+                    node.prune([i])
+            return inserted
         case _:
-            return [([], value)]
-
-
-def clean_flat(flat: FlatType) -> FlatType:
-    return [
-        (ks, v) for ks, v in flat
-        if not any(isinstance(k, str) and k.startswith("_") for k in ks)
-    ]
+            node.leaves.append(value)
+            return True
 
 
-def collect(pairs: FlatType) -> Any:
-    # handle empty key
-    if any(p[0] == [] for p in pairs):
-        if len(pairs) == 1:
-            return pairs[0][1]
+def collect(node: Node) -> Any:
+    # handle values inserted at this node
+    if node.leaves != []:
+        if len(node.leaves) == 1 and node.children == {}:
+            return node.leaves[0]
         else:
             raise DuplicateKeyError()
 
-    # group pairs py first key part
+    # sort key parts
     try:
-        pairs = sorted(pairs, key=lambda p: p[0][0])
+        parts = sorted(node.children)
     except TypeError:
         raise MixedKeysError()
-    groups = groupby(pairs, key=lambda p: p[0][0])
-    groups = list((k, list(v)) for k, v in groups)
 
     # handle string keys
-    if isinstance(groups[0][0], str):
+    if isinstance(parts[0], str):
         result = {}
-        for pre, ps in groups:
+        for part in parts:
             try:
-                result[pre] = collect([(k[1:], v) for k, v in ps])
+                result[part] = collect(node.children[part])
             except KeyExpandError as e:
-                raise e.under(pre)
+                raise e.under(part)
         return result
 
     # handle int keys
     else:
         result = []
-        for i, (pre, ps) in enumerate(groups):
-            if i != pre:
+        for i, part in enumerate(parts):
+            if i != part:
                 raise MissingIndexError([i])
             try:
-                result.append(collect([(k[1:], v) for k, v in ps]))
+                result.append(collect(node.children[part]))
             except KeyExpandError as e:
-                raise e.under(pre)
+                raise e.under(part)
         return result
@@ -1,20 +1,47 @@
 from typing import Self, Any, Iterator
+import os
 from keyword import iskeyword
 from collections.abc import Mapping
 from pathlib import PosixPath as Path
 
 from .errors import CompilerError, NonExistentPathError, NotAComponentError
-from .context import context
+from .context import CONTEXT, Namespace, context
 from .component import Component
+from .memo import Memo
+from .depend import Dependencies, depend
 
 
 def is_var_name(name: str):
     return name.isidentifier() and not iskeyword(name)
 
 
+# split name into its non-empty parts and join them back together
+def split(name: str) -> list[str]:
+    return [part for part in name.split(".") if part != ""]
+
+
+def join(parts: list[str]) -> str:
+    return ".".join(parts)
+
+
+# identify state of file system entry by modification time, size, and inode
+def stamp(path: Path) -> tuple[int, int, int] | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
 class Library(Mapping):
     """Library of files and components.
 
+    Directory contents are scanned once when first needed and kept in an
+    in-memory index, so looking up components doesn't touch the file system
+    again until the library is invalidated or refreshed. Components are
+    executed with a shared namespace resolving library names lazily. Results
+    of components declared pure are memoized.
+
     :param root: root path for the library
     :param libs: list of libraries to merge into namespace
     """
@@ -23,13 +50,17 @@ class Library(Mapping):
         self.root = root
         self.libs = libs
         self.cache = {}
+        self.index = {}
+        self.stamps = {}
+        self.namespace = Namespace(self, CONTEXT)
+        self.memo = Memo()
 
     def resolve(self, name: str) -> tuple[Self, str] | None:
-        path = self.get_path(name)
-        if path.with_suffix(".pyro").is_file():
+        parts = split(name)
+        if parts != [] and parts[-1] in self.entries(join(parts[:-1]))[0]:
             return self, name
-        elif path.joinpath("main.pyro").is_file():
-            return self, f"{name}.main"
+        elif "main" in self.entries(join(parts))[0]:
+            return self, f"{name}.main" if parts != [] else "main"
         return next(filter(None, (b.resolve(name) for b in self.libs)), None)
 
     def execute(
@@ -38,14 +69,33 @@ class Library(Mapping):
         comp = self.get_component(name)
         parent = name.rsplit(".", 1)[0] if "." in name else ""
         try:
-            return comp.execute(context(self, self[parent]), args, kwargs)
+            if not comp.pure:
+                return comp.execute(context(self, self[parent]), args, kwargs)
+
+            params = comp.sig.parse(*args, **kwargs)
+            key = self.memo.key(name, params)
+            if key is not None:
+                found, entry = self.memo.get(key)
+                if found:
+                    result, paths = entry
+                    depend(*paths)
+                    return result
+
+            # record dependencies to replay them along with memoized results
+            with Dependencies().active() as deps:
+                result = comp.run(context(self, self[parent]), params)
+            if key is not None:
+                self.memo.put(key, (result, deps.paths))
+            return result
         except CompilerError as e:
             raise e.push(name)
 
     def get_component(self, name: str) -> Component:
         path = self.get_path(name).with_suffix(".pyro")
+        depend(path)
 
         if name not in self.cache:
+            self.stamps[path] = stamp(path)
             try:
                 self.cache[name] = Component.create(path.read_text())
             except CompilerError as e:
@@ -53,6 +103,85 @@ class Library(Mapping):
 
         return self.cache[name]
 
+    def precompile(self) -> int:
+        """Load all components of this library and the libraries it includes.
+
+        Loading a component adds it to the persistent component cache as a
+        side effect, which speeds up subsequent compiler runs.
+
+        :returns: number of components loaded
+        """
+        count = 0
+        for path in sorted(self.root.rglob("*.pyro")):
+            parts = path.relative_to(self.root).with_suffix("").parts
+            if all(is_var_name(p) for p in parts):
+                self.get_component(".".join(parts))
+                count += 1
+        return count + sum(lib.precompile() for lib in self.libs)
+
+    def invalidate(self):
+        """Drop the index and loaded components of this and included libraries.
+
+        Must be called for changes to the library's files to take effect.
+        """
+        self.index.clear()
+        self.cache.clear()
+        self.stamps.clear()
+        self.namespace = Namespace(self, CONTEXT)
+        self.memo.clear()
+        for lib in self.libs:
+            lib.invalidate()
+
+    def refresh(self) -> bool:
+        """Drop what changed on disk from this and included libraries.
+
+        Compares modification time, size, and inode of loaded component files
+        and scanned directories to those recorded when loading them. Only
+        changed components are loaded again and only changed directories are
+        scanned again. Memoized results are dropped in any case.
+
+        :returns: whether any files or directories changed
+        """
+        changed = {p for p, s in self.stamps.items() if stamp(p) != s}
+        for path in changed:
+            del self.stamps[path]
+        for name in list(self.cache):
+            if self.get_path(name).with_suffix(".pyro") in changed:
+                del self.cache[name]
+        for name in list(self.index):
+            if self.get_path(name) in changed:
+                del self.index[name]
+                self.namespace = Namespace(self, CONTEXT)
+        self.memo.clear()
+
+        refreshed = [lib.refresh() for lib in self.libs]
+        return changed != set() or any(refreshed)
+
+    def entries(self, name: str) -> tuple[set[str], set[str]]:
+        """Get the names of components and directories inside a directory.
+
+        Scans the directory on first access and caches the result in the
+        library index.
+
+        :param name: name of the directory, empty for the root directory
+        :returns: set of component names and set of directory names
+        """
+        if name not in self.index:
+            components, directories = set(), set()
+            path = self.get_path(name)
+            self.stamps[path] = stamp(path)
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if entry.name.endswith(".pyro") and entry.is_file():
+                            components.add(entry.name[:-len(".pyro")])
+                        elif entry.is_dir():
+                            directories.add(entry.name)
+            except OSError:
+                pass
+            self.index[name] = components, directories
+        return self.index[name]
+
     def view(self) -> 'View':
         """Get root view on this library.
 
@@ -70,11 +199,12 @@ class Library(Mapping):
 
     # methods required by the abstract Mapping class
     def __getitem__(self, name: str) -> 'View':
-        path = self.get_path(name)
+        parts = split(name)
         if (
-            name == "" or
-            path.with_suffix(".pyro").is_file() and is_var_name(path.name) or
-            path.is_dir() and is_var_name(path.name) or
+            parts == [] or
+            is_var_name(parts[-1]) and any(
+                parts[-1] in names for names in self.entries(join(parts[:-1]))
+            ) or
             any(lib.__contains__(name) for lib in self.libs)
         ):
             return View(self, name)
@@ -82,11 +212,9 @@ class Library(Mapping):
             raise KeyError(name)
 
     def __iter__(self) -> Iterator[str]:
+        components, directories = self.entries("")
         return iter(set(
-            path.name if path.is_dir() else path.stem
-            for path in self.root.iterdir()
-            if path.suffix == '.pyro' and is_var_name(path.stem)
-            or path.is_dir() and is_var_name(path.name)
+            name for name in components | directories if is_var_name(name)
         ).union(
             name for lib in self.libs for name in lib.keys()
         ))
@@ -0,0 +1,83 @@
+from typing import Any, Hashable
+from collections import OrderedDict
+from copy import deepcopy
+
+from .url import URL
+
+# default maximum number of results to keep per library
+SIZE = 1024
+
+
+class Memo:
+    """Bounded least recently used cache for results of pure components.
+
+    Results are copied when stored and retrieved, so callers may modify them
+    freely. Hits and misses are counted for profiling.
+
+    :param size: maximum number of results to keep
+    """
+
+    def __init__(self, size: int = SIZE):
+        self.size = size
+        self.results = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(name: str, params: dict[str, Any]) -> Hashable | None:
+        """Derive cache key from component name and parsed arguments.
+
+        :param name: name of the component
+        :param params: arguments as returned by the component's signature
+        :returns: hashable key or None if the arguments can't be keyed
+        """
+        try:
+            return name, freeze(params)
+        except TypeError:
+            return None
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        """Get cached result for key and count hit or miss.
+
+        :param key: key as returned by *key*
+        :returns: whether the key was found and a copy of the result if so
+        """
+        if key not in self.results:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        self.results.move_to_end(key)
+        return True, deepcopy(self.results[key])
+
+    def put(self, key: Hashable, result: Any):
+        """Store result for key, dropping the least recently used if full.
+
+        :param key: key as returned by *key*
+        :param result: result to store a copy of
+        """
+        self.results[key] = deepcopy(result)
+        self.results.move_to_end(key)
+        while len(self.results) > self.size:
+            self.results.popitem(last=False)
+
+    def clear(self):
+        """Drop all cached results and reset the counters."""
+        self.results.clear()
+        self.hits = self.misses = 0
+
+
+# convert value to hashable representation distinguishing equal types
+def freeze(value: Any) -> Hashable:
+    match value:
+        case dict():
+            items = tuple((freeze(k), freeze(v)) for k, v in value.items())
+            return dict, items
+        case list() | tuple():
+            return type(value), tuple(freeze(v) for v in value)
+        case set() | frozenset():
+            return type(value), frozenset(freeze(v) for v in value)
+        case URL():
+            return URL, value.url
+        case _:
+            hash(value)
+            return type(value), value
@@ -0,0 +1,74 @@
+from typing import Any
+from pathlib import PosixPath as Path
+import json
+import yaml
+
+from .errors import SerializationError
+from .url import URL
+
+# formats configs can be serialized to
+FORMATS = ['yaml', 'json']
+
+# use the libyaml bindings if available
+if yaml.__with_libyaml__:
+    SafeLoader, SafeDumper = yaml.CSafeLoader, yaml.CSafeDumper
+else:
+    SafeLoader, SafeDumper = yaml.SafeLoader, yaml.SafeDumper
+
+
+class Dumper(SafeDumper):
+    """YAML dumper supporting paths, URLs, tuples, and dict subclasses."""
+
+
+# represent paths and URLs as strings
+def representer(dumper: Dumper, data: Any):
+    return dumper.represent_scalar("tag:yaml.org,2002:str", str(data))
+
+
+Dumper.add_representer(Path, representer)
+Dumper.add_representer(URL, representer)
+Dumper.add_representer(tuple, SafeDumper.represent_list)
+Dumper.add_multi_representer(dict, SafeDumper.represent_dict)
+
+
+def load(code: str) -> Any:
+    """Parse YAML code using libyaml if available.
+
+    :param code: YAML source code
+    :returns: parsed value
+    """
+    return yaml.load(code, SafeLoader)
+
+
+def dump(value: Any, format: str = 'yaml') -> str:
+    """Serialize a config to YAML or JSON.
+
+    Uses libyaml for YAML if available. JSON is valid YAML as well and much
+    faster to produce. It is indented for error messages to be able to point
+    to individual lines.
+
+    :param value: config to serialize
+    :param format: "yaml" or "json"
+    :returns: serialized config
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown format {repr(format)}.")
+
+    try:
+        if format == 'json':
+            return json.dumps(
+                value, default=default, indent=1, ensure_ascii=False,
+                allow_nan=False,
+            )
+        return yaml.dump(value, Dumper=Dumper)
+    except yaml.representer.RepresenterError as e:
+        raise SerializationError(f"can't represent {repr(e.args[1])}") from e
+    except (TypeError, ValueError) as e:
+        raise SerializationError(str(e)) from e
+
+
+# represent paths and URLs as strings in JSON
+def default(value: Any) -> Any:
+    match value:
+        case Path() | URL(): return str(value)
+        case _: raise TypeError(f"can't represent {repr(value)}")
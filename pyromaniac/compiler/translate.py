@@ -0,0 +1,465 @@
+from typing import Any
+import re
+import json
+import gzip
+import base64
+import posixpath
+from urllib.parse import quote, urlsplit
+from string import ascii_letters, digits
+from pathlib import PosixPath as Path
+
+from .url import URL
+
+# butane variants and versions with the ignition versions they translate to
+VERSIONS = {("fcos", "1.5.0"): "3.4.0"}
+
+# characters go's dataurl package doesn't percent-encode besides alphanumerics
+SAFE = "-_.~$&+,/:;=?@"
+SAFE_BYTES = (ascii_letters + digits + SAFE).encode()
+
+# URL schemes of remote sources that need no further validation
+SCHEMES = ["http", "https", "tftp"]
+
+# data URLs in the forms produced by *data_url*
+DATA_RE = re.compile(
+    r'^data:(?:;base64,[A-Za-z0-9+/]*={0,2}|,[A-Za-z0-9%'
+    + re.escape(SAFE) + r']*)$'
+)
+
+UNIT_TYPES = [
+    ".service", ".socket", ".device", ".mount", ".automount", ".swap",
+    ".target", ".path", ".timer", ".snapshot", ".slice", ".scope",
+]
+HASH_RE = re.compile('^(?:sha256-[0-9a-f]{64}|sha512-[0-9a-f]{128})$')
+SECTION_RE = re.compile(r'^\[([^\[\]]+)\]$')
+OPTION_RE = re.compile(r'^[A-Za-z0-9_-]+[ \t]*=')
+
+# characters escaped by go's JSON encoder but not by python's
+ESCAPES = {
+    "<": "\\u003c", ">": "\\u003e", "&": "\\u0026",
+    "\u2028": "\\u2028", "\u2029": "\\u2029",
+}
+ESCAPE_RE = re.compile(f"[{''.join(ESCAPES)}]")
+
+USER_FIELDS = {
+    'gecos': 'gecos', 'groups': 'groups', 'home_dir': 'homeDir',
+    'name': 'name', 'no_create_home': 'noCreateHome',
+    'no_log_init': 'noLogInit', 'no_user_group': 'noUserGroup',
+    'password_hash': 'passwordHash', 'primary_group': 'primaryGroup',
+    'ssh_authorized_keys': 'sshAuthorizedKeys', 'shell': 'shell',
+    'system': 'system', 'uid': 'uid',
+}
+
+
+class Unsupported(Exception):
+    """Error raised when a config can't be translated in process.
+
+    Raised for anything outside of the supported subset and for everything
+    butane would report an error or warning for.
+    """
+
+
+def translate(source: dict) -> dict:
+    """Translate butane config to ignition config in process.
+
+    Supports storage files, directories, and links with inline, local, or
+    remote contents, systemd units and drop-ins, passwd users, and config
+    merges for the fcos 1.5.0 variant. Local files are read relative to the
+    working directory like butane's files directory.
+
+    :param source: butane config structured dict
+    :returns: ignition config structured as butane would serialize it
+    """
+    source = fields(
+        source, ['variant', 'version', 'ignition', 'passwd', 'storage',
+                 'systemd'], ['variant', 'version'],
+    )
+    version = VERSIONS.get(
+        (string(source['variant']), string(source['version'])),
+    )
+    if version is None:
+        raise Unsupported()
+
+    result = {'ignition': {**ignition(source.get('ignition', {})),
+                           'version': version}}
+    put(result, 'passwd', passwd(source.get('passwd', {})))
+    put(result, 'storage', storage(source.get('storage', {})))
+    put(result, 'systemd', systemd(source.get('systemd', {})))
+
+    conflicts(result)
+    return result
+
+
+def dump(config: dict, pretty: bool = False) -> str:
+    """Serialize ignition config the way butane does.
+
+    :param config: ignition config as returned by *translate*
+    :param pretty: whether to indent the output
+    :returns: ignition config as string
+    """
+    if pretty:
+        text = json.dumps(config, indent=2, ensure_ascii=False)
+    else:
+        text = json.dumps(config, separators=(",", ":"), ensure_ascii=False)
+    return ESCAPE_RE.sub(lambda m: ESCAPES[m[0]], text)
+
+
+def data_url(data: bytes, compress: bool = True) -> tuple[str, str]:
+    """Encode data as the shortest data URL like butane does.
+
+    :param data: contents to encode
+    :param compress: whether to try compressing the data
+    :returns: data URL and compression to specify alongside it
+    """
+    # compare lengths before encoding to only encode the shorter variant
+    quoted = len("data:,") + len(data) + 2 * len(
+        data.translate(None, SAFE_BYTES),
+    )
+    if len("data:;base64,") + (len(data) + 2) // 3 * 4 < quoted:
+        url = "data:;base64," + base64.b64encode(data).decode()
+    else:
+        url = "data:," + quote(data, safe=SAFE)
+    if not compress:
+        return url, ""
+
+    compressed = gzip.compress(data, 9, mtime=0)
+    encoded = "data:;base64," + base64.b64encode(compressed).decode()
+    if len(encoded) + len("gzip") < len(url):
+        return encoded, "gzip"
+    return url, ""
+
+
+# sections
+def ignition(value: Any) -> dict:
+    value = fields(value, ['config'])
+    config = fields(value.get('config', {}), ['merge'])
+    merge = [resource(r, True) for r in items(config.get('merge', []))]
+    return {'config': {'merge': merge}} if merge != [] else {}
+
+
+def passwd(value: Any) -> dict:
+    value = fields(value, ['users'])
+    users = [user(u) for u in items(value.get('users', []))]
+    unique(u['name'] for u in users)
+    return {'users': users} if users != [] else {}
+
+
+def storage(value: Any) -> dict:
+    value = fields(value, ['directories', 'files', 'links'])
+    result = {}
+    put(result, 'directories', [
+        directory(d) for d in items(value.get('directories', []))
+    ])
+    put(result, 'files', [file(f) for f in items(value.get('files', []))])
+    put(result, 'links', [link(n) for n in items(value.get('links', []))])
+
+    # ignition rejects duplicate paths and nodes inside of symbolic links
+    nodes = [n for ns in result.values() for n in ns]
+    paths = unique(n['path'] for n in nodes)
+    links = set(n['path'] for n in result.get('links', []))
+    for path in paths:
+        parent = posixpath.dirname(path)
+        while parent != "/":
+            if parent in links:
+                raise Unsupported()
+            parent = posixpath.dirname(parent)
+
+    return result
+
+
+def systemd(value: Any) -> dict:
+    value = fields(value, ['units'])
+    units = [unit(u) for u in items(value.get('units', []))]
+    unique(u['name'] for u in units)
+    return {'units': units} if units != [] else {}
+
+
+# section items
+def user(value: Any) -> dict:
+    value = fields(value, list(USER_FIELDS), ['name'])
+    result = {}
+    for key, name in USER_FIELDS.items():
+        if key not in value:
+            continue
+        match key:
+            case 'groups' | 'ssh_authorized_keys':
+                put(result, name, [string(v) for v in items(value[key])])
+            case 'no_create_home' | 'no_log_init' | 'no_user_group' | \
+                    'system':
+                result[name] = boolean(value[key])
+            case 'uid':
+                result[name] = integer(value[key])
+            case _:
+                result[name] = string(value[key])
+    return result
+
+
+def file(value: Any) -> dict:
+    value = node(value, ['append', 'contents', 'mode'])
+    result = owned(value)
+    put(result, 'append', [
+        resource(r, True) for r in items(value.get('append', []))
+    ])
+    put(result, 'contents', resource(value.get('contents', {})))
+    result['mode'] = mode(value.get('mode'))
+
+    # ignition rejects overwriting without contents
+    if result.get('overwrite') and 'source' not in result.get('contents', {}):
+        raise Unsupported()
+    return result
+
+
+def directory(value: Any) -> dict:
+    value = node(value, ['mode'])
+    return {**owned(value), 'mode': mode(value.get('mode'))}
+
+
+def link(value: Any) -> dict:
+    value = node(value, ['hard', 'target'], ['target'])
+    result = owned(value)
+    if 'hard' in value and boolean(value['hard']):
+        raise Unsupported()
+    put(result, 'hard', value.get('hard'))
+    result['target'] = string(value['target'])
+    return result
+
+
+def unit(value: Any) -> dict:
+    value = fields(
+        value, ['contents', 'dropins', 'enabled', 'mask', 'name'], ['name'],
+    )
+    name = string(value['name'])
+    if posixpath.splitext(name)[1] not in UNIT_TYPES:
+        raise Unsupported()
+
+    result = {}
+    if 'contents' in value:
+        result['contents'] = string(value['contents'])
+        sections = unit_sections(result['contents'])
+    dropins = [dropin(d) for d in items(value.get('dropins', []))]
+    unique(d['name'] for d in dropins)
+    put(result, 'dropins', dropins)
+    for key in ['enabled', 'mask']:
+        if key in value:
+            result[key] = boolean(value[key])
+    result['name'] = name
+
+    # butane warns about enabled units without install section
+    if result.get('contents', "") != "" and result.get('enabled') \
+            and 'Install' not in sections:
+        raise Unsupported()
+    if result.get('enabled') and result.get('mask'):
+        raise Unsupported()
+    return result
+
+
+def dropin(value: Any) -> dict:
+    value = fields(value, ['contents', 'name'], ['name'])
+    name = string(value['name'])
+    if not name.endswith(".conf"):
+        raise Unsupported()
+
+    result = {}
+    if 'contents' in value:
+        result['contents'] = string(value['contents'])
+        unit_sections(result['contents'])
+    result['name'] = name
+    return result
+
+
+# common structures
+def node(value: Any, allowed: list[str], required: list[str] = []) -> dict:
+    value = fields(
+        value, ['group', 'overwrite', 'path', 'user', *allowed],
+        ['path', *required],
+    )
+    path = string(value['path'])
+    if not path.startswith("/") or posixpath.normpath(path) != path:
+        raise Unsupported()
+    return value
+
+
+def owned(value: dict) -> dict:
+    result = {}
+    put(result, 'group', owner(value.get('group', {})))
+    if 'overwrite' in value:
+        result['overwrite'] = boolean(value['overwrite'])
+    result['path'] = string(value['path'])
+    put(result, 'user', owner(value.get('user', {})))
+    return result
+
+
+def owner(value: Any) -> dict:
+    value = fields(value, ['id', 'name'])
+    if 'id' in value and 'name' in value or value.get('name') == "":
+        raise Unsupported()
+    if 'id' in value:
+        return {'id': integer(value['id'])}
+    if 'name' in value:
+        return {'name': string(value['name'])}
+    return {}
+
+
+def resource(value: Any, source: bool = False) -> dict:
+    value = fields(value, [
+        'compression', 'http_headers', 'inline', 'local', 'source',
+        'verification',
+    ])
+    kinds = [k for k in ['inline', 'local', 'source'] if k in value]
+    if len(kinds) > 1 or source and kinds == []:
+        raise Unsupported()
+
+    result = {}
+    match kinds:
+        case ['inline']:
+            data = string(value['inline']).encode()
+        case ['local']:
+            data = local(string(value['local']))
+        case ['source']:
+            url = string(value['source'])
+            if urlsplit(url).scheme not in SCHEMES and \
+                    DATA_RE.match(url) is None:
+                raise Unsupported()
+        case _:
+            if value != {}:
+                raise Unsupported()
+            return result
+
+    if kinds != ['source']:
+        # compression is chosen here, verification may apply to compressed
+        # data, and headers to HTTP only
+        if 'verification' in value or 'http_headers' in value or \
+                'compression' in value:
+            raise Unsupported()
+        url, result['compression'] = data_url(data)
+    elif 'compression' in value:
+        result['compression'] = string(value['compression'])
+        if result['compression'] not in ["", "gzip"]:
+            raise Unsupported()
+
+    if 'http_headers' in value:
+        if urlsplit(url).scheme not in ["http", "https"]:
+            raise Unsupported()
+        headers = [header(h) for h in items(value['http_headers'])]
+        unique(h['name'] for h in headers)
+        put(result, 'httpHeaders', headers)
+    result['source'] = url
+    if 'verification' in value:
+        put(result, 'verification', verification(value['verification']))
+    return result
+
+
+def header(value: Any) -> dict:
+    value = fields(value, ['name', 'value'], ['name'])
+    result = {'name': string(value['name'])}
+    if result['name'] == "":
+        raise Unsupported()
+    if 'value' in value:
+        result['value'] = string(value['value'])
+    return result
+
+
+def verification(value: Any) -> dict:
+    value = fields(value, ['hash'])
+    if 'hash' not in value:
+        return {}
+    hash = string(value['hash'])
+    if not HASH_RE.match(hash):
+        raise Unsupported()
+    return {'hash': hash}
+
+
+def mode(value: Any) -> int:
+    # butane warns about unset permissions
+    if value is None:
+        raise Unsupported()
+    value = integer(value)
+    if not 0 <= value <= 0o7777:
+        raise Unsupported()
+    return value
+
+
+# read local file relative to the files directory like butane does
+def local(path: str) -> bytes:
+    path = posixpath.normpath("./" + path)
+    if path == "." or path == ".." or path.startswith("../"):
+        raise Unsupported()
+    try:
+        return Path(path).read_bytes()
+    except OSError as e:
+        raise Unsupported() from e
+
+
+# get sections with options of unit file contents
+def unit_sections(contents: str) -> set[str]:
+    section, sections = None, set()
+    for line in contents.splitlines():
+        line = line.strip()
+        if len(line) > 2000 or line.endswith("\\"):
+            raise Unsupported()
+        elif line == "" or line.startswith("#") or line.startswith(";"):
+            continue
+        elif match := SECTION_RE.match(line):
+            section = match[1]
+        elif OPTION_RE.match(line) and section is not None:
+            sections.add(section)
+        else:
+            raise Unsupported()
+    return sections
+
+
+# reject paths of storage nodes systemd units will be written to
+def conflicts(config: dict):
+    if 'units' not in config.get('systemd', {}):
+        return
+    for nodes in config.get('storage', {}).values():
+        for node in nodes:
+            if node['path'].startswith("/etc/systemd/"):
+                raise Unsupported()
+
+
+# type checking helpers
+def fields(value: Any, allowed: list[str], required: list[str] = []) -> dict:
+    if not isinstance(value, dict) \
+            or not set(value).issubset(allowed) \
+            or not set(required).issubset(value) \
+            or None in value.values():
+        raise Unsupported()
+    return value
+
+
+def items(value: Any) -> list:
+    if not isinstance(value, list):
+        raise Unsupported()
+    return value
+
+
+def string(value: Any) -> str:
+    if not isinstance(value, str | Path | URL):
+        raise Unsupported()
+    return str(value)
+
+
+def integer(value: Any) -> int:
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise Unsupported()
+    return value
+
+
+def boolean(value: Any) -> bool:
+    if not isinstance(value, bool):
+        raise Unsupported()
+    return value
+
+
+def unique(keys: Any) -> list:
+    keys = list(keys)
+    if len(keys) != len(set(keys)):
+        raise Unsupported()
+    return keys
+
+
+# add value to dict unless it's empty
+def put(target: dict, key: str, value: Any):
+    if value not in (None, {}, []):
+        target[key] = value
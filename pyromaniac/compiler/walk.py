@@ -0,0 +1,115 @@
+from typing import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import PosixPath as Path
+import os
+import re
+
+from .depend import depend
+
+
+def walk(
+    root: Path,
+    include: Iterable[str] = (),
+    exclude: Iterable[str] = (),
+    threads: int = 1,
+) -> list[os.DirEntry]:
+    """List all entries below a local directory.
+
+    Uses *os.scandir*, so the type of the entries is known without additional
+    system calls and their *stat* results are cached. Entries are sorted by
+    name and listed before the entries they contain. Symbolic links to
+    directories are not followed.
+
+    Patterns without a slash are matched against the names of the entries,
+    others against their paths relative to *root*. "*" and "?" don't match
+    slashes, while a "**" segment matches any number of directories. Excluded
+    directories are skipped with everything they contain. If *include*
+    patterns are given, only files and links matching one of them are listed,
+    along with the directories containing them and those matching themselves.
+    The scanned directories are recorded as dependencies of the compilation.
+
+    :param root: directory to list the entries of
+    :param include: glob patterns of the entries to list
+    :param exclude: glob patterns of the entries to skip
+    :param threads: number of directories to scan in parallel
+    :returns: directory entries with paths starting with *root*
+    """
+    included = [(pattern(p), "/" in p.strip("/")) for p in include]
+    excluded = [(pattern(p), "/" in p.strip("/")) for p in exclude]
+    prefix = len(os.path.join(root, ""))
+
+    # scan directory for sorted entries that are not excluded
+    def scan(path: str) -> list[os.DirEntry]:
+        with os.scandir(path) as entries:
+            return sorted(
+                (e for e in entries if not matches(e, excluded, prefix)),
+                key=lambda e: e.name,
+            )
+
+    # scan directories level by level
+    children: dict[str, list[os.DirEntry]] = {}
+    with ThreadPoolExecutor(max(threads, 1)) as pool:
+        mapper = pool.map if threads > 1 else map
+        level = [os.fspath(root)]
+        while level != []:
+            children.update(zip(level, mapper(scan, level)))
+            level = [
+                entry.path
+                for path in level for entry in children[path]
+                if entry.is_dir(follow_symlinks=False)
+            ]
+    depend(*children)
+
+    # list entries in order, keeping directories containing included entries
+    def collect(path: str) -> Iterator[os.DirEntry]:
+        for entry in children[path]:
+            if entry.path not in children:
+                if included == [] or matches(entry, included, prefix):
+                    yield entry
+                continue
+            nested = list(collect(entry.path))
+            if included == [] or nested != [] or \
+                    matches(entry, included, prefix):
+                yield entry
+                yield from nested
+
+    return list(collect(os.fspath(root)))
+
+
+# compile glob pattern into a regular expression
+def pattern(glob: str) -> re.Pattern:
+    segments = glob.strip("/").split("/")
+    regex = ""
+    for index, segment in enumerate(segments):
+        if segment == "**":
+            last = index == len(segments) - 1
+            regex += "(?:[^/]+/)*[^/]+" if last else "(?:[^/]+/)*"
+            continue
+        regex += re.sub(r'\*|\?|\[!?\]?[^]]*\]|.', translate, segment)
+        if index < len(segments) - 1:
+            regex += "/"
+    return re.compile(regex)
+
+
+# translate token of a glob segment into a regular expression
+def translate(match: re.Match) -> str:
+    match match[0]:
+        case "*": return "[^/]*"
+        case "?": return "[^/]"
+        case token if len(token) > 2 and token[0] == "[":
+            negate, body = token[1] == "!", token[1:-1]
+            body = body[1:] if negate else body
+            body = body.replace("\\", "\\\\").replace("[", "\\[")
+            body = "\\" + body if body.startswith("^") else body
+            return f"[^/{body}]" if negate else f"(?!/)[{body}]"
+        case token: return re.escape(token)
+
+
+# check whether entry matches any of the compiled patterns
+def matches(
+    entry: os.DirEntry, patterns: list[tuple[re.Pattern, bool]], prefix: int,
+) -> bool:
+    return any(
+        pattern.fullmatch(entry.path[prefix:] if nested else entry.name)
+        for pattern, nested in patterns
+    )
@@ -1,4 +1,4 @@
 from .errors import IsoError
-from .customize import customize
+from .customize import customize, customize_batch
 
-__all__ = [customize, IsoError]
+__all__ = [customize, customize_batch, IsoError]
@@ -1,34 +1,243 @@
+from typing import Any
 from pathlib import Path
+from hashlib import file_digest
+from functools import lru_cache
+import os
+import re
+import sys
+import json
+import time
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
 from .. import paths
-from .errors import DownloadError, CustomizeError
+from ..cache import Store
+from .embed import embed, copy, send
+from .errors import (
+    IsoError, DownloadError, CustomizeError, NotCachedError, ImagesFailedError,
+)
+
+# seconds a downloaded base image is used without checking for a newer one
+TTL = 24 * 60 * 60
+
+# name of the file recording the downloaded images in the images directory
+MANIFEST = "manifest.json"
+
+VERSION_RE = re.compile(r'-([0-9]+(?:\.[0-9]+)+)-')
+
+# ignition config, architecture, network, disk, and installer arguments
+Image = tuple[str, str, str | None, str | None, list[tuple]]
 
 
 def customize(
     ignition: str, arch: str, net: str | None, disk: str | None,
-    installer_args: list[tuple],
+    installer_args: list[tuple], ttl: float = TTL, offline: bool = False,
+    cache: int | None = None,
 ):
     """Write ISO image with embedded ignition config to stdout.
 
     Creates an automatic installer image if the target *disk* is specified and
-    a live ISO image if it is not.
+    a live ISO image if it is not. If a *cache* size is given, customized
+    images are stored keyed by the digest of the base image and all other
+    parameters, and images customized from the same inputs before are sent
+    from there instead, evicting the least recently used ones when exceeding
+    the size.
 
     :param ignition: ignition config to be embedded
     :param arch: processor architecture to create ISO image for
     :param net: optional value for adding "ip=" kernel argument
     :param disk: optional disk path for automatic installation
     :param installer_args: arguments to pass on to CoreOS Installer
+    :param ttl: seconds to use a base image without checking for updates
+    :param offline: whether to only use cached base images
+    :param cache: maximum size of the stored images in bytes or None to not
+        store them
     """
 
     # get base image
-    base = get_base_image(arch)
+    base = get_base_image(arch, ttl, offline)
 
     # customize image
-    customize_base_image(base, ignition, net, disk, installer_args)
+    store = None if cache is None else Store(paths.isos, cache)
+    customize_cached(store, base, ignition, net, disk, installer_args)
+
+
+def customize_batch(
+    images: dict[str, Image], output: Path, jobs: int | None = None,
+    ttl: float = TTL, offline: bool = False, cache: int | None = None,
+) -> dict[str, Path]:
+    """Write ISO images with embedded ignition configs to a directory.
+
+    Gets the base image of each architecture once and customizes them for
+    the entries in a pool of threads running CoreOS Installer in parallel.
+    Writes one ISO image named after each entry. Failing entries are reported
+    on standard error without aborting the others.
+
+    :param images: dict mapping entry names to image parameters as passed
+        to *customize*
+    :param output: directory to write the ISO images to
+    :param jobs: number of parallel jobs, defaults to the number of cores
+    :param ttl: seconds to use a base image without checking for updates
+    :param offline: whether to only use cached base images
+    :param cache: maximum size of the stored images in bytes or None to not
+        store them
+    :returns: dict mapping entry names to the paths of their ISO images
+    """
+    bases = {
+        arch: get_base_image(arch, ttl, offline)
+        for arch in sorted({image[1] for image in images.values()})
+    }
+    store = None if cache is None else Store(paths.isos, cache)
+    output.mkdir(parents=True, exist_ok=True)
+    targets = {name: output.joinpath(f"{name}.iso") for name in images}
+
+    # customize base image writing to temporary file and moving it in place
+    def build(name: str) -> str | None:
+        ignition, arch, net, disk, installer_args = images[name]
+        temp = targets[name].with_name(f".{name}.iso.{os.getpid()}")
+        try:
+            temp.unlink(missing_ok=True)
+            customize_cached(
+                store, bases[arch], ignition, net, disk, installer_args, temp,
+            )
+            os.replace(temp, targets[name])
+        except (IsoError, OSError) as e:
+            temp.unlink(missing_ok=True)
+            return str(e)
+        return None
+
+    jobs = jobs or len(os.sched_getaffinity(0))
+    with ThreadPoolExecutor(max(1, min(jobs, len(images)))) as pool:
+        results = dict(zip(images, pool.map(build, images)))
+
+    failed = [name for name, error in results.items() if error is not None]
+    for name in failed:
+        print(f'Error in "{name}": {results[name]}', file=sys.stderr)
+    if failed != []:
+        raise ImagesFailedError(failed, len(images))
+    return targets
+
+
+# customize base image, reusing images customized from the same inputs
+def customize_cached(
+    store: Store | None, image: Path, ignition: str, net: str | None,
+    disk: str | None, installer_args: list[tuple], output: Path | None = None,
+):
+    args = ignition, net, disk, installer_args
+    if store is None:
+        customize_base_image(image, *args, output)
+        return
+
+    key = Store.key(
+        base_digest(image, **stamp(image)), ignition,
+        json.dumps([net, disk, installer_args]),
+    )
+    stored = store.find(key)
+    if stored is not None and deliver(stored, output):
+        return
+    if output is not None:
+        customize_base_image(image, *args, output)
+        store.add(key, output)
+        return
+
+    # customize into the store directory to send the image from there
+    try:
+        store.path.mkdir(parents=True, exist_ok=True)
+        writable = os.access(store.path, os.W_OK)
+    except OSError:
+        writable = False
+    if not writable:
+        customize_base_image(image, *args)
+        return
+    temp = store.path.joinpath(f".{key}.{os.getpid()}")
+    try:
+        customize_base_image(image, *args, temp)
+        deliver(store.add(key, temp, move=True) or temp, None)
+    finally:
+        temp.unlink(missing_ok=True)
+
+
+# write stored image to output file or stdout, returning False if it's gone
+def deliver(stored: Path, output: Path | None) -> bool:
+    try:
+        file = stored.open('rb')
+    except OSError:
+        return False
+    with file:
+        size = os.fstat(file.fileno()).st_size
+        try:
+            if output is None:
+                sys.stdout.flush()
+                send(sys.stdout.fileno(), file, 0, size)
+            else:
+                with output.open('w+b') as target:
+                    copy(file, target, size)
+        except OSError as e:
+            raise CustomizeError(f"Writing the image failed: {e}") from e
+    return True
+
+
+# get digest of base image in a state, preferring the one in the manifest
+@lru_cache
+def base_digest(image: Path, size: int, mtime: int) -> str:
+    for entry in load_manifest().values():
+        if isinstance(entry, dict) and entry.get('image') == image.name \
+                and entry.get('verified') is True and unchanged(entry, image):
+            return entry['sha256']
+    return digest(image)
+
 
+def get_base_image(arch: str, ttl: float = TTL, offline: bool = False) -> Path:
+    """Get the path of the newest base image, downloading it if necessary.
 
-def get_base_image(arch: str) -> Path:
+    Downloaded images are recorded in a manifest with their version, SHA-256
+    digest, and download time. Recorded images whose signature was verified
+    by CoreOS Installer are used without contacting the server again until
+    they are older than *ttl* seconds, or at all when *offline*. Their digest
+    is only computed again if their size or modification time changed. If
+    checking for a newer image fails, the recorded one is used with a
+    warning.
+
+    :param arch: processor architecture of the image
+    :param ttl: seconds to use a recorded image without checking for updates
+    :param offline: whether to only use recorded images
+    :returns: path of the image
+    """
+    manifest = load_manifest()
+    cached = cached_image(manifest, arch)
+    if cached is not None and (
+        offline or time.time() - manifest[arch]['fetched'] < ttl
+    ):
+        return cached
+    if offline:
+        raise NotCachedError(arch)
+
+    try:
+        image = download(arch)
+    except DownloadError as e:
+        if cached is None:
+            raise
+        print(f"{e}\nUsing cached base image {cached.name}.", file=sys.stderr)
+        return cached
+
+    # record image, reusing the digest if it didn't change
+    entry = manifest.get(arch)
+    if cached != image or not unchanged(entry, image):
+        entry = {
+            'image': image.name, 'version': version(image.name),
+            'sha256': digest(image), 'verified': True,
+        }
+    manifest[arch] = {**entry, **stamp(image), 'fetched': time.time()}
+    manifest = {
+        a: e for a, e in manifest.items()
+        if isinstance(e, dict) and paths.images.joinpath(e['image']).exists()
+    }
+    save_manifest(manifest)
+    return image
+
+
+# download newest image with coreos-installer, removing older versions
+def download(arch: str) -> Path:
     # make sure directory exists
     paths.images.mkdir(parents=True, exist_ok=True)
 
@@ -58,13 +267,79 @@ def get_base_image(arch: str) -> Path:
     return image
 
 
+# get recorded verified image if it still has the recorded digest
+def cached_image(manifest: dict[str, Any], arch: str) -> Path | None:
+    entry = manifest.get(arch)
+    if not isinstance(entry, dict) or entry.get('verified') is not True:
+        return None
+    try:
+        image = paths.images.joinpath(entry['image'])
+        if unchanged(entry, image):
+            return image
+        if digest(image) != entry['sha256']:
+            return None
+    except (OSError, KeyError, TypeError):
+        return None
+    entry.update(stamp(image))
+    save_manifest(manifest)
+    return image
+
+
+# read manifest of recorded images by architecture
+def load_manifest() -> dict[str, Any]:
+    try:
+        manifest = json.loads(paths.images.joinpath(MANIFEST).read_text())
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+# write manifest atomically, ignoring failures like the component cache
+def save_manifest(manifest: dict[str, Any]):
+    path = paths.images.joinpath(MANIFEST)
+    temp = path.with_name(f".{MANIFEST}.{os.getpid()}")
+    try:
+        temp.write_text(json.dumps(manifest, indent=2) + "\n")
+        os.replace(temp, path)
+    except OSError:
+        pass
+
+
+# get size and modification time identifying the state of an image
+def stamp(image: Path) -> dict[str, int]:
+    stat = image.stat()
+    return {'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+
+
+# check whether image has the size and modification time recorded in entry
+def unchanged(entry: dict[str, Any], image: Path) -> bool:
+    return stamp(image) == {k: entry.get(k) for k in ['size', 'mtime']}
+
+
+# compute SHA-256 digest of an image
+def digest(image: Path) -> str:
+    with image.open('rb') as file:
+        return file_digest(file, 'sha256').hexdigest()
+
+
+# get version of the operating system from the image file name
+def version(name: str) -> str | None:
+    match = VERSION_RE.search(name)
+    return match[1] if match else None
+
+
 def customize_base_image(
     image: Path, ignition: str, net: str | None, disk: str | None,
-    installer_args: list[tuple],
+    installer_args: list[tuple], output: Path | None = None,
 ):
+    # embed config without CoreOS Installer if no other changes are needed
+    if net is None and disk is None and installer_args == []:
+        if embed(image, ignition, output):
+            return
+
     # collect arguments
     args = ["iso", "customize", image]
-    args += ["--output", "-"]
+    args += ["--output", "-" if output is None else output]
 
     if net is not None:
         args += ["--live-karg-append", f"ip={net}"]
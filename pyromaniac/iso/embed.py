@@ -0,0 +1,208 @@
+from typing import BinaryIO
+from pathlib import Path
+from functools import cache
+import os
+import sys
+import lzma
+import mmap
+import errno
+import fcntl
+import shutil
+import struct
+
+from .errors import CustomizeError
+
+# location of the primary volume descriptor and its type and identifier
+DESCRIPTOR = 16 * 2048
+PRIMARY = b"\x01CD001"
+
+# path of the file reserved for embedding ignition configs in live images
+AREA = ["IMAGES", "IGNITION.IMG"]
+
+# ioctl request for sharing file contents on copy on write file systems
+FICLONE = 0x40049409
+
+# errors of copy_file_range and sendfile calling for a plain copy instead
+UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP}
+
+CHUNK = 1024 * 1024
+
+
+def embed(image: Path, ignition: str, output: Path | None = None) -> bool:
+    """Write copy of a live image with an embedded ignition config.
+
+    Writes the config to the area reserved for it in the image like
+    *coreos-installer iso ignition embed*, without piping the entire image
+    through CoreOS Installer. Files share the unmodified contents with the
+    image on file systems supporting it and are copied in the kernel
+    otherwise, before writing the config in place. Standard output gets the
+    parts around the config sent by the kernel.
+
+    :param image: path of the live image
+    :param ignition: ignition config to embed
+    :param output: path of the file to write, defaults to standard output
+    :returns: False without writing anything if the image has no area large
+        enough for the config
+    :raises CustomizeError: if writing the output fails
+    """
+    try:
+        stat = image.stat()
+        found = area(image, stat.st_size, stat.st_mtime_ns)
+    except OSError:
+        return False
+    if found is None:
+        return False
+    offset, length = found
+    data = initrd(ignition)
+    if len(data) > length:
+        return False
+    data = data.ljust(length, b"\0")
+
+    try:
+        with image.open('rb') as source:
+            if output is None:
+                sys.stdout.flush()
+                fd = sys.stdout.fileno()
+                send(fd, source, 0, offset)
+                write(fd, data)
+                end = offset + length
+                send(fd, source, end, stat.st_size - end)
+                return True
+
+            with output.open('w+b') as target:
+                copy(source, target, stat.st_size)
+                start = offset - offset % mmap.ALLOCATIONGRANULARITY
+                with mmap.mmap(
+                    target.fileno(), offset + length - start, offset=start,
+                ) as view:
+                    view[offset - start:offset - start + length] = data
+    except OSError as e:
+        raise CustomizeError(f"Writing the image failed: {e}") from e
+    return True
+
+
+def initrd(ignition: str) -> bytes:
+    """Create compressed archive containing ignition config as "config.ign".
+
+    :param ignition: ignition config
+    :returns: xz compressed cpio archive as read by the kernel
+    """
+    archive = entry("config.ign", ignition.encode(), 0o100644, 1)
+    archive += entry("TRAILER!!!", b"", 0, 0)
+    return lzma.compress(archive, check=lzma.CHECK_CRC32)
+
+
+# create cpio entry in the "newc" format
+def entry(name: str, data: bytes, mode: int, inode: int) -> bytes:
+    path = name.encode() + b"\0"
+    fields = [inode, mode, 0, 0, 1, 0, len(data), 0, 0, 0, 0, len(path), 0]
+    header = b"070701" + "".join(f"{f:08x}" for f in fields).encode()
+    return pad(header + path) + pad(data)
+
+
+# pad data with zeros to a multiple of four bytes
+def pad(data: bytes) -> bytes:
+    return data + b"\0" * (-len(data) % 4)
+
+
+# find offset and length of the embedding area of an image by its state
+@cache
+def area(image: Path, size: int, mtime: int) -> tuple[int, int] | None:
+    with image.open('rb') as file:
+        file.seek(DESCRIPTOR)
+        descriptor = file.read(2048)
+        if not descriptor.startswith(PRIMARY):
+            return None
+        block = struct.unpack_from("<H", descriptor, 128)[0]
+        found = record(descriptor, 156)[:2]
+        for index, name in enumerate(AREA):
+            directory = index < len(AREA) - 1
+            found = lookup(file, *found, block, name, directory)
+            if found is None:
+                return None
+
+    offset, length = found[0] * block, found[1]
+    return (offset, length) if offset + length <= size else None
+
+
+# find extent and length of a file or directory in a directory
+def lookup(
+    file: BinaryIO, extent: int, length: int, block: int, name: str,
+    directory: bool,
+) -> tuple[int, int] | None:
+    file.seek(extent * block)
+    data = file.read(min(length, CHUNK))
+    offset = 0
+    while offset < len(data):
+        if data[offset] == 0:
+            # records don't cross block boundaries and are padded with zeros
+            offset = (offset // block + 1) * block
+            continue
+        size = data[offset + 32]
+        found = data[offset + 33:offset + 33 + size].split(b";")[0]
+        extent, length, flag = record(data, offset)
+        if found == name.encode() and flag == directory:
+            return extent, length
+        offset += data[offset]
+    return None
+
+
+# get extent, length, and directory flag of a directory record
+def record(data: bytes, offset: int) -> tuple[int, int, bool]:
+    extent, length = struct.unpack_from("<I4xI", data, offset + 2)
+    return extent, length, bool(data[offset + 25] & 2)
+
+
+# copy file contents, sharing them on file systems supporting it
+def copy(source: BinaryIO, target: BinaryIO, size: int):
+    try:
+        fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+        return
+    except OSError:
+        pass
+
+    offset = 0
+    try:
+        while offset < size:
+            copied = os.copy_file_range(
+                source.fileno(), target.fileno(), size - offset,
+                offset, offset,
+            )
+            if copied == 0:
+                break
+            offset += copied
+    except OSError as e:
+        if e.errno not in UNSUPPORTED:
+            raise
+        source.seek(offset)
+        target.seek(offset)
+        shutil.copyfileobj(source, target, CHUNK)
+        target.flush()
+
+
+# send part of a file to a file descriptor
+def send(fd: int, source: BinaryIO, offset: int, count: int):
+    end = offset + count
+    try:
+        while offset < end:
+            sent = os.sendfile(fd, source.fileno(), offset, end - offset)
+            if sent == 0:
+                return
+            offset += sent
+    except OSError as e:
+        if e.errno not in UNSUPPORTED:
+            raise
+        source.seek(offset)
+        while offset < end:
+            chunk = source.read(min(CHUNK, end - offset))
+            if chunk == b"":
+                return
+            write(fd, chunk)
+            offset += len(chunk)
+
+
+# write all data to a file descriptor
+def write(fd: int, data: bytes):
+    view = memoryview(data)
+    while len(view) > 0:
+        view = view[os.write(fd, view):]
@@ -35,3 +35,39 @@ class CustomizeError(IsoError):
         if message.startswith("Error: "):
             message = message[7:8].upper() + message[8:]
         return f"Customizing downloaded ISO image failed:\n{message}"
+
+
+class NotCachedError(IsoError):
+    """Error raised when no base image is cached for offline use.
+
+    :param arch: processor architecture of the missing image
+    """
+
+    def __init__(self, arch: str):
+        super().__init__("")
+        self.arch = arch
+
+    def __str__(self) -> str:
+        return (
+            f"No verified {self.arch} base image is cached for offline use. "
+            "Generate an ISO image once without --iso-offline first."
+        )
+
+
+class ImagesFailedError(IsoError):
+    """Error raised when generating some of the batch ISO images failed.
+
+    :param failed: names of the failed entries
+    :param total: total number of entries
+    """
+
+    def __init__(self, failed: list[str], total: int):
+        super().__init__("")
+        self.failed = failed
+        self.total = total
+
+    def __str__(self) -> str:
+        return (
+            f"Generating {len(self.failed)} of {self.total} ISO images "
+            "failed."
+        )
@@ -11,3 +11,6 @@ data = Path("/data")
 secrets = data / "secrets"
 cache = data / "cache"
 images = cache / "images"
+isos = cache / "isos"
+components = cache / "components"
+translations = cache / "butane"
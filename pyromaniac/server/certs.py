@@ -1,19 +1,30 @@
 from pathlib import PosixPath as Path
-from tempfile import NamedTemporaryFile
 from datetime import datetime, timezone, timedelta
 from ipaddress import ip_address
+import os
+import re
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.asymmetric import rsa, ec
 from cryptography.x509 import NameAttribute as Attr
 from cryptography.x509.oid import NameOID as OID
 from cryptography import x509
+from cryptography.exceptions import InvalidSignature
 
 from .. import paths
 
 ROOT_KEY = paths.secrets / "root.key"
 ROOT_CRT = paths.secrets / "root.cert"
 
+# key types supported for generating new keys
+KEY_TYPES = ['rsa', 'ecdsa']
+
+# days server certificates are valid for and renewed before expiring
+SERVER_DAYS = 365
+RENEW_DAYS = 30
+
+key_type = 'rsa'
+
 ROOT_NAME = x509.Name([
     Attr(OID.COUNTRY_NAME, "UK"),
     Attr(OID.ORGANIZATION_NAME, "Pyromaniac"),
@@ -27,6 +38,18 @@ SERVER_NAME = x509.Name([
 ])
 
 
+def configure(typ: str = 'rsa'):
+    """Configure the type of newly generated keys.
+
+    Existing keys are kept regardless of their type, so changing the type
+    doesn't invalidate root certificates already embedded in ISO images.
+
+    :param typ: "rsa" for 2048 bit RSA or "ecdsa" for ECDSA P-256 keys
+    """
+    global key_type
+    key_type = typ
+
+
 def root() -> tuple[Path, Path]:
     """Make sure a self-signed root certificate exists and return it.
 
@@ -49,7 +72,11 @@ def root() -> tuple[Path, Path]:
 
 
 def server(host: str) -> tuple[Path, Path]:
-    """Generate a certificate for the given host and return it.
+    """Make sure a certificate for the given host exists and return it.
+
+    Certificates are persisted next to the root certificate and reused until
+    they are about to expire, the root certificate changes, or a different
+    key type is configured.
 
     :param host: ip address or host name to certify
     :returns: the path to the certificate and the path to its private key
@@ -58,8 +85,15 @@ def server(host: str) -> tuple[Path, Path]:
     # ensure root certificate exists
     root()
 
+    # reuse certificate if still valid
+    name = f"server-{re.sub(r'[^a-z0-9.-]', '_', host.lower())}-{key_type}"
+    key_path = ROOT_KEY.with_name(f"{name}.key")
+    crt_path = ROOT_CRT.with_name(f"{name}.cert")
+    if valid(crt_path, key_path):
+        return crt_path, key_path
+
     # generate key
-    key_path = generate_key()
+    generate_key(key_path)
 
     # create alternative name
     try:
@@ -68,22 +102,36 @@ def server(host: str) -> tuple[Path, Path]:
         alt = x509.DNSName(host)
 
     # generate certificate
-    crt_path = generate_crt(ROOT_NAME, ROOT_KEY, SERVER_NAME, key_path, 365, [
+    generate_crt(ROOT_NAME, ROOT_KEY, SERVER_NAME, key_path, SERVER_DAYS, [
         (x509.BasicConstraints(False, None), True),
         (x509.KeyUsage(*(i == 0 for i in range(9))), True),
         (x509.SubjectAlternativeName([alt]), False),
-    ], concat=ROOT_CRT)
+    ], concat=ROOT_CRT, path=crt_path)
 
     # return file paths
     return crt_path, key_path
 
 
+# check whether certificate is signed by root and not about to expire
+def valid(crt_path: Path, key_path: Path) -> bool:
+    try:
+        cert = x509.load_pem_x509_certificate(crt_path.read_bytes())
+        issuer = x509.load_pem_x509_certificate(ROOT_CRT.read_bytes())
+        cert.verify_directly_issued_by(issuer)
+        public = load_key(key_path).public_key()
+    except (OSError, ValueError, TypeError, InvalidSignature):
+        return False
+    renew = datetime.now(timezone.utc) + timedelta(days=RENEW_DAYS)
+    return cert.public_key() == public and cert.not_valid_after_utc > renew
+
+
 # generate key and write it to file
-def generate_key(path: Path | None = None) -> Path:
-    if not path:
-        path = Path(NamedTemporaryFile(delete=False).name)
-    key = rsa.generate_private_key(65537, 2048)
-    path.write_bytes(key.private_bytes(
+def generate_key(path: Path) -> Path:
+    if key_type == 'ecdsa':
+        key = ec.generate_private_key(ec.SECP256R1())
+    else:
+        key = rsa.generate_private_key(65537, 2048)
+    write(path, key.private_bytes(
         serialization.Encoding.PEM,
         serialization.PrivateFormat.TraditionalOpenSSL,
         serialization.NoEncryption(),
@@ -92,7 +140,7 @@ def generate_key(path: Path | None = None) -> Path:
 
 
 # load key from file
-def load_key(path: Path) -> rsa.RSAPrivateKey:
+def load_key(path: Path) -> rsa.RSAPrivateKey | ec.EllipticCurvePrivateKey:
     return serialization.load_pem_private_key(path.read_bytes(), None)
 
 
@@ -106,8 +154,6 @@ def generate_crt(
     ikey, skey = load_key(issuer_key), load_key(subject_key)
     time_start = datetime.now(timezone.utc)
     time_end = time_start + timedelta(days=days)
-    if not path:
-        path = Path(NamedTemporaryFile(delete=False).name)
 
     builder = x509.CertificateBuilder() \
         .issuer_name(issuer).subject_name(subject) \
@@ -122,5 +168,15 @@ def generate_crt(
     cert_bytes = cert.public_bytes(serialization.Encoding.PEM)
     if concat:
         cert_bytes += concat.read_bytes()
-    path.write_bytes(cert_bytes)
+    write(path, cert_bytes)
     return path
+
+
+# write file readable only by the owner, replacing it atomically
+def write(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp = path.with_name(f".{path.name}.{os.getpid()}")
+    fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with open(fd, 'wb') as file:
+        file.write(data)
+    os.replace(temp, path)
@@ -0,0 +1,88 @@
+from typing import TYPE_CHECKING
+from pathlib import PosixPath as Path
+import ipaddress
+import re
+
+if TYPE_CHECKING:
+    from ..batch.matrix import Entry
+
+# kernel table of the hardware addresses of hosts in the local network
+ARP = Path("/proc/net/arp")
+
+MAC_RE = re.compile(r'[0-9a-f]{2}([:-])[0-9a-f]{2}(?:\1[0-9a-f]{2}){4}')
+
+
+class Inventory:
+    """Hosts to serve configs for with the arguments for the main component.
+
+    Entries are looked up by their names. Entries named after an IP or MAC
+    address are also matched to clients requesting a config from that
+    address. MAC addresses of clients are looked up in the kernel's ARP table,
+    which only knows hosts in the same network segment.
+
+    :param entries: dict mapping host names to component arguments
+    """
+
+    def __init__(self, entries: dict[str, 'Entry']):
+        self.entries = entries
+        self.ips = {}
+        self.macs = {}
+        for name in entries:
+            if (ip := normalize_ip(name)) is not None:
+                self.ips[ip] = name
+            elif (mac := normalize_mac(name)) is not None:
+                self.macs[mac] = name
+
+    def get(self, name: str) -> 'Entry | None':
+        """Get the arguments of a host by its name.
+
+        :param name: name of the host
+        :returns: component arguments or None if there is no such host
+        """
+        return self.entries.get(name)
+
+    def match(self, address: str) -> str | None:
+        """Find the host a client address belongs to.
+
+        :param address: IP address of the client
+        :returns: name of the host or None if no entry matches
+        """
+        ip = normalize_ip(address)
+        if ip in self.ips:
+            return self.ips[ip]
+        if self.macs != {} and ip is not None:
+            return self.macs.get(neighbors().get(ip))
+        return None
+
+
+# get IP address in canonical form, unwrapping IPv4 mapped IPv6 addresses
+def normalize_ip(address: str) -> str | None:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return None
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return str(ip)
+
+
+# get MAC address as lower case colon separated hexadecimal bytes
+def normalize_mac(address: str) -> str | None:
+    address = address.lower()
+    if not MAC_RE.fullmatch(address):
+        return None
+    return address.replace("-", ":")
+
+
+# read MAC addresses of the hosts in the local network by IP address
+def neighbors() -> dict[str, str]:
+    try:
+        lines = ARP.read_text().splitlines()[1:]
+    except OSError:
+        return {}
+    table = {}
+    for line in lines:
+        fields = line.split()
+        if len(fields) >= 4 and (mac := normalize_mac(fields[3])):
+            table[fields[0]] = mac
+    return table
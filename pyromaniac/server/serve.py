@@ -1,15 +1,19 @@
-from typing import Callable, TYPE_CHECKING
+from typing import Callable, Iterable, TYPE_CHECKING
 from pathlib import PosixPath as Path
 
 from .log import log
 from .server import Server
+from .watch import IGNORE
+from .inventory import Inventory
 
 if TYPE_CHECKING:
     from ..remote import Remote
 
 
 def serve(
-    remote: 'Remote', generator: Callable[[], str], watch: Path | None = None,
+    remote: 'Remote', generator: Callable[..., str], watch: Path | None = None,
+    ignore: Iterable[str] = IGNORE, inventory: Inventory | None = None,
+    parameters: Callable[..., Iterable[str]] | None = None,
 ):
     """Serve config and secrets until keyboard interrupt.
 
@@ -18,13 +22,30 @@ def serve(
     for generating TLS certificate. No authentication is used when auth is
     None.
 
+    Configs of the hosts in the inventory are served under "/config/NAME.ign"
+    and under "/config.ign" to clients matching the IP or MAC address a host
+    is named after. The generator is called with the arguments of the host and
+    the most recently used configs are cached for each set of arguments.
+
+    Query parameters are passed as additional keyword arguments if
+    `parameters(*args, **kwargs)` names them for the host's arguments and
+    are rejected otherwise. Failing compilations are answered with an error.
+
     :param remote: remote object with address and authentication secret
-    :param generator: function that generates an ignition config
+    :param generator: function generating ignition configs from arguments
+    :param watch: directory to watch for changes requiring recompilation
+    :param ignore: glob patterns of paths in *watch* to ignore changes of
+    :param inventory: hosts to serve configs for
+    :param parameters: function naming the parameters left to set by keyword
+        for given arguments
     """
 
     # run server
     log("starting server")
-    server = Server(remote.scheme, remote.host, remote.auth, generator, watch)
+    server = Server(
+        remote.scheme, remote.host, remote.auth, generator, watch, ignore,
+        inventory, parameters,
+    )
     try:
         server.serve_forever()
     except KeyboardInterrupt:
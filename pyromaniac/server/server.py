@@ -1,89 +1,283 @@
-from typing import Callable, Any
+from typing import Callable, Any, Iterable, Hashable
 from pathlib import PosixPath as Path
-from hashlib import md5
+from queue import Queue
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qsl, unquote
+from threading import Thread, Lock, BoundedSemaphore
+import socket
 import ssl
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from base64 import b64encode
+from hashlib import sha256
+import gzip
+import traceback
 import re
 from getpass import getpass
+from functools import cached_property
 
 from .log import log
+from .watch import Watcher, IGNORE
+from .inventory import Inventory
+from ..compiler.memo import freeze
 from ..server import certs
 
 SECRET_PATH_RE = re.compile(r'/([a-z0-9-]+)\.secret')
+CONFIG_PATH_RE = re.compile(r'/config/([^/]+)\.ign')
+QUALITY_RE = re.compile(r'(?:^|;)\s*q\s*=\s*([0-9.]+)', re.IGNORECASE)
+
+# number of requests handled concurrently
+WORKERS = 32
+
+# number of accepted connections waiting for a worker before accepting blocks
+BACKLOG = 64
+
+# number of workers allowed to wait for the user to enter a secret
+PROMPTS = WORKERS // 4
+
+# seconds to wait for clients before dropping their connections
+TIMEOUT = 60
+
+# seconds to wait for further requests on kept alive connections
+IDLE = 5
+
+# gzip compression level of config responses
+GZIP_LEVEL = 9
+
+# number of configs compiled with different arguments to keep
+CONFIGS = 64
+
+# number of TLS 1.3 session tickets sent to clients for resuming sessions
+TICKETS = 2
 
 
 class Server(HTTPServer):
-    """HTTP(S) server for ignitions configs and secrets"""
+    """HTTP(S) server for ignitions configs and secrets.
+
+    Requests are handled by a fixed number of worker threads. Once all workers
+    are busy and enough accepted connections are waiting for one, the server
+    stops accepting connections, leaving further ones to the listen queue of
+    the operating system. TLS handshakes are performed by the workers, so slow
+    clients don't hold up accepting others. The workers are daemon threads
+    that don't keep the process alive, e.g. while waiting for a secret.
+    """
+
+    # queue connections of many machines booting at once
+    request_queue_size = 256
 
     def __init__(
         self, scheme: str, host: str, auth: str | None,
-        generator: Callable[[], str], watch: Path | None = None,
+        generator: Callable[..., str], watch: Path | None = None,
+        ignore: Iterable[str] = IGNORE, inventory: Inventory | None = None,
+        parameters: Callable[..., Iterable[str]] | None = None,
     ):
         super().__init__(('0.0.0.0', 8000), self.handle)
 
         if scheme == 'https':
+            # let returning clients resume sessions with tickets, which are
+            # enabled by default for TLS 1.2 and sent after TLS 1.3 handshakes
             context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.minimum_version = ssl.TLSVersion.TLSv1_2
+            context.num_tickets = TICKETS
             context.load_cert_chain(*certs.server(host))
-            self.socket = context.wrap_socket(self.socket, server_side=True)
+            self.socket = context.wrap_socket(
+                self.socket, server_side=True, do_handshake_on_connect=False,
+            )
 
         self.scheme = scheme
         self.host = host
         self.auth = auth
-        self.cache = Cache(generator, watch)
+        self.inventory = inventory
+        self.parameters = parameters
+        self.cache = Cache(
+            lambda *args, **kwargs: Content(generator(*args, **kwargs)),
+            watch, ignore,
+        )
+        self.prompt = Prompt(PROMPTS)
+        self.queue: Queue[tuple[socket.socket, Any]] = Queue(BACKLOG)
 
     def handle(self, *args: Any, **kwargs: Any) -> 'Handler':
-        return Handler(self.auth, self.cache, *args, **kwargs)
+        return Handler(
+            self.auth, self.cache, self.prompt, self.queue, self.inventory,
+            self.parameters, *args, **kwargs,
+        )
+
+    def server_close(self):
+        """Close the socket and stop watching for changes."""
+        super().server_close()
+        self.cache.close()
+
+    def serve_forever(self, poll_interval: float = 0.5):
+        """Start the worker threads and handle requests until shutdown."""
+        for _ in range(WORKERS):
+            Thread(target=self.work, daemon=True).start()
+        super().serve_forever(poll_interval)
+
+    def process_request(self, request: socket.socket, address: Any):
+        """Hand request to the workers, waiting while the queue is full."""
+        self.queue.put((request, address))
+
+    # handle queued requests in worker thread
+    def work(self):
+        while True:
+            request, address = self.queue.get()
+            try:
+                request.settimeout(TIMEOUT)
+                if isinstance(request, ssl.SSLSocket):
+                    request.do_handshake()
+            except OSError:
+                self.shutdown_request(request)
+                continue
+            try:
+                self.finish_request(request, address)
+            except Exception:
+                self.handle_error(request, address)
+            finally:
+                self.shutdown_request(request)
+
+
+class Content:
+    """Config response body with entity tags for conditional requests.
+
+    The gzip compressed body is computed when first requested and kept for
+    all further requests until the config changes.
+
+    :param text: compiled config
+    """
+
+    def __init__(self, text: str):
+        self.data = text.encode()
+        self.etag = f'"{sha256(self.data).hexdigest()[:32]}"'
+        self.gzip_etag = f'{self.etag[:-1]}-gzip"'
+
+    @cached_property
+    def gzip(self) -> bytes | None:
+        """Compressed body or None if compressing doesn't make it smaller."""
+        data = gzip.compress(self.data, GZIP_LEVEL, mtime=0)
+        return data if len(data) < len(self.data) else None
+
+    def matches(self, header: str | None) -> bool:
+        """Check whether an If-None-Match header matches either entity tag.
+
+        :param header: value of the header, if sent
+        :returns: whether the client's copy is up to date
+        """
+        if header is None:
+            return False
+        tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+        return "*" in tags or self.etag in tags or self.gzip_etag in tags
 
 
 class Cache:
-    def __init__(self, generator: Callable[[], str], watch: Path | None):
+    def __init__(
+        self, generator: Callable[..., Any], watch: Path | None,
+        ignore: Iterable[str] = IGNORE, size: int = CONFIGS,
+    ):
         self.generator = generator
-        self.watch = watch
-        self.value = None
-        self.last_hash = None
-
-    def get(self):
-        hash = self.hash()
-        if self.last_hash is None or self.last_hash != hash:
-            self.value = self.generator()
-            self.last_hash = hash
-        return self.value
-
-    def hash(self) -> bytes | None:
-        if self.watch is None:
-            return None
-        stat = "\n".join(
-            f"{f},{f.lstat().st_mtime},{f.lstat().st_ctime}"
-            for f in sorted(self.watch.glob("**/*"))
-        )
-        return md5(stat.encode()).digest()
+        self.watcher = None
+        if watch is not None:
+            self.watcher = Watcher.create(watch, ignore)
+        self.size = size
+        self.values: OrderedDict[Hashable, Any] = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, args: tuple = (), kwargs: dict[str, Any] = {}):
+        # compile once at a time, letting waiting requests share the result
+        key = freeze((args, kwargs))
+        with self.lock:
+            if self.watcher is None or self.watcher.changed():
+                self.values.clear()
+            if key not in self.values:
+                self.values[key] = self.generator(*args, **kwargs)
+                while len(self.values) > self.size:
+                    self.values.popitem(last=False)
+            self.values.move_to_end(key)
+            return self.values[key]
+
+    def close(self):
+        if self.watcher is not None:
+            self.watcher.close()
+
+
+class Prompt:
+    def __init__(self, waiting: int):
+        self.slots = BoundedSemaphore(max(waiting, 1))
+        self.lock = Lock()
+
+    def reserve(self) -> bool:
+        # keep workers for configs by limiting those waiting for secrets
+        return self.slots.acquire(blocking=False)
+
+    def release(self):
+        self.slots.release()
+
+    def ask(self) -> str:
+        # query secrets one at a time
+        with self.lock:
+            return getpass("Secret: ")
 
 
 class Handler(BaseHTTPRequestHandler):
-    def __init__(self, auth: str | None, cache: Cache, *args, **kwargs):
+    protocol_version = "HTTP/1.1"
+    timeout = TIMEOUT
+    head = False
+
+    def __init__(
+        self, auth: str | None, cache: Cache, prompt: Prompt, queue: Queue,
+        inventory: Inventory | None,
+        parameters: Callable[..., Iterable[str]] | None, *args, **kwargs,
+    ):
         self.auth = auth
         self.cache = cache
+        self.prompt = prompt
+        self.queue = queue
+        self.inventory = inventory
+        self.parameters = parameters
 
         super().__init__(*args, **kwargs)
 
+    def handle(self):
+        # wait only briefly for further requests on kept alive connections
+        self.handle_one_request()
+        while not self.close_connection:
+            self.connection.settimeout(IDLE)
+            self.handle_one_request()
+
+    def parse_request(self) -> bool:
+        self.connection.settimeout(TIMEOUT)
+        valid = super().parse_request()
+        self.head = self.command == 'HEAD'
+        return valid
+
+    def do_HEAD(self):
+        self.do_GET()
+
     def do_GET(self):
         if not self.authorized(self.headers.get('Authorization')):
             log("received unauthorized request")
             return self.respond("unauthorized", status=401)
 
         # serve config from generator
-        if self.path == '/config.ign':
-            log("serving config")
-            return self.respond(self.cache.get(), typ="application/json")
+        url = urlsplit(self.path)
+        if url.path == '/config.ign' or CONFIG_PATH_RE.fullmatch(url.path):
+            return self.serve_config(url.path, dict(parse_qsl(url.query)))
 
         # serve secret from prompt
         match = SECRET_PATH_RE.fullmatch(self.path)
         if match:
-            log(f'serving secret "{match[1]}"')
-            self.respond_headers()
-            secret = getpass("Secret: ")
-            return self.respond_body(secret)
+            if self.head:
+                return self.respond(
+                    "method not allowed", status=405, extra={'Allow': "GET"},
+                )
+            if not self.prompt.reserve():
+                log(f'too many pending secrets to serve "{match[1]}"')
+                return self.respond("busy", status=503, retry=5)
+            try:
+                log(f'serving secret "{match[1]}"')
+                self.respond_headers()
+                secret = self.prompt.ask()
+                return self.respond_body(secret)
+            finally:
+                self.prompt.release()
 
         # respond with 404
         log("non-existent path requested")
@@ -94,20 +288,102 @@ class Handler(BaseHTTPRequestHandler):
             return True
         return auth_header == f"Basic {b64encode(self.auth.encode()).decode()}"
 
+    def serve_config(self, path: str, query: dict[str, str]):
+        # find arguments by host name in path or client address
+        args, kwargs, name = (), {}, None
+        if (match := CONFIG_PATH_RE.fullmatch(path)) is not None:
+            name = unquote(match[1])
+        elif self.inventory is not None:
+            name = self.inventory.match(self.client_address[0])
+
+        if name is not None:
+            entry = self.inventory and self.inventory.get(name)
+            if entry is None:
+                log(f'config of unknown host "{name}" requested')
+                return self.respond("not found", status=404)
+            args, kwargs = entry
+            log(f'serving config of "{name}"')
+        else:
+            log("serving config")
+
+        # compile with the query parameters the arguments leave to set
+        try:
+            unknown = set(query) - self.accepted(args, kwargs, query)
+            if unknown == set():
+                content = self.cache.get(args, {**kwargs, **query})
+        except Exception as e:
+            error = "".join(traceback.format_exception_only(e)).strip()
+            log(f"compiling config failed: {error}")
+            return self.respond("compilation failed", status=500)
+        if unknown != set():
+            log(f'config with invalid parameter "{min(unknown)}" requested')
+            return self.respond("invalid parameter", status=400)
+        self.respond_config(content)
+
+    def accepted(
+        self, args: tuple, kwargs: dict[str, Any], query: dict[str, str],
+    ) -> set[str]:
+        # find parameters of the main component left for the query to set
+        if query == {} or self.parameters is None:
+            return set()
+        return set(self.parameters(*args, **kwargs))
+
+    def respond_config(self, content: Content):
+        # send compressed body if accepted and nothing if unchanged
+        extra = {'Cache-Control': "no-cache", 'Vary': "Accept-Encoding"}
+        body, extra['ETag'] = content.data, content.etag
+        if content.gzip is not None and \
+                accepts(self.headers.get('Accept-Encoding'), "gzip"):
+            body, extra['ETag'] = content.gzip, content.gzip_etag
+            extra['Content-Encoding'] = "gzip"
+
+        if content.matches(self.headers.get('If-None-Match')):
+            return self.respond_headers(
+                "application/json", 304, length=len(body), extra=extra,
+            )
+        self.respond(body, typ="application/json", extra=extra)
+
     def respond(self, content, **headers):
-        self.respond_headers(**headers)
-        if content is not None:
-            self.respond_body(content)
+        if isinstance(content, str):
+            content = content.encode()
+        self.respond_headers(**headers, length=len(content))
+        self.respond_body(content)
 
-    def respond_headers(self, typ='text/plain', status=200):
+    def respond_headers(
+        self, typ='text/plain', status=200, retry=None, length=None, extra={},
+    ):
         self.send_response(status)
+        for name, value in extra.items():
+            self.send_header(name, value)
+        if retry is not None:
+            self.send_header('Retry-After', str(retry))
+        if length is not None:
+            self.send_header('Content-Length', str(length))
+        # free the worker for waiting connections if the length is unknown
+        if length is None or not self.queue.empty():
+            self.send_header('Connection', "close")
         self.send_header('Content-Type', typ)
         self.end_headers()
 
     def respond_body(self, content):
+        if self.head:
+            return
         if isinstance(content, str):
             content = content.encode()
         self.wfile.write(content)
 
     # disable potentially insecure logging
     def log_message(self, *args: Any, **kwargs: Any): pass
+
+
+# check whether an Accept-Encoding header allows a content coding
+def accepts(header: str | None, coding: str) -> bool:
+    qualities = {}
+    for item in (header or "").split(","):
+        name, _, params = item.partition(";")
+        match = QUALITY_RE.search(params)
+        try:
+            qualities[name.strip().lower()] = float(match[1]) if match else 1
+        except ValueError:
+            continue
+    return qualities.get(coding, qualities.get("*", 0)) > 0
@@ -0,0 +1,198 @@
+from typing import Iterable
+from abc import ABC, abstractmethod
+from pathlib import PosixPath as Path
+from hashlib import md5
+import ctypes
+import struct
+import errno
+import os
+
+from ..compiler.walk import walk, pattern
+
+# patterns of paths ignored by default
+IGNORE = [".git"]
+
+# inotify flags and event masks
+IN_NONBLOCK, IN_CLOEXEC = os.O_NONBLOCK, os.O_CLOEXEC
+IN_MODIFY, IN_ATTRIB, IN_CLOSE_WRITE = 0x2, 0x4, 0x8
+IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE, IN_DELETE = 0x40, 0x80, 0x100, 0x200
+IN_DELETE_SELF, IN_MOVE_SELF = 0x400, 0x800
+IN_Q_OVERFLOW, IN_IGNORED = 0x4000, 0x8000
+IN_ONLYDIR, IN_DONT_FOLLOW, IN_ISDIR = 0x1000000, 0x2000000, 0x40000000
+MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | \
+    IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | \
+    IN_ONLYDIR | IN_DONT_FOLLOW
+EVENT = struct.Struct("iIII")
+
+
+class Watcher(ABC):
+    """Base class for detecting changes in a directory tree.
+
+    :param root: directory to watch
+    :param ignore: glob patterns of paths to ignore as understood by *walk*
+    """
+
+    def __init__(self, root: Path, ignore: Iterable[str] = IGNORE):
+        self.root = root
+        self.ignore = list(ignore)
+
+    @abstractmethod
+    def changed(self) -> bool:
+        """Check whether anything changed since the last call.
+
+        :returns: True on the first call and if anything changed
+        """
+
+    @abstractmethod
+    def close(self):
+        """Release resources held by the watcher."""
+
+    @classmethod
+    def create(cls, root: Path, ignore: Iterable[str] = IGNORE) -> 'Watcher':
+        """Create an inotify based watcher, falling back to polling.
+
+        :param root: directory to watch
+        :param ignore: glob patterns of paths to ignore
+        :returns: watcher for the directory
+        """
+        try:
+            return Inotify(root, ignore)
+        except OSError:
+            return Poll(root, ignore)
+
+
+class Poll(Watcher):
+    """Watcher comparing the stat results of all entries on every check."""
+
+    def __init__(self, root: Path, ignore: Iterable[str] = IGNORE):
+        super().__init__(root, ignore)
+        self.last: bytes | None = None
+
+    def changed(self) -> bool:
+        digest = md5()
+        try:
+            for entry in walk(self.root, [], self.ignore):
+                stat = entry.stat(follow_symlinks=False)
+                digest.update(os.fsencode(entry.path) + (
+                    f"\0{stat.st_mtime_ns},{stat.st_ctime_ns},"
+                    f"{stat.st_size}\0"
+                ).encode())
+        except OSError:
+            # entries changed while walking the tree
+            self.last = None
+            return True
+
+        current = digest.digest()
+        changed, self.last = current != self.last, current
+        return changed
+
+    def close(self):
+        pass  # polling holds no resources
+
+
+class Inotify(Watcher):
+    """Watcher receiving change events from the kernel via inotify.
+
+    Checks only read pending events, which costs the same regardless of the
+    size of the tree. Falls back to polling if watching new directories fails,
+    e.g. when reaching the limit of watches per user.
+
+    :raises OSError: if inotify isn't available or watching fails initially
+    """
+
+    def __init__(self, root: Path, ignore: Iterable[str] = IGNORE):
+        super().__init__(root, ignore)
+        self.patterns = [(pattern(p), "/" in p.strip("/")) for p in ignore]
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        if not hasattr(self.libc, 'inotify_init1'):
+            raise OSError("inotify not available")
+
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs: dict[int, str] = {}
+        self.dirty, self.fallback = True, None
+        try:
+            self.add(os.fspath(root))
+        except OSError:
+            self.close()
+            raise
+
+    def changed(self) -> bool:
+        if self.fallback is not None:
+            return self.fallback.changed()
+
+        try:
+            while True:
+                try:
+                    data = os.read(self.fd, 64 * 1024)
+                except BlockingIOError:
+                    break
+                self.process(data)
+        except OSError:
+            self.close()
+            self.fallback = Poll(self.root, self.ignore)
+            self.fallback.changed()
+            return True
+
+        dirty, self.dirty = self.dirty, False
+        return dirty
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+    # add watches for directory and the directories inside it
+    def add(self, path: str):
+        stack = [path]
+        while stack != []:
+            path = stack.pop()
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                if error in (errno.ENOENT, errno.ENOTDIR):
+                    continue
+                raise OSError(error, os.strerror(error), path)
+            self.dirs[wd] = path
+
+            try:
+                with os.scandir(path) as entries:
+                    stack.extend(
+                        e.path for e in entries
+                        if e.is_dir(follow_symlinks=False)
+                        and not self.ignored(e.path, e.name)
+                    )
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                pass
+
+    # handle events read from inotify file descriptor
+    def process(self, data: bytes):
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT.unpack_from(data, offset)
+            offset += EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+            if mask & IN_Q_OVERFLOW:
+                self.dirty = True
+            if wd not in self.dirs:
+                continue
+
+            path = os.path.join(self.dirs[wd], name)
+            if name != "" and self.ignored(path, name):
+                continue
+            self.dirty = True
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self.add(path)
+
+    # check whether path matches any of the ignore patterns
+    def ignored(self, path: str, name: str) -> bool:
+        relative = os.path.relpath(path, self.root)
+        return any(
+            pattern.fullmatch(relative if nested else name)
+            for pattern, nested in self.patterns
+        )
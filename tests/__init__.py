@@ -0,0 +1,14 @@
+from pathlib import PosixPath as Path
+from tempfile import mkdtemp
+import atexit
+import shutil
+
+from pyromaniac import paths
+
+# keep the caches written by the tests out of the persistent cache directory
+paths.cache = Path(mkdtemp(prefix="pyromaniac-cache-"))
+paths.images = paths.cache / "images"
+paths.isos = paths.cache / "isos"
+paths.components = paths.cache / "components"
+paths.translations = paths.cache / "butane"
+atexit.register(shutil.rmtree, paths.cache, True)
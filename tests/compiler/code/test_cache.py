@@ -0,0 +1,55 @@
+from unittest import TestCase
+from unittest.mock import patch, Mock
+from pathlib import PosixPath as Path
+from pyromaniac.compiler.code import cache
+from pyromaniac.compiler.code.parse import parse
+
+from ...temp import dir
+
+SOURCE = '"doc"\n(name: str)\n---\nx = name * 2\n---\nfoo: `x`\n'
+
+
+class TestCache(TestCase):
+    @dir
+    def test_store(self, tmp: Path):
+        with patch('pyromaniac.paths.components', tmp):
+            self.assertIsNone(cache.load(SOURCE))
+            parse(SOURCE)
+            self.assertEqual(len(list(tmp.iterdir())), 1)
+            doc, sig, python, yaml = cache.load(SOURCE)
+            self.assertEqual(doc, "doc")
+            self.assertIsNone(cache.load(SOURCE + "\n"))
+
+    @dir
+    def test_load(self, tmp: Path):
+        with patch('pyromaniac.paths.components', tmp):
+            parse(SOURCE)
+            with patch(
+                'pyromaniac.compiler.code.parse.segment', Mock(side_effect=[]),
+            ):
+                doc, sig, python, yaml = parse(SOURCE)
+        ctx = sig.parse("bar")
+        python.execute(ctx)
+        self.assertEqual(yaml.execute(ctx), {"foo": "barbar"})
+
+    @dir
+    def test_corrupt(self, tmp: Path):
+        with patch('pyromaniac.paths.components', tmp):
+            parse(SOURCE)
+            for file in tmp.iterdir():
+                file.write_bytes(b"corrupt")
+            self.assertIsNone(cache.load(SOURCE))
+            self.assertEqual(parse(SOURCE)[0], "doc")
+
+    @dir
+    def test_modules(self, tmp: Path):
+        with patch('pyromaniac.paths.components', tmp):
+            parse(SOURCE)
+            self.assertIsNotNone(cache.load(SOURCE))
+            with patch.object(cache, 'modules', Mock(return_value="")):
+                self.assertIsNone(cache.load(SOURCE))
+
+    def test_unwritable(self):
+        path = Path("/dev/null/components")
+        with patch('pyromaniac.paths.components', path):
+            self.assertEqual(parse(SOURCE)[0], "doc")
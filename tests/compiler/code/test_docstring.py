@@ -1,6 +1,6 @@
 from unittest import TestCase
 from pyromaniac.compiler.code.errors import InvalidDocstringError
-from pyromaniac.compiler.code.docstring import parse
+from pyromaniac.compiler.code.docstring import parse, pure
 
 
 class TestDocstring(TestCase):
@@ -30,6 +30,12 @@ class TestDocstring(TestCase):
         self.assertRaisesInvalidDocstring('b"bar qux"')
         self.assertRaisesInvalidDocstring('f"bar qux"')
 
+    def test_pure(self):
+        self.assertTrue(pure("Foo.\n\n:pure:\n"))
+        self.assertTrue(pure("  :pure:  "))
+        self.assertFalse(pure("Foo is :pure:."))
+        self.assertFalse(pure(None))
+
     def assertRaisesInvalidDocstring(self, code: str):
         with self.assertRaises(InvalidDocstringError):
             parse(code)
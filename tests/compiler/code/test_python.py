@@ -3,6 +3,7 @@ from pyromaniac.compiler.code.errors import (
     PythonSyntaxError, PythonRuntimeError
 )
 from pyromaniac.compiler.code.python import Python
+from pyromaniac.compiler.context import Namespace
 
 
 def execute(
@@ -37,6 +38,14 @@ class TestPython(TestCase):
         self.assertRaisesPythonRuntime("42 + '69'")
         self.assertRaisesPythonRuntime("raise ValueError()")
 
+    def test_namespace(self):
+        names = Namespace({"a": 42})
+        ctx = execute("b = a + len([1, 2])", {"__builtins__": names})
+        self.assertEqual(ctx["b"], 44)
+        self.assertIs(ctx["__builtins__"], names)
+        self.assertNotIn("len", names)
+        self.assertRaisesPythonRuntime("c", {"__builtins__": names})
+
     def test_error_pass_through(self):
         rte = PythonRuntimeError()
         raised = self.assertRaisesPythonRuntime("raise e", {"e": rte})
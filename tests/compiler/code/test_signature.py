@@ -33,6 +33,15 @@ class TestSignature(TestCase):
         with self.assertRaises(InvalidArgumentError):
             sig.parse("bar", 42)
 
+    def test_unbound(self):
+        sig = Signature.create("a, /, b, *args, c: int = 1, **kwargs")
+        self.assertEqual(sig.unbound(), ["b", "c"])
+        self.assertEqual(sig.unbound(1, 2), ["c"])
+        self.assertEqual(sig.unbound(1, c=2, d=3), ["b"])
+        self.assertEqual(Signature.default().unbound(), [])
+        with self.assertRaises(InvalidArgumentError):
+            sig.unbound(1, 2, b=3)
+
     def test_default(self):
         sig = Signature.create("foo: str = 'bar'")
         self.assertEqual(sig.parse(), {"foo": "bar"})
@@ -5,6 +5,8 @@ from pyromaniac.compiler.code.errors import (
     YamlTemplateError, YamlExecutionError, YamlParseError,
 )
 from pyromaniac.compiler.code.yaml import Yaml
+from pyromaniac.compiler.code.jinja import pyro_env as environment
+from pyromaniac.compiler.context import Namespace
 
 
 def execute(code: str, context: dict | None = None) -> dict:
@@ -22,6 +24,11 @@ class TestYaml(TestCase):
             {"r": 42 + 69},
         )
 
+    def test_namespace(self):
+        ctx = {"a": 42, "__builtins__": Namespace({"a": 0, "b": 69})}
+        self.assertEqual(execute("r: `a + b`", ctx), {"r": 42 + 69})
+        self.assertEqual(execute("`len is defined`", ctx), False)
+
     def test_raw_filter(self):
         self.assertEqual(
             execute("foo-`var | raw`", {"var": "bar"}),
@@ -46,6 +53,71 @@ class TestYaml(TestCase):
             {"foo": "/foo/bar", "bar": "https://example.com/"},
         )
 
+    def test_splice(self):
+        content = "foo\n" * 1000
+        result = execute("foo: `content`\nbar: [`content`]", locals())
+        self.assertIs(result["foo"], content)
+        self.assertIs(result["bar"][0], content)
+
+        value = {"foo": (42, 1e20, 0.5, Path("/foo")), 42: "😀", "bar": "😀"}
+        self.assertEqual(execute("- `value`", locals()), [{
+            "foo": [42, "1e+20", 0.5, "/foo"], "42": "😀", "bar": "😀",
+        }])
+
+    def test_splice_fallback(self):
+        ctx = {"foo": "bar", "baz": {"qux": 42}, "num": 42}
+        self.assertEqual(execute("foo: '`foo`'\nbar: `foo`", ctx), {
+            "foo": '"bar"', "bar": "bar",
+        })
+        self.assertEqual(execute("foo: `foo`\n# `baz`", ctx), {"foo": "bar"})
+        self.assertEqual(execute("foo:\n  <<: `baz`", ctx), {
+            "foo": {"qux": 42},
+        })
+        self.assertEqual(execute("foo: !!str `num`", ctx), {"foo": "42"})
+        self.assertRaisesYamlParse("foo: `foo`\n  `foo`: `foo`", ctx)
+
+    def test_splice_captured(self):
+        ctx = {"x": "bar"}
+        for code, result in [
+            ("{% macro m(x) %}`x`{% endmacro %}foo: `m(x)`", '"bar"'),
+            ("{% macro m(x) %}`x`{% endmacro %}foo: `m(x) | upper`", '"BAR"'),
+            ("{% set s %}`x`{% endset %}foo: `s`", '"bar"'),
+            ("{% set s %}`x`{% endset %}foo: `s | length`", 5),
+            ("foo: {% filter upper %}`x`{% endfilter %}", "BAR"),
+            ("foo: `x | upper`", "BAR"),
+            ("{% macro m() %}a-`caller()`{% endmacro %}"
+             "foo: {% call m() %}`x`{% endcall %}", 'a-"\\"bar\\""'),
+            ("x: {% block b %}`x`{% endblock %}\nfoo: `self.b() | upper`",
+             '"BAR"'),
+        ]:
+            with self.subTest(code=code):
+                self.assertEqual(execute(code, ctx)["foo"], result)
+
+        calls = []
+        ctx = {"x": lambda: calls.append(None) or "bar"}
+        code = "a: {% block b %}`x()`{% endblock %}\nc: `self.b()|upper|raw`"
+        self.assertEqual(execute(code, ctx), {"a": "bar", "c": "BAR"})
+        self.assertEqual(len(calls), 2)
+
+    def test_splice_generator(self):
+        source = environment.compile(
+            "{% macro m() %}`x`{% endmacro %}{% block b %}`x`{% endblock %}"
+            "{% set s %}`x`{% endset %}`x`", raw=True,
+        )
+        self.assertEqual(source.count("environment.buffer_finalize("), 3)
+        self.assertEqual(source.count("environment.finalize("), 1)
+
+    def test_stream(self):
+        code = "{% for i in range(n) %}\n- foo-`i | raw`: `i`{% endfor %}"
+        self.assertEqual(
+            execute(code, {"n": 30000}),
+            [{f"foo-{i}": i} for i in range(30000)],
+        )
+        self.assertEqual(
+            execute(code + "\n- '`n`'", {"n": 30000})[-1],
+            "30000",
+        )
+
     def test_template_error(self):
         self.assertRaisesYamlTemplate("foo: `")
         self.assertRaisesYamlTemplate("`||`")
@@ -62,6 +134,11 @@ class TestYaml(TestCase):
         raised = self.assertRaisesYamlExecution("`'foo' + 42`")
         self.assertIsInstance(raised.__cause__, TypeError)
 
+        raised = self.assertRaisesYamlExecution("foo: bar: baz\n`f()`", {
+            "f": f,
+        })
+        self.assertIs(raised.__cause__, err)
+
     def test_parse_error(self):
         self.assertRaisesYamlParse("foo: bar: `'baz'`")
         self.assertRaisesYamlParse("qux: '")
@@ -33,6 +33,21 @@ class TestCompiler(TestCase):
         self.assertEqual(file['path'], "/baz")
         self.assertIn("default", json.dumps(file['contents']))
 
+    def test_dependencies(self):
+        self.compile("dependencies", args=[Path("/foo")])
+        self.assertEqual(self.compiler.dependencies, {
+            Path("/foo"), self.comps / "minimal.pyro",
+        })
+
+        self.compile("minimal")
+        self.assertEqual(self.compiler.dependencies, set())
+
+    def test_global_cleared(self):
+        for role in ["web", "db"]:
+            args = {"kwargs": {"role": role}}
+            file = self.compile("global_state", **args)['storage']['files'][0]
+            self.assertEqual(file['contents']['source'], f"data:,{role}")
+
     def test_not_a_dict_error(self):
         with self.assertRaises(NotADictError) as e:
             self.compile("returns_string")
@@ -3,10 +3,13 @@ from unittest.mock import patch, Mock
 from collections.abc import Iterable
 from pathlib import PosixPath as Path
 from itertools import chain
+import os
 from pyromaniac.compiler.errors import NonExistentPathError, NotAComponentError
 from pyromaniac.compiler.library import Library, View
 from pyromaniac.compiler.component import Component
 
+from ... import temp
+
 
 def glob(path: Path, *patterns: str) -> Iterable[str]:
     return chain(*(path.glob(p) for p in patterns))
@@ -53,6 +56,11 @@ class TestLibrary(TestCase):
         self.assertIs(comp, self.lib.get_component('dir1.dir11.comp111'))
         self.assertNotEqual(comp, self.lib.get_component('dir1.dir11.main'))
 
+    def test_precompile(self):
+        self.assertEqual(self.lib.precompile(), 4)
+        self.assertIn('dir1.dir11.main', self.lib.cache)
+        self.assertNotIn('0comp', self.lib.cache)
+
     def test_getitem(self):
         self.assertIsInstance(self.lib[""], View)
         self.assertIsInstance(self.lib["dir1.dir11.comp111"], View)
@@ -87,6 +95,51 @@ class TestLibrary(TestCase):
     def test_unpack(self):
         self.assertEqual(set({**self.lib}.keys()), {"comp1", "dir1", "merge"})
 
+    @patch('os.scandir', wraps=os.scandir)
+    def test_index(self, scandir: Mock):
+        for _ in range(3):
+            self.lib.resolve("dir1.dir11.comp111")
+            self.assertIn("dir1.dir11", self.lib)
+            set(self.lib.keys())
+        scanned = [c.args[0] for c in scandir.call_args_list]
+        self.assertEqual(len(scanned), len(set(scanned)))
+
+    @temp.dir
+    def test_invalidate(self, root: Path):
+        lib = Library(root, [self.stdlib])
+        self.assertNotIn("foo", lib)
+        self.assertNotIn("foo", lib.namespace)
+        root.joinpath("foo.pyro").write_text("{}")
+        self.assertNotIn("foo", lib)
+        lib.invalidate()
+        self.assertIn("foo", lib)
+        self.assertIn("foo", lib.namespace)
+        self.assertEqual(lib.resolve("foo"), (lib, "foo"))
+
+    @temp.dir
+    def test_refresh(self, root: Path):
+        root.joinpath("foo.pyro").write_text("{}")
+        root.joinpath("bar.pyro").write_text("{}")
+        lib = Library(root, [self.stdlib])
+        foo, bar = lib.get_component("foo"), lib.get_component("bar")
+        self.assertFalse(lib.refresh())
+        self.assertIs(lib.get_component("foo"), foo)
+
+        root.joinpath("foo.pyro").write_text("{'foo': 42}")
+        self.assertTrue(lib.refresh())
+        self.assertIsNot(lib.get_component("foo"), foo)
+        self.assertIs(lib.get_component("bar"), bar)
+
+        self.assertNotIn("baz", lib.namespace)
+        root.joinpath("baz.pyro").write_text("{}")
+        self.assertTrue(lib.refresh())
+        self.assertIn("baz", lib)
+        self.assertIn("baz", lib.namespace)
+
+        root.joinpath("baz.pyro").unlink()
+        self.assertTrue(lib.refresh())
+        self.assertNotIn("baz", lib)
+
     def assertResolvesTo(
         self, name: str, expected: str | None, lib: Library | None = None
     ):
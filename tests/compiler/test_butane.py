@@ -1,10 +1,13 @@
 from unittest import TestCase
 from unittest.mock import patch, Mock
 from pathlib import PosixPath as Path
+from contextlib import chdir
 import json
 
 from pyromaniac.compiler.errors import ButaneError, NotADictError
-from pyromaniac.compiler.butane import butane, configure
+from pyromaniac.compiler.butane import butane, run, configure
+from pyromaniac.compiler.expand import expand
+from .. import temp
 
 
 @patch('sys.stderr', Mock())
@@ -33,3 +36,60 @@ class TestButane(TestCase):
     def test_not_a_dict_error(self):
         with self.assertRaises(NotADictError):
             butane([])
+
+
+@patch('sys.stderr', Mock())
+@patch('pyromaniac.compiler.butane.version', Mock(return_value="1.0"))
+class TestCache(TestCase):
+    @temp.dir
+    @patch('subprocess.run')
+    def test_cache(self, tmp: Path, subprocess: Mock):
+        subprocess.return_value = Mock(
+            returncode=0, stdout="{}\n", stderr="warning at $.foo: bar",
+        )
+        tmp.joinpath("foo.txt").write_text("foo")
+        config = {'contents': {'local': Path("foo.txt")}}
+        with patch('pyromaniac.paths.translations', tmp / "cache"), \
+                chdir(tmp):
+            for _ in range(2):
+                self.assertEqual(run(config), "{}")
+            self.assertEqual(subprocess.call_count, 1)
+
+            configure(["--pretty"])
+            try:
+                run(config)
+            finally:
+                configure([])
+            tmp.joinpath("foo.txt").write_text("bar")
+            run(config)
+            self.assertEqual(subprocess.call_count, 3)
+
+            run({'contents': {'local': "missing.txt"}})
+            run({'contents': {'local': "missing.txt"}})
+            self.assertEqual(subprocess.call_count, 5)
+
+    @temp.dir
+    @patch('subprocess.run')
+    def test_expanded(self, tmp: Path, subprocess: Mock):
+        subprocess.return_value = Mock(returncode=0, stdout="{}", stderr="")
+        with patch('pyromaniac.paths.translations', tmp):
+            run(expand({'storage.files[0].path': "/foo"}))
+        self.assertEqual(
+            subprocess.call_args.kwargs['input'],
+            "storage:\n  files:\n  - path: /foo\n",
+        )
+
+    @temp.dir
+    @patch('subprocess.run')
+    def test_format(self, tmp: Path, subprocess: Mock):
+        subprocess.return_value = Mock(returncode=0, stdout="{}", stderr="")
+        with patch('pyromaniac.paths.translations', tmp):
+            configure([], 'json')
+            try:
+                run({'storage': {'files': [{'path': Path("/foo")}]}})
+            finally:
+                configure([])
+        self.assertEqual(
+            json.loads(subprocess.call_args.kwargs['input']),
+            {'storage': {'files': [{'path': "/foo"}]}},
+        )
@@ -0,0 +1,89 @@
+from unittest import TestCase
+from unittest.mock import patch, Mock
+from pathlib import PosixPath as Path
+from contextlib import chdir
+from random import Random
+import base64
+import json
+
+from pyromaniac.compiler.compress import compress
+from pyromaniac.compiler.butane import butane, configure, saved, report
+from pyromaniac.compiler.translate import translate
+from .test_translate import normalize
+from .. import temp
+
+
+def files(*contents: dict) -> dict:
+    return {'variant': "fcos", 'version': "1.5.0", 'storage': {'files': [
+        {'path': f"/file{i}", 'mode': 0o644, 'contents': c}
+        for i, c in enumerate(contents)
+    ]}}
+
+
+class TestCompress(TestCase):
+    def test_compress(self):
+        text = "foo bar baz\n" * 1000
+        source = files({'inline': text}, {'inline': "small"})
+        result, saved = compress(source, 1024)
+        self.assertEqual(source['storage']['files'][0]['contents'], {
+            'inline': text,
+        })
+        self.assertEqual(result['storage']['files'][1]['contents'], {
+            'inline': "small",
+        })
+        contents = result['storage']['files'][0]['contents']
+        self.assertEqual(contents['compression'], "gzip")
+        self.assertGreater(saved, len(text) * 0.9)
+        self.assertEqual(normalize(contents), {
+            'source': text.encode(), 'compression': None,
+        })
+        self.assertEqual(translate(result), translate(source))
+
+    @temp.file("random.bin", Random(42).randbytes(4096))
+    def test_incompressible(self, path: Path):
+        with chdir(path.parent):
+            result, saved = compress(files({'local': path.name}), 1024)
+        data = base64.b64encode(path.read_bytes()).decode()
+        self.assertEqual(saved, 0)
+        self.assertEqual(result['storage']['files'][0]['contents'], {
+            'source': "data:;base64," + data, 'compression': "",
+        })
+
+    @temp.dir
+    def test_local(self, tmp: Path):
+        tmp.joinpath("foo.txt").write_text("foo\n" * 1000)
+        source = files(
+            {'local': Path("foo.txt")}, {'local': "missing.txt"},
+            {'local': "foo.txt", 'verification': {}},
+        )
+        with chdir(tmp):
+            result, saved = compress(source, 1024)
+        contents = [f['contents'] for f in result['storage']['files']]
+        self.assertEqual(normalize(contents[0]), {
+            'source': b"foo\n" * 1000, 'compression': None,
+        })
+        self.assertEqual(contents[1:], [
+            {'local': "missing.txt"}, {'local': "foo.txt", 'verification': {}},
+        ])
+
+    @patch('sys.stderr')
+    def test_butane(self, stderr: Mock):
+        source = files({'inline': "foo\n" * 1000})
+        reset = saved.set(0)
+        try:
+            configure([], compression=1024)
+            output = butane(source)
+            count = saved.get()
+            butane(source)
+            self.assertEqual(saved.get(), 2 * count)
+        finally:
+            configure([])
+            saved.reset(reset)
+        self.assertEqual(json.loads(output), translate(source))
+        self.assertGreater(count, 0)
+        stderr.write.assert_not_called()
+
+        report(count)
+        self.assertIn(f"saved {count} bytes", "".join(
+            call.args[0] for call in stderr.write.call_args_list
+        ))
@@ -0,0 +1,64 @@
+from unittest import TestCase
+from contextlib import chdir
+from pathlib import PosixPath as Path
+from pyromaniac.compiler.depend import Dependencies, depend, depfile
+from pyromaniac.compiler.library import Library
+from pyromaniac.compiler.butane import butane
+from pyromaniac.compiler.walk import walk
+from .. import temp
+
+COMPONENT = '''
+""":pure:"""
+(path: Path)
+---
+depend(path)
+path.name
+'''
+
+
+class TestDepend(TestCase):
+    def test_nested(self):
+        depend("/ignored")
+        with Dependencies().active() as outer:
+            depend("foo")
+            with Dependencies().active() as inner:
+                depend("./bar", Path("baz"))
+            depend("qux")
+        self.assertEqual(
+            outer.paths, {Path(p) for p in ["foo", "bar", "baz", "qux"]},
+        )
+        self.assertEqual(inner.paths, {Path("bar"), Path("baz")})
+
+    def test_depfile(self):
+        paths = [Path("b.pyro"), Path("/a b/$c#.yml")]
+        self.assertEqual(
+            depfile("out dir/host.ign", paths),
+            "out\\ dir/host.ign: \\\n  /a\\ b/$$c\\#.yml \\\n  b.pyro\n",
+        )
+        self.assertEqual(depfile("host.ign", []), "host.ign:\n")
+
+    @temp.dir
+    def test_library(self, root: Path):
+        root.joinpath("comp.pyro").write_text(COMPONENT)
+        lib = Library(root)
+        for _ in range(2):
+            with Dependencies().active() as deps:
+                self.assertEqual(lib.execute("comp", (Path("/foo"),)), "foo")
+            self.assertEqual(deps.paths, {root / "comp.pyro", Path("/foo")})
+        self.assertEqual(lib.memo.hits, 1)
+
+    @temp.dir
+    def test_butane(self, root: Path):
+        root.joinpath("file.txt").write_text("foo")
+        root.joinpath("dir").mkdir()
+        with chdir(root), Dependencies().active() as deps:
+            butane({
+                'variant': "fcos", 'version': "1.5.0", 'storage': {'files': [
+                    {'path': "/foo", 'mode': 0o644,
+                     'contents': {'local': "./file.txt"}},
+                ]},
+            })
+            walk(root)
+        self.assertEqual(
+            deps.paths, {Path("file.txt"), root, root / "dir"},
+        )
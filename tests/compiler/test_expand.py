@@ -2,6 +2,7 @@ from typing import Any
 from collections.abc import Iterable
 from unittest import TestCase
 from contextlib import contextmanager
+import yaml
 
 from pyromaniac.compiler.expand.errors import (
     KeyExpandError, DuplicateKeyError, MixedKeysError, MissingIndexError,
@@ -60,6 +61,13 @@ class TestExpand(TestCase):
             "foo": "bar",
         })
 
+    def test_clean_before_descending(self):
+        self.assertEqual(expand({"_foo": {42: "invalid"}, "bar": 1}, True), {
+            "bar": 1,
+        })
+        with self.assertRaises(AttributeError):
+            expand({"_foo": {42: "invalid"}})
+
     def test_fcos(self):
         self.assertTrue(changed({"foo": "bar"}, False, True))
         self.assertTrue(changed({"foo": "bar", "variant": "foo"}, False, True))
@@ -67,6 +75,42 @@ class TestExpand(TestCase):
             "foo": "bar", "variant": "foo", "version": "bar"
         }, False, True))
 
+    def test_expanded(self):
+        files = expand({"files[0].path": "/foo", "files[1].path": "/bar"})
+        self.assertIs(type(files), dict)
+        storage = expand({"storage": files})["storage"]
+        self.assertEqual(storage, files)
+        self.assertIsNot(storage, files)
+        self.assertIsNot(storage["files"][0], files["files"][0])
+        self.assertIsNot(expand(files), files)
+        self.assertEqual(expand({
+            "storage": files, "storage.files[1].mode": 420,
+        }), {
+            "storage": {"files": [{"path": "/foo"}, {
+                "mode": 420, "path": "/bar",
+            }]},
+        })
+        with self.assertKeyExpandError(DuplicateKeyError, "foo.files[0].path"):
+            expand({"foo": files, "foo.files[0].path": "/baz"})
+
+    def test_expanded_modified(self):
+        config = expand({"foo": {"bar": 42}, "_baz": 69})
+        self.assertEqual(expand({"config": config}, True), {
+            "config": {"foo": {"bar": 42}},
+        })
+        config["qux.quux"] = True
+        config["foo"]["corge[0]"] = False
+        self.assertEqual(expand(config), {
+            "_baz": 69, "foo": {"bar": 42, "corge": [False]},
+            "qux": {"quux": True},
+        })
+        self.assertIn("qux.quux", config)
+
+    def test_expanded_yaml(self):
+        config = expand({"foo.bar": 42, "baz": [{"qux.quux": True}]})
+        code = "baz:\n- qux:\n    quux: true\nfoo:\n  bar: 42\n"
+        self.assertEqual(yaml.safe_dump(config), code)
+
     def test_duplicate(self):
         with self.assertKeyExpandError(DuplicateKeyError, "foo"):
             expand({"foo": {}, "foo.bar": True})
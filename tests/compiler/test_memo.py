@@ -0,0 +1,72 @@
+from unittest import TestCase
+from unittest.mock import patch, Mock
+from pathlib import Path
+from pyromaniac.compiler.url import URL
+from pyromaniac.compiler.memo import Memo
+from pyromaniac.compiler.component import Component
+from pyromaniac.compiler.library import Library
+from .. import temp
+
+COMPONENT = '''
+""":pure:"""
+(*args, **kwargs)
+---
+{'args': args, 'kwargs': kwargs}
+'''
+
+
+class TestMemo(TestCase):
+    def test_key(self):
+        key = Memo.key("foo", {'a': [1, {'b': {2}}], 'c': URL("x")})
+        self.assertEqual(
+            key, Memo.key("foo", {'a': [1, {'b': {2}}], 'c': URL("x")}),
+        )
+        self.assertNotEqual(key, Memo.key("bar", {'a': [1, {'b': {2}}]}))
+        for a, b in [(1, True), ([1], (1,)), ({1}, frozenset({1}))]:
+            self.assertNotEqual(
+                Memo.key("foo", {'a': a}), Memo.key("foo", {'a': b}),
+            )
+        self.assertIsNone(Memo.key("foo", {'a': bytearray()}))
+
+    def test_get_put(self):
+        memo = Memo()
+        self.assertEqual(memo.get("foo"), (False, None))
+        result = {'a': [1]}
+        memo.put("foo", result)
+        result['a'].append(2)
+        found, cached = memo.get("foo")
+        self.assertEqual((found, cached), (True, {'a': [1]}))
+        cached['a'].append(3)
+        self.assertEqual(memo.get("foo"), (True, {'a': [1]}))
+        self.assertEqual((memo.hits, memo.misses), (2, 1))
+
+    def test_bounded(self):
+        memo = Memo(2)
+        memo.put("a", 1)
+        memo.put("b", 2)
+        memo.get("a")
+        memo.put("c", 3)
+        self.assertEqual(list(memo.results), ["a", "c"])
+        memo.clear()
+        self.assertEqual(len(memo.results), 0)
+        self.assertEqual((memo.hits, memo.misses), (0, 0))
+
+    @temp.dir
+    @patch.object(Component, 'run', autospec=True, side_effect=Component.run)
+    def test_library(self, root: Path, run: Mock):
+        root.joinpath("pure.pyro").write_text(COMPONENT)
+        impure = COMPONENT.replace(":pure:", "")
+        root.joinpath("impure.pyro").write_text(impure)
+        lib = Library(root)
+
+        for name, calls in [("pure", 1), ("impure", 2)]:
+            run.reset_mock()
+            first = lib.execute(name, (1,), {'a': [2]})
+            first['kwargs']['a'].append(3)
+            second = lib.execute(name, (1,), {'a': [2]})
+            self.assertEqual(second, {'args': [1], 'kwargs': {'a': [2]}})
+            self.assertEqual(run.call_count, calls)
+        self.assertEqual((lib.memo.hits, lib.memo.misses), (1, 1))
+
+        lib.execute("pure", (bytearray(),))
+        self.assertEqual((lib.memo.hits, lib.memo.misses), (1, 1))
@@ -0,0 +1,53 @@
+from unittest import TestCase
+from pathlib import PosixPath as Path
+import yaml
+
+from pyromaniac.compiler.errors import SerializationError
+from pyromaniac.compiler.expand import expand
+from pyromaniac.compiler.url import URL
+from pyromaniac.compiler.serialize import load, dump
+
+CONFIG = {
+    'variant': "fcos",
+    'storage': {'files': [{
+        'path': Path("/foo.txt"),
+        'contents': {'source': URL("https://example.com/foo.txt")},
+        'mode': 0o644,
+    }]},
+    'ignition': {'config': {'merge': ({'inline': "bär\n"},)}},
+}
+
+EXPECTED = {
+    'variant': "fcos",
+    'storage': {'files': [{
+        'path': "/foo.txt",
+        'contents': {'source': "https://example.com/foo.txt"},
+        'mode': 0o644,
+    }]},
+    'ignition': {'config': {'merge': [{'inline': "bär\n"}]}},
+}
+
+
+class TestSerialize(TestCase):
+    def test_load(self):
+        self.assertEqual(load("foo: [42, bar]"), {'foo': [42, "bar"]})
+        with self.assertRaises(yaml.MarkedYAMLError):
+            load("foo: [")
+        with self.assertRaises(yaml.YAMLError):
+            load("!!python/name:os.system")
+
+    def test_dump(self):
+        for format in ['yaml', 'json']:
+            self.assertEqual(yaml.safe_load(dump(CONFIG, format)), EXPECTED)
+        self.assertEqual(dump(expand({'foo.bar': 42})), "foo:\n  bar: 42\n")
+        self.assertGreater(len(dump(CONFIG, 'json').splitlines()), 1)
+        with self.assertRaises(ValueError):
+            dump(CONFIG, 'toml')
+
+    def test_unsupported(self):
+        for format in ['yaml', 'json']:
+            with self.assertRaises(SerializationError):
+                dump({'foo': object()}, format)
+        for value in [{'foo': {42}}, {'foo': float('nan')}, {(4, 2): 42}]:
+            with self.assertRaises(SerializationError):
+                dump(value, 'json')
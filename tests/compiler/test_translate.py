@@ -0,0 +1,250 @@
+from unittest import TestCase, skipUnless
+from unittest.mock import patch, Mock
+from pathlib import PosixPath as Path
+from urllib.parse import unquote_to_bytes
+from contextlib import chdir
+import base64
+import gzip
+import json
+
+from pyromaniac import paths
+from pyromaniac.compiler.url import URL
+from pyromaniac.compiler.expand import expand
+from pyromaniac.compiler.butane import butane, run, configure
+from pyromaniac.compiler.translate import (
+    translate, dump, data_url, Unsupported,
+)
+from .. import temp
+
+UNIT = "[Unit]\nDescription=Foo\n\n[Install]\nWantedBy=multi-user.target\n"
+
+# configs the translator supports for comparing against butane
+CONFIGS = [
+    {},
+    {'storage.files[0]': {
+        'path': Path("/foo.txt"), 'mode': 0o644,
+        'contents': {'inline': "foo <bar> & baz\n"},
+        'user': {'name': "core"}, 'group': {'id': 1000},
+    }},
+    {'storage.files[0]': {
+        'path': "/big.txt", 'mode': 0o600, 'overwrite': True,
+        'contents': {'inline': "big\n" * 1000},
+    }},
+    {'storage.files[0]': {
+        'path': "/remote.txt", 'mode': 0o644,
+        'contents': {
+            'source': URL("https://example.com/remote.txt"),
+            'http_headers': [{'name': "Accept", 'value': "text/plain"}],
+        },
+        'append': [{'inline': "appended"}],
+    }},
+    {'storage': {
+        'directories': [{'path': "/dir", 'mode': 0o755}],
+        'links': [{'path': "/dir/link", 'target': "../foo", 'hard': False}],
+    }},
+    {'systemd.units': [
+        {'name': "foo.service", 'enabled': True, 'contents': UNIT},
+        {'name': "bar.service", 'dropins': [
+            {'name': "override.conf", 'contents': "[Service]\nUser=core\n"},
+        ]},
+        {'name': "baz.service", 'mask': True},
+    ]},
+    {'passwd.users[0]': {
+        'name': "core", 'groups': ["wheel"], 'uid': 1000,
+        'ssh_authorized_keys': ["ssh-ed25519 AAAA foo@bar"],
+    }},
+    {'storage.files[0]': {
+        'path': "/data.txt", 'mode': 0o644,
+        'contents': {
+            'source': "data:;base64,H4sIAAAAAAACA0vLz+cCAKhlMn4EAAAA",
+            'compression': "gzip",
+        },
+    }},
+    {'ignition.config.merge': [
+        {'inline': '{"ignition": {"version": "3.4.0"}}'},
+        {'source': "https://example.com/config.ign"},
+    ]},
+]
+
+
+def config(value: dict) -> dict:
+    return expand(value, True, True)
+
+
+# normalize ignition config for comparison by decoding data URLs
+def normalize(value: object) -> object:
+    match value:
+        case {'source': str(source), **rest} if source.startswith("data:"):
+            meta, data = source[len("data:"):].split(",", 1)
+            if meta.endswith(";base64"):
+                data = base64.b64decode(data)
+            else:
+                data = unquote_to_bytes(data)
+            if rest.get('compression') == "gzip":
+                data = gzip.decompress(data)
+            rest = {k: normalize(v) for k, v in rest.items()}
+            return {**rest, 'source': data, 'compression': None}
+        case dict():
+            return {k: normalize(v) for k, v in value.items()}
+        case list():
+            return [normalize(v) for v in value]
+        case _:
+            return value
+
+
+class TestTranslate(TestCase):
+    def test_minimal(self):
+        self.assertEqual(
+            translate(config({})), {'ignition': {'version': "3.4.0"}},
+        )
+
+    def test_file(self):
+        self.assertEqual(translate(config(CONFIGS[1]))['storage'], {
+            'files': [{
+                'group': {'id': 1000}, 'path': "/foo.txt",
+                'user': {'name': "core"},
+                'contents': {
+                    'compression': "",
+                    'source': "data:,foo%20%3Cbar%3E%20&%20baz%0A",
+                },
+                'mode': 0o644,
+            }],
+        })
+
+    def test_remote(self):
+        file = translate(config(CONFIGS[3]))['storage']['files'][0]
+        self.assertEqual(list(file), ['path', 'append', 'contents', 'mode'])
+        self.assertEqual(file['contents'], {
+            'httpHeaders': [{'name': "Accept", 'value': "text/plain"}],
+            'source': "https://example.com/remote.txt",
+        })
+
+    def test_data_source(self):
+        file = translate(config(CONFIGS[7]))['storage']['files'][0]
+        self.assertEqual(normalize(file['contents']), {
+            'source': b"foo\n", 'compression': None,
+        })
+        self.assertEqual(list(file['contents']), ['compression', 'source'])
+        self.assertUnsupported({'storage.files[0]': {
+            'path': "/data.txt", 'contents': {'source': "data:text/plain,a"},
+        }})
+        self.assertUnsupported({'storage.files[0]': {
+            'path': "/data.txt",
+            'contents': {'inline': "foo", 'compression': "gzip"},
+        }})
+
+    def test_units(self):
+        units = translate(config(CONFIGS[5]))['systemd']['units']
+        self.assertEqual(
+            [list(u) for u in units],
+            [['contents', 'enabled', 'name'], ['dropins', 'name'],
+             ['mask', 'name']],
+        )
+
+    def test_users(self):
+        self.assertEqual(translate(config(CONFIGS[6]))['passwd'], {
+            'users': [{
+                'groups': ["wheel"], 'name': "core",
+                'sshAuthorizedKeys': ["ssh-ed25519 AAAA foo@bar"], 'uid': 1000,
+            }],
+        })
+
+    @temp.dir
+    def test_local(self, root: Path):
+        root.joinpath("foo.txt").write_text("foo")
+        value = {'path': "/foo", 'mode': 0o644, 'contents': {'local': "x"}}
+        with chdir(root):
+            for path in ["foo.txt", "/foo.txt", "./bar/../foo.txt"]:
+                value['contents']['local'] = Path(path)
+                file = translate(config({'storage.files[0]': value}))
+                self.assertEqual(
+                    file['storage']['files'][0]['contents']['source'],
+                    "data:,foo",
+                )
+            for path in ["../foo.txt", "missing.txt"]:
+                value['contents']['local'] = path
+                self.assertUnsupported({'storage.files[0]': value})
+
+    def test_unsupported(self):
+        self.assertUnsupported({'variant': "fcos", 'version': "1.4.0"})
+        self.assertUnsupported({'variant': "openshift"})
+        self.assertUnsupported({'foo': "bar"})
+        self.assertUnsupported({'storage.disks[0].device': "/dev/sda"})
+        self.assertUnsupported({'storage.files[0].path': "/no/mode"})
+        self.assertUnsupported({'storage.files[0]': {
+            'path': "relative", 'mode': 0o644,
+        }})
+        self.assertUnsupported({'storage.files[0]': {
+            'path': "/foo", 'mode': 0o644, 'overwrite': True,
+        }})
+        self.assertUnsupported({'storage.files[0]': {
+            'path': "/foo", 'mode': "0644",
+        }})
+        self.assertUnsupported({'storage': {
+            'directories': [{'path': "/foo", 'mode': 0o755}],
+            'links': [{'path': "/foo", 'target': "/bar"}],
+        }})
+        self.assertUnsupported({'storage': {
+            'files': [{'path': "/foo/bar", 'mode': 0o644}],
+            'links': [{'path': "/foo", 'target': "/baz"}],
+        }})
+        self.assertUnsupported({'systemd.units[0]': {
+            'name': "foo.service", 'enabled': True, 'contents': "[Unit]\n",
+        }})
+        self.assertUnsupported({'systemd.units[0]': {
+            'name': "foo.service", 'contents': "invalid",
+        }})
+        self.assertUnsupported({'systemd.units[0].name': "foo.invalid"})
+        self.assertUnsupported({'passwd.users[0]': {
+            'name': "core", 'should_exist': False,
+        }})
+
+    def test_data_url(self):
+        self.assertEqual(data_url(b""), ("data:,", ""))
+        self.assertEqual(data_url(b"a b/c"), ("data:,a%20b/c", ""))
+        self.assertEqual(data_url(b"\0" * 6), ("data:;base64,AAAAAAAA", ""))
+        url, compression = data_url(b"foo" * 1000)
+        self.assertEqual(compression, "gzip")
+        self.assertEqual(normalize({'source': url, 'compression': "gzip"}), {
+            'source': b"foo" * 1000, 'compression': None,
+        })
+
+    def test_dump(self):
+        value = {'a': "< &ü>", 'b': [1, True]}
+        self.assertEqual(
+            dump(value), '{"a":"\\u003c\\u2028\\u0026ü\\u003e","b":[1,true]}',
+        )
+        self.assertEqual(json.loads(dump(value, True)), value)
+        self.assertGreater(len(dump(value, True).splitlines()), 1)
+
+    @patch('subprocess.run', return_value=Mock(returncode=0, stderr=""))
+    def test_butane(self, run: Mock):
+        self.assertEqual(
+            json.loads(butane(config(CONFIGS[1]))),
+            translate(config(CONFIGS[1])),
+        )
+        run.assert_not_called()
+
+        butane(config({'storage.files[0].path': "/no/mode"}))
+        run.assert_called_once()
+        try:
+            configure(["--files-dir", "foo"])
+            butane(config({}))
+        finally:
+            configure([])
+        self.assertEqual(run.call_count, 2)
+
+    def assertUnsupported(self, value: dict):
+        with self.assertRaises(Unsupported):
+            translate(config(value))
+
+
+@skipUnless(paths.butane.exists(), "butane executable not available")
+@patch('sys.stderr', Mock())
+class TestDifferential(TestCase):
+    def test_configs(self):
+        for value in CONFIGS:
+            with self.subTest(value=value):
+                translated = translate(config(value))
+                expected = json.loads(run(config(value)))
+                self.assertEqual(normalize(translated), normalize(expected))
@@ -0,0 +1,59 @@
+from unittest import TestCase
+from pathlib import PosixPath as Path
+
+from pyromaniac.compiler.walk import walk
+from ..temp import dir
+
+
+class TestWalk(TestCase):
+    def setUp(self):
+        self.paths = [
+            "app/main.py", "app/lib/util.py", "app/lib/util.pyc",
+            "build/out.o", ".git/HEAD", "README.md",
+        ]
+
+    def create(self, tmp: Path):
+        for path in self.paths:
+            tmp.joinpath(path).parent.mkdir(parents=True, exist_ok=True)
+            tmp.joinpath(path).touch()
+        tmp.joinpath("link").symlink_to("app")
+
+    def names(self, tmp: Path, *args, **kwargs) -> list[str]:
+        entries = walk(tmp, *args, **kwargs)
+        return [str(Path(e).relative_to(tmp)) for e in entries]
+
+    @dir
+    def test_order(self, tmp: Path):
+        self.create(tmp)
+        expected = [
+            ".git", ".git/HEAD", "README.md", "app", "app/lib",
+            "app/lib/util.py", "app/lib/util.pyc", "app/main.py",
+            "build", "build/out.o", "link",
+        ]
+        self.assertEqual(self.names(tmp), expected)
+        self.assertEqual(self.names(tmp, threads=4), expected)
+        self.assertEqual(self.names(tmp.joinpath("build")), ["out.o"])
+
+    @dir
+    def test_exclude(self, tmp: Path):
+        self.create(tmp)
+        self.assertEqual(self.names(tmp, [], [".git", "build", "*.pyc"]), [
+            "README.md", "app", "app/lib", "app/lib/util.py", "app/main.py",
+            "link",
+        ])
+        self.assertEqual(self.names(tmp, [], ["app/*", "/link/"]), [
+            ".git", ".git/HEAD", "README.md", "app", "build", "build/out.o",
+        ])
+
+    @dir
+    def test_include(self, tmp: Path):
+        self.create(tmp)
+        self.assertEqual(self.names(tmp, ["*.py"]), [
+            "app", "app/lib", "app/lib/util.py", "app/main.py",
+        ])
+        self.assertEqual(self.names(tmp, ["app/**/*.py[a-c]", "build"]), [
+            "app", "app/lib", "app/lib/util.pyc", "build",
+        ])
+        self.assertEqual(self.names(tmp, ["**"], ["app"]), [
+            ".git", ".git/HEAD", "README.md", "build", "build/out.o", "link",
+        ])
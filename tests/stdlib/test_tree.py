@@ -43,3 +43,25 @@ class TestTree(TestCase):
                 'mode': 0o777, **common,
             }],
         })
+
+    @dir
+    def test_filter(self, tmp: Path):
+        for path in ["foo/bar.txt", "foo/baz.pyc", ".git/HEAD"]:
+            tmp.joinpath(path).parent.mkdir(exist_ok=True)
+            tmp.joinpath(path).touch()
+
+        self.assertEqual(self.call("/dir", tmp, exclude=[".git", "*.pyc"]), {
+            'directories': [
+                {'path': Path("/dir")}, {'path': Path("/dir/foo")},
+            ],
+            'files': [{
+                'path': Path("/dir/foo/bar.txt"),
+                'contents': {'local': tmp.joinpath("foo/bar.txt")},
+            }],
+            'links': [],
+        })
+        result = self.call("/dir", tmp, include=["*.pyc"], threads=2)
+        self.assertEqual(result['files'], [{
+            'path': Path("/dir/foo/baz.pyc"),
+            'contents': {'local': tmp.joinpath("foo/baz.pyc")},
+        }])
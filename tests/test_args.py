@@ -24,11 +24,37 @@ class TestArgs(TestCase):
         self.assertEqual(parse().butane, [])
         args = parse(["-p", "-s"]).butane
         self.assertEqual(args, ["--pretty", "--strict"])
+        self.assertEqual(parse().butane_format, 'yaml')
+        args = parse(["--butane-format", "json"])
+        self.assertEqual(args.butane_format, 'json')
+
+    def test_compress(self):
+        self.assertIsNone(parse().compress)
+        self.assertEqual(parse(["--compress", "512"]).compress, 512)
+        self.assertEqual(parse(["--compress", "64K"]).compress, 64 * 1024)
+        with self.assertRaises(SystemExit), patch('sys.stderr', StringIO()):
+            parse(["--compress", "lots"])
 
     def test_mode(self):
         self.assertEqual(parse().mode, 'ign')
         self.assertEqual(parse(["--iso"]).mode, 'iso')
         self.assertEqual(parse(["--serve"]).mode, 'serve')
+        self.assertEqual(parse(["--precompile"]).mode, 'precompile')
+
+    def test_serve_ignore(self):
+        self.assertEqual(parse().serve_ignore, [])
+        args = parse(["--serve-ignore", "*.iso", "--serve-ignore", "build/"])
+        self.assertEqual(args.serve_ignore, ["*.iso", "build/"])
+
+    def test_serve_inventory(self):
+        self.assertIsNone(parse().serve_inventory)
+        args = parse(["--serve", "--serve-inventory", "hosts.yml"])
+        self.assertEqual(args.serve_inventory, Path("hosts.yml"))
+
+        for invalid in [[], ["--serve", ".", "foo"]]:
+            stderr = StringIO()
+            with self.assertRaises(SystemExit), patch('sys.stderr', stderr):
+                parse(["--serve-inventory", "hosts.yml", *invalid])
 
     def test_iso_net(self):
         self.assertIsNone(parse().iso_net)
@@ -37,6 +63,22 @@ class TestArgs(TestCase):
         ])
         self.assertEqual(args.iso_net, "192.168.0.2:::255.255.255.0::::::")
 
+    def test_iso_cache(self):
+        args = parse()
+        self.assertEqual((args.iso_ttl, args.iso_offline), (86400, False))
+        args = parse(["--iso-ttl", "12h", "--iso-offline"])
+        self.assertEqual((args.iso_ttl, args.iso_offline), (43200, True))
+        self.assertEqual(parse(["--iso-ttl", "90"]).iso_ttl, 90)
+        self.assertFalse(args.iso_cache)
+        self.assertEqual(args.iso_cache_size, 8 * 1024 ** 3)
+        args = parse(["--iso-cache", "--iso-cache-size", "20G"])
+        self.assertEqual((args.iso_cache, args.iso_cache_size),
+                         (True, 20 * 1024 ** 3))
+
+        stderr = StringIO()
+        with self.assertRaises(SystemExit), patch('sys.stderr', stderr):
+            parse(["--iso-ttl", "1w"])
+
     def test_address(self):
         self.assertEqual(parse().address, ('http', '127.0.0.1', 8000))
         args = parse(["--address", "https://example.com/"])
@@ -59,6 +101,28 @@ class TestArgs(TestCase):
             ("help",),
         ])
 
+    def test_batch(self):
+        self.assertIsNone(parse().batch)
+        args = parse(["--batch", "hosts.csv", "--batch-dir", "out"])
+        self.assertEqual(args.batch, Path("hosts.csv"))
+        self.assertEqual(args.batch_dir, Path("out"))
+        self.assertIsNone(args.batch_jobs)
+        self.assertEqual(parse(["--batch", "hosts.csv", "--iso"]).mode, 'iso')
+
+        for invalid in [["--serve"], [".", "foo"]]:
+            stderr = StringIO()
+            with self.assertRaises(SystemExit), patch('sys.stderr', stderr):
+                parse(["--batch", "hosts.csv", *invalid])
+
+    def test_depfile(self):
+        self.assertIsNone(parse().depfile)
+        args = parse(["--depfile", "host.ign.d", "--iso"])
+        self.assertEqual(args.depfile, Path("host.ign.d"))
+
+        stderr = StringIO()
+        with self.assertRaises(SystemExit), patch('sys.stderr', stderr):
+            parse(["--depfile", "host.ign.d", "--serve"])
+
     def test_error(self):
         stderr = StringIO()
         with self.assertRaises(SystemExit), patch('sys.stderr', stderr):
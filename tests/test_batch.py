@@ -0,0 +1,121 @@
+from unittest import TestCase
+from unittest.mock import patch
+from io import StringIO
+from contextlib import chdir
+from pathlib import PosixPath as Path
+import json
+
+from pyromaniac import Remote
+from pyromaniac.batch import batch, load
+from pyromaniac.compiler.butane import configure
+from pyromaniac.batch.errors import MatrixError, EntriesFailedError
+from . import temp
+
+SOURCE = """
+(name: str, mode: int = 0o644)
+---
+GLOBAL.setdefault('names', []).append(name)
+---
+storage.files[0]:
+  path: `"/" + name`
+  mode: `mode`
+  contents.inline: `GLOBAL.names | join(",")`
+"""
+
+REMOTE = Remote.create(("http", "localhost", 8000))
+
+
+class TestMatrix(TestCase):
+    @temp.file("hosts.csv", "foo,bar,42\n\nbaz\n")
+    def test_csv(self, path: Path):
+        self.assertEqual(load(path), {
+            'foo': (("bar", "42"), {}), 'baz': ((), {}),
+        })
+
+    @temp.file("hosts.yml", "foo: [bar, 42]\nbaz: {a: 1}\nqux:\n1: x\n")
+    def test_yaml(self, path: Path):
+        self.assertEqual(load(path), {
+            'foo': (("bar", 42), {}), 'baz': ((), {'a': 1}),
+            'qux': ((), {}), '1': (("x",), {}),
+        })
+
+    def test_invalid(self):
+        for name, content in [
+            ("hosts.csv", "foo\nfoo\n"), ("hosts.csv", "../foo\n"),
+            ("hosts.yml", "[foo]"), ("hosts.yml", "foo: {1: 2}"),
+            ("hosts.yml", "foo: ["), ("missing.yml", None),
+        ]:
+            with self.subTest(name=name, content=content):
+                self.assertRaisesMatrix(name, content)
+
+    @temp.dir
+    def assertRaisesMatrix(self, name: str, content: str | None, tmp: Path):
+        if content is not None:
+            tmp.joinpath(name).write_text(content)
+        with self.assertRaises(MatrixError):
+            load(tmp.joinpath(name))
+
+
+class TestBatch(TestCase):
+    @temp.dir
+    def test_batch(self, tmp: Path):
+        matrix = {'foo': (("foo",), {}), 'bar': ((), {'name': "bar"})}
+        for jobs in [1, 2]:
+            with self.subTest(jobs=jobs), chdir(tmp):
+                rules = batch(SOURCE, REMOTE, matrix, tmp / str(jobs), jobs)
+                self.assertEqual(rules, {
+                    tmp / str(jobs) / "foo.ign": set(),
+                    tmp / str(jobs) / "bar.ign": set(),
+                })
+                for name in matrix:
+                    file = tmp.joinpath(str(jobs), f"{name}.ign")
+                    config = json.loads(file.read_text())
+                    self.assertEqual(
+                        config['storage']['files'][0]['contents']['source'],
+                        f"data:,{name}",
+                    )
+
+    @temp.dir
+    def test_build(self, tmp: Path):
+        def build(configs: dict[str, str]) -> dict[str, Path]:
+            built.update(configs)
+            return {name: tmp / f"{name}.iso" for name in configs}
+
+        built = {}
+        matrix = {'foo': (("foo",), {}), 'bar': (("bar", "x"), {})}
+        with chdir(tmp), patch('sys.stderr', StringIO()):
+            with self.assertRaises(EntriesFailedError):
+                batch(SOURCE, REMOTE, matrix, tmp / "out", 1, build)
+            self.assertEqual(list(built), ["foo"])
+            self.assertFalse(tmp.joinpath("out", "foo.ign").exists())
+
+            del matrix['bar']
+            rules = batch(SOURCE, REMOTE, matrix, tmp / "out", 1, build)
+        self.assertEqual(rules, {tmp / "foo.iso": set()})
+        self.assertIn('"data:,foo"', built['foo'])
+
+    @temp.dir
+    def test_failure(self, tmp: Path):
+        matrix = {
+            'foo': (("foo",), {}), 'bar': (("bar", "x"), {}),
+            'baz': (("baz", 0o10000), {}),
+        }
+        stderr = StringIO()
+        with chdir(tmp), patch('sys.stderr', stderr):
+            with self.assertRaises(EntriesFailedError) as e:
+                batch(SOURCE, REMOTE, matrix, tmp / "out", 2)
+        self.assertEqual(e.exception.failed, ["bar", "baz"])
+        self.assertEqual(stderr.getvalue().count("Error in "), 2)
+        self.assertTrue(tmp.joinpath("out", "foo.ign").exists())
+
+    @temp.dir
+    def test_compression_report(self, tmp: Path):
+        matrix = {name: ((name * 1000,), {}) for name in ["foo", "bar"]}
+        stderr = StringIO()
+        try:
+            configure([], compression=1024)
+            with chdir(tmp), patch('sys.stderr', stderr):
+                batch(SOURCE, REMOTE, matrix, tmp / "out", 2)
+        finally:
+            configure([])
+        self.assertEqual(stderr.getvalue().count("Compression saved"), 1)
@@ -0,0 +1,50 @@
+from unittest import TestCase
+from pathlib import PosixPath as Path
+import os
+
+from pyromaniac.cache import Store
+from .temp import dir
+
+
+class TestStore(TestCase):
+    @dir
+    def test_get_put(self, tmp: Path):
+        store = Store(tmp / "store")
+        key = Store.key("foo", b"bar")
+        self.assertIsNone(store.get(key))
+        store.put(key, b"baz")
+        self.assertEqual(store.get(key), b"baz")
+        self.assertNotEqual(key, Store.key("foob", b"ar"))
+
+    @dir
+    def test_evict(self, tmp: Path):
+        store = Store(tmp, 10)
+        for i, key in enumerate(["a", "b", "c"]):
+            store.put(key, b"1234")
+            os.utime(tmp / key, ns=(i, i))
+        self.assertEqual(sorted(os.listdir(tmp)), ["b", "c"])
+
+        store.get("b")
+        store.put("d", b"1234")
+        self.assertEqual(sorted(os.listdir(tmp)), ["b", "d"])
+        store.put("e", b"12345678901")
+        self.assertEqual(sorted(os.listdir(tmp)), ["b", "d"])
+
+    @dir
+    def test_find_add(self, tmp: Path):
+        store = Store(tmp / "store", 10)
+        source = tmp / "source"
+        source.write_bytes(b"1234")
+        self.assertIsNone(store.find("a"))
+        self.assertEqual(store.add("a", source), tmp / "store" / "a")
+        self.assertEqual(store.find("a").read_bytes(), b"1234")
+        self.assertEqual(store.add("b", source, True), tmp / "store" / "b")
+        self.assertFalse(source.exists())
+
+        os.utime(tmp / "store" / "a", ns=(0, 0))
+        source.write_bytes(b"1234")
+        store.add("c", source)
+        self.assertEqual(sorted(os.listdir(tmp / "store")), ["b", "c"])
+        source.write_bytes(b"12345678901")
+        self.assertIsNone(store.add("d", source, True))
+        self.assertTrue(source.exists())
@@ -1,8 +1,19 @@
 from unittest import TestCase
 from unittest.mock import patch, Mock
 from pathlib import PosixPath as Path
+from hashlib import sha256
+from io import StringIO
+import json
+import lzma
+import os
 from pyromaniac import paths
-from pyromaniac.iso.customize import get_base_image, customize_base_image
+from pyromaniac.cache import Store
+from pyromaniac.iso.customize import (
+    get_base_image, customize_base_image, customize_batch, customize_cached,
+    MANIFEST,
+)
+from pyromaniac.iso.errors import NotCachedError, ImagesFailedError
+from pyromaniac.iso.embed import embed
 
 from . import temp
 
@@ -33,12 +44,89 @@ class TestIso(TestCase):
         # check file existence
         self.assertTrue(iso.exists())
         iso.unlink()
-        self.assertFalse(any(images.iterdir()))
+        self.assertEqual([f.name for f in images.iterdir()], [MANIFEST])
+
+    @temp.dir
+    @patch('subprocess.run')
+    def test_cached_base_image(self, images: Path, run: Mock):
+        iso = images / "fedora-coreos-40.20240416.3.1-live.x86_64.iso"
+        iso.write_text("image")
+        run.return_value.returncode = 0
+        run.return_value.stdout = iso.as_posix()
+
+        with patch('pyromaniac.paths.images', images):
+            with self.assertRaises(NotCachedError):
+                get_base_image("x86_64", offline=True)
+
+            self.assertEqual(get_base_image("x86_64"), iso)
+            entry = json.loads((images / MANIFEST).read_text())['x86_64']
+            self.assertEqual(entry['version'], "40.20240416.3.1")
+            self.assertEqual(entry['sha256'], sha256(b"image").hexdigest())
+            self.assertTrue(entry['verified'])
+
+            # recorded image is used without downloading
+            run.reset_mock()
+            self.assertEqual(get_base_image("x86_64"), iso)
+            self.assertEqual(get_base_image("x86_64", 0, True), iso)
+            run.assert_not_called()
+
+            # expired image is checked for updates and used if that fails
+            self.assertEqual(get_base_image("x86_64", 0), iso)
+            run.assert_called_once()
+            run.return_value.returncode = 1
+            run.return_value.stderr = "Downloading\nError: offline"
+            with patch('sys.stderr', StringIO()) as stderr:
+                self.assertEqual(get_base_image("x86_64", 0), iso)
+            self.assertIn("Using cached base image", stderr.getvalue())
+
+            # modified image isn't used
+            iso.write_text("tampered")
+            with self.assertRaises(NotCachedError):
+                get_base_image("x86_64", offline=True)
+
+    @temp.dir
+    @patch('subprocess.run')
+    @patch('pyromaniac.iso.customize.get_base_image')
+    def test_customize_batch(self, tmp: Path, get: Mock, run: Mock):
+        def customize(args: list, input: bytes, stderr: int) -> Mock:
+            if input == b"{}":
+                return Mock(returncode=1, stderr=b"Error: broken")
+            Path(args[args.index("--output") + 1]).write_bytes(input)
+            return Mock(returncode=0)
+
+        get.side_effect = lambda arch, ttl, offline: Path(f"/{arch}.iso")
+        run.side_effect = customize
+        images = {
+            f"host{i}": (f'{{"host": {i}}}', arch, None, None, [])
+            for i, arch in enumerate(["x86_64", "aarch64", "x86_64"])
+        }
+        images['broken'] = ("{}", "x86_64", None, None, [])
+
+        with patch('sys.stderr', StringIO()) as stderr:
+            with self.assertRaises(ImagesFailedError) as e:
+                customize_batch(images, tmp / "out", 2)
+        self.assertEqual(e.exception.failed, ["broken"])
+        self.assertIn('Error in "broken"', stderr.getvalue())
+        self.assertEqual(get.call_count, 2)
+        self.assertEqual(run.call_count, 4)
+        self.assertEqual(
+            sorted(f.name for f in tmp.joinpath("out").iterdir()),
+            ["host0.iso", "host1.iso", "host2.iso"],
+        )
+        self.assertEqual(
+            tmp.joinpath("out", "host1.iso").read_text(), '{"host": 1}',
+        )
+
+        del images['broken']
+        self.assertEqual(
+            customize_batch(images, tmp / "out", 1),
+            {name: tmp / "out" / f"{name}.iso" for name in images},
+        )
 
     @patch('subprocess.run')
     def test_customize_base_image_min(self, run: Mock):
         run.return_value.returncode = 0
-        customize_base_image(None, "{}", None, None, [])
+        customize_base_image(Path("/missing.iso"), "{}", None, None, [])
         args = run.call_args.args[0]
         self.assertEqual(args[:3], [paths.installer, "iso", "customize"])
         self.assertIn("--live-ignition", args)
@@ -59,3 +147,137 @@ class TestIso(TestCase):
         self.assertNotIn("--live-ignition", args)
         self.assertIn(("--dest-karg-append", "quiet"), zip(args, args[1:]))
         self.assertIn("--force", args)
+
+
+class TestEmbed(TestCase):
+    @temp.dir
+    def test_embed(self, tmp: Path):
+        base, area = tmp / "base.iso", slice(20 * 2048, 28 * 2048)
+        create_image(base)
+        config = '{"ignition": {"version": "3.4.0"}}'
+        self.assertTrue(embed(base, config, tmp / "out.iso"))
+        data = tmp.joinpath("out.iso").read_bytes()
+        original = base.read_bytes()
+        self.assertEqual(len(data), len(original))
+        self.assertEqual(data[:area.start], original[:area.start])
+        self.assertEqual(data[area.stop:], original[area.stop:])
+
+        archive = lzma.LZMADecompressor().decompress(data[area])
+        self.assertTrue(archive.startswith(b"070701"))
+        self.assertEqual(archive[110:121], b"config.ign\0")
+        self.assertEqual(int(archive[54:62], 16), len(config))
+        self.assertEqual(archive[124:124 + len(config)].decode(), config)
+        self.assertIn(b"TRAILER!!!\0", archive)
+
+        with tmp.joinpath("stdout.iso").open('wb') as stdout:
+            with patch('sys.stdout', stdout):
+                self.assertTrue(embed(base, config))
+        self.assertEqual(tmp.joinpath("stdout.iso").read_bytes(), data)
+
+    @temp.dir
+    def test_unsupported(self, tmp: Path):
+        create_image(tmp / "base.iso")
+        tmp.joinpath("other.iso").write_bytes(b"\0" * 64 * 2048)
+        large = os.urandom(32 * 1024).hex()
+        self.assertFalse(embed(tmp / "base.iso", large, tmp / "out.iso"))
+        self.assertFalse(embed(tmp / "other.iso", "{}", tmp / "out.iso"))
+        self.assertFalse(embed(tmp / "missing.iso", "{}", tmp / "out.iso"))
+        self.assertFalse(tmp.joinpath("out.iso").exists())
+
+    @temp.dir
+    @patch('subprocess.run')
+    def test_customize(self, tmp: Path, run: Mock):
+        create_image(tmp / "base.iso")
+        run.return_value.returncode = 0
+        customize_base_image(
+            tmp / "base.iso", "{}", None, None, [], tmp / "out.iso",
+        )
+        run.assert_not_called()
+        self.assertTrue(tmp.joinpath("out.iso").exists())
+
+        customize_base_image(
+            tmp / "base.iso", "{}", "client=192.168.0.2", None, [],
+            tmp / "net.iso",
+        )
+        run.assert_called_once()
+
+
+class TestIsoCache(TestCase):
+    @temp.dir
+    def test_file(self, tmp: Path):
+        create_image(tmp / "base.iso")
+        store = Store(tmp / "isos", 1024 * 1024)
+        with patch(
+            'pyromaniac.iso.customize.customize_base_image',
+            wraps=customize_base_image,
+        ) as customize:
+            for name, config in [("a", "{}"), ("b", "{}"), ("c", "[]")]:
+                customize_cached(
+                    store, tmp / "base.iso", config, None, None, [],
+                    tmp / f"{name}.iso",
+                )
+        self.assertEqual(customize.call_count, 2)
+        self.assertEqual(len(list(store.path.iterdir())), 2)
+        self.assertEqual(
+            tmp.joinpath("a.iso").read_bytes(),
+            tmp.joinpath("b.iso").read_bytes(),
+        )
+        self.assertNotEqual(
+            tmp.joinpath("a.iso").read_bytes(),
+            tmp.joinpath("c.iso").read_bytes(),
+        )
+
+    @temp.dir
+    def test_stdout(self, tmp: Path):
+        create_image(tmp / "base.iso")
+        for size, stored in [(10, 0), (1024 * 1024, 1)]:
+            store = Store(tmp / f"isos{size}", size)
+            for name in ["a", "b"]:
+                with tmp.joinpath(f"{name}{size}.iso").open('wb') as stdout:
+                    with patch('sys.stdout', stdout):
+                        customize_cached(
+                            store, tmp / "base.iso", "{}", None, None, [],
+                        )
+            files = list(store.path.iterdir())
+            self.assertEqual(len(files), stored)
+            self.assertEqual(
+                tmp.joinpath(f"a{size}.iso").read_bytes(),
+                tmp.joinpath(f"b{size}.iso").read_bytes(),
+            )
+        self.assertEqual(
+            files[0].read_bytes(), tmp.joinpath("a10.iso").read_bytes(),
+        )
+
+
+# write ISO 9660 image with an 8 sector embedding area at sector 20
+def create_image(path: Path):
+    data = bytearray(os.urandom(64 * 2048))
+    data[16 * 2048:17 * 2048] = bytes(2048)
+    data[16 * 2048:16 * 2048 + 7] = b"\x01CD001\x01"
+    data[16 * 2048 + 128:16 * 2048 + 130] = (2048).to_bytes(2, 'little')
+    data[16 * 2048 + 156:16 * 2048 + 190] = record(b"\0", 18, 2048, True)
+    for sector, records in [(18, [
+        record(b"\0", 18, 2048, True), record(b"\1", 18, 2048, True),
+        record(b"IMAGES.TXT;1", 30, 10, False),
+        record(b"IMAGES", 19, 2048, True),
+    ]), (19, [
+        record(b"\0", 19, 2048, True), record(b"\1", 18, 2048, True),
+        record(b"IGNITION.IMG;1", 20, 8 * 2048, False),
+    ])]:
+        directory = b"".join(records)
+        data[sector * 2048:(sector + 1) * 2048] = directory.ljust(2048, b"\0")
+    data[20 * 2048:28 * 2048] = bytes(8 * 2048)
+    path.write_bytes(data)
+
+
+# create ISO 9660 directory record
+def record(name: bytes, extent: int, length: int, directory: bool) -> bytes:
+    size = 33 + len(name) + (len(name) + 1) % 2
+    return b"".join([
+        bytes([size, 0]),
+        extent.to_bytes(4, 'little'), extent.to_bytes(4, 'big'),
+        length.to_bytes(4, 'little'), length.to_bytes(4, 'big'),
+        bytes(7), bytes([2 if directory else 0, 0, 0]),
+        (1).to_bytes(2, 'little'), (1).to_bytes(2, 'big'), bytes([len(name)]),
+        name.ljust(size - 33, b"\0"),
+    ])
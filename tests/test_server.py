@@ -1,14 +1,28 @@
+from typing import Any
 from unittest import TestCase
 from unittest.mock import patch, Mock
 from pathlib import Path
-from pyromaniac.server.server import Server
+from threading import Thread, Event
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+from time import sleep
+from queue import Queue
+import gzip
+import json
+import socket
+import ssl
+from pyromaniac.server.server import Server, Cache, Prompt, Handler, Content
+from pyromaniac.server.watch import Inotify, Poll
+from pyromaniac.server.inventory import Inventory
+from pyromaniac.server import certs
+from cryptography.hazmat.primitives.asymmetric import ec
 
 from . import temp
 
 
 @patch('http.server.HTTPServer.__init__', Mock())
 @patch('http.server.BaseHTTPRequestHandler.__init__', Mock())
-@patch('pyromaniac.server.server.Handler.headers', Mock(), create=True)
+@patch('pyromaniac.server.server.Handler.headers', {}, create=True)
 @patch('pyromaniac.server.server.Handler.end_headers', Mock(), create=True)
 class TestServer(TestCase):
     @patch('http.server.HTTPServer.__init__', Mock())
@@ -30,6 +44,36 @@ class TestServer(TestCase):
             self.assertTrue(root_key.exists())
             self.assertTrue(root_crt.exists())
 
+    @temp.dir
+    def test_server_certs(self, secrets: Path):
+        with (
+            patch('pyromaniac.server.certs.ROOT_KEY', secrets / "root.key"),
+            patch('pyromaniac.server.certs.ROOT_CRT', secrets / "root.cert"),
+        ):
+            crt, key = certs.server("127.0.0.1")
+            content = crt.read_bytes(), key.read_bytes()
+            self.assertEqual(certs.server("127.0.0.1"), (crt, key))
+            self.assertEqual((crt.read_bytes(), key.read_bytes()), content)
+            self.assertEqual(key.stat().st_mode & 0o777, 0o600)
+
+            with patch('pyromaniac.server.certs.RENEW_DAYS', 400):
+                certs.server("127.0.0.1")
+            self.assertNotEqual(crt.read_bytes(), content[0])
+
+            with patch('pyromaniac.server.certs.key_type', 'ecdsa'):
+                crt, key = certs.server("127.0.0.1")
+            self.assertIsInstance(
+                certs.load_key(key), ec.EllipticCurvePrivateKey,
+            )
+            self.assertEqual(len(list(secrets.glob("server-*.key"))), 2)
+
+            content = crt.read_bytes()
+            secrets.joinpath("root.key").unlink()
+            secrets.joinpath("root.cert").unlink()
+            with patch('pyromaniac.server.certs.key_type', 'ecdsa'):
+                certs.server("127.0.0.1")
+            self.assertNotEqual(crt.read_bytes(), content)
+
     @patch('sys.stdout', Mock())
     @patch('pyromaniac.server.server.Handler.send_response', create=True)
     @patch('pyromaniac.server.server.Handler.send_header', create=True)
@@ -45,3 +89,323 @@ class TestServer(TestCase):
             send_response.assert_called_with(200)
             send_header.assert_called_with('Content-Type', "application/json")
             wfile.write.assert_called_with("{}".encode())
+
+
+@patch('sys.stdout', Mock())
+class TestConcurrency(TestCase):
+    def test_secret_does_not_block_config(self):
+        entered, answer = Event(), Event()
+
+        def ask() -> str:
+            entered.set()
+            answer.wait(5)
+            return "secret"
+
+        server = Server('http', "127.0.0.1", None, lambda: "{}")
+        thread = Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            with patch.object(server.prompt, 'ask', ask):
+                with ThreadPoolExecutor(2) as pool:
+                    secret = pool.submit(fetch, "/foo.secret")
+                    self.assertTrue(entered.wait(5))
+                    self.assertEqual(fetch("/config.ign"), (200, b"{}"))
+                    answer.set()
+                    self.assertEqual(secret.result(5), (200, b"secret"))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    @temp.dir
+    def test_cache(self, tmp: Path):
+        calls = []
+
+        def generator() -> str:
+            calls.append(None)
+            sleep(0.1)
+            return "{}"
+
+        cache = Cache(generator, tmp)
+        with ThreadPoolExecutor(4) as pool:
+            results = list(pool.map(lambda _: cache.get(), range(4)))
+        self.assertEqual(results, ["{}"] * 4)
+        self.assertEqual(len(calls), 1)
+
+    @patch('pyromaniac.server.server.Handler.send_response', create=True)
+    @patch('pyromaniac.server.server.Handler.send_header', create=True)
+    @patch('pyromaniac.server.server.Handler.end_headers', create=True)
+    @patch('http.server.BaseHTTPRequestHandler.__init__', Mock())
+    def test_prompt_busy(
+        self, end_headers: Mock, send_header: Mock, send_response: Mock,
+    ):
+        prompt = Prompt(1)
+        self.assertTrue(prompt.reserve())
+        handler = Handler(
+            None, Cache(lambda: "{}", None), prompt, Queue(), None, None,
+        )
+        handler.path, handler.wfile = "/foo.secret", Mock()
+        handler.headers = {}
+        handler.do_GET()
+        send_response.assert_called_with(503)
+        send_header.assert_any_call('Retry-After', "5")
+
+
+def parameters(*args: Any, **kwargs: Any) -> list[str]:
+    return [n for n in ["role", "disk"][len(args):] if n not in kwargs]
+
+
+def fetch(path: str) -> tuple[int, bytes]:
+    connection = HTTPConnection("127.0.0.1", 8000, timeout=5)
+    try:
+        connection.request("GET", path)
+        response = connection.getresponse()
+        return response.status, response.read()
+    finally:
+        connection.close()
+
+
+@patch('sys.stdout', Mock())
+class TestHttp(TestCase):
+    def setUp(self):
+        self.config = '{"storage": {"files": [' + '{"path": "/foo"},' * 99
+        self.config += '{"path": "/foo"}]}}'
+        self.server = Server('http', "127.0.0.1", None, lambda: self.config)
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        self.connection = HTTPConnection("127.0.0.1", 8000, timeout=5)
+
+    def tearDown(self):
+        self.connection.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_keep_alive(self):
+        for method in ["GET", "HEAD", "GET"]:
+            response = self.request(method)
+            self.assertEqual(response.status, 200)
+            self.assertEqual(
+                int(response.getheader('Content-Length')), len(self.config),
+            )
+            body = self.config.encode() if method == "GET" else b""
+            self.assertEqual(response.read(), body)
+        self.assertIsNotNone(self.connection.sock)
+
+    def test_gzip(self):
+        response = self.request(headers={'Accept-Encoding': "br, gzip"})
+        self.assertEqual(response.getheader('Content-Encoding'), "gzip")
+        data = response.read()
+        self.assertLess(len(data), len(self.config))
+        self.assertEqual(gzip.decompress(data), self.config.encode())
+
+        response = self.request(headers={'Accept-Encoding': "gzip;q=0"})
+        self.assertIsNone(response.getheader('Content-Encoding'))
+        self.assertEqual(response.read(), self.config.encode())
+
+    def test_etag(self):
+        response = self.request()
+        etag = response.getheader('ETag')
+        response.read()
+        self.assertEqual(response.getheader('Cache-Control'), "no-cache")
+
+        response = self.request(headers={'If-None-Match': f'"x", {etag}'})
+        self.assertEqual(response.status, 304)
+        self.assertEqual(response.read(), b"")
+
+        self.config = "{}"
+        response = self.request(headers={'If-None-Match': etag})
+        self.assertEqual(response.status, 200)
+        self.assertNotEqual(response.getheader('ETag'), etag)
+        self.assertEqual(response.read(), b"{}")
+
+    def test_inventory(self):
+        self.server.inventory = Inventory({
+            'web': (("web",), {}), '127.0.0.1': ((), {'role': "db"}),
+        })
+        self.server.parameters = parameters
+        self.server.cache.generator = lambda *args, **kwargs: Content(
+            json.dumps([args, kwargs]),
+        )
+        for path, config in [
+            ("/config/web.ign", [["web"], {}]),
+            ("/config/web.ign?disk=sda", [["web"], {'disk': "sda"}]),
+            ("/config.ign", [[], {'role': "db"}]),
+            ("/config.ign?disk=sda", [[], {'role': "db", 'disk': "sda"}]),
+            ("/config/127.0.0.1.ign", [[], {'role': "db"}]),
+        ]:
+            with self.subTest(path=path):
+                response = self.request(path=path)
+                self.assertEqual(json.loads(response.read()), config)
+        for path, status in [
+            ("/config/db.ign", 404), ("/config.ign?role=x", 400),
+            ("/config/web.ign?role=x", 400), ("/config.ign?foo=x", 400),
+        ]:
+            with self.subTest(path=path):
+                response = self.request(path=path)
+                self.assertEqual(response.status, status)
+                response.read()
+
+    def test_query(self):
+        calls = []
+
+        def generator(*args: Any, **kwargs: Any) -> Content:
+            calls.append(kwargs)
+            return Content(json.dumps(kwargs))
+
+        self.server.cache.generator = generator
+        response = self.request(path="/config.ign?role=x")
+        self.assertEqual(response.status, 400)
+        response.read()
+
+        self.server.parameters = parameters
+        self.connection.close()
+        response = self.request(path="/config.ign?role=x")
+        self.assertEqual(json.loads(response.read()), {'role': "x"})
+        response = self.request(path="/config.ign?foo=x&role=x")
+        self.assertEqual(response.status, 400)
+        response.read()
+        self.assertEqual(calls, [{'role': "x"}])
+
+    def test_failure(self):
+        def generator(*args: Any, **kwargs: Any) -> Content:
+            raise ValueError("broken")
+
+        self.server.parameters = lambda *args, **kwargs: 1 / 0
+        response = self.request(path="/config.ign?role=x")
+        self.assertEqual(response.status, 500)
+        response.read()
+
+        self.server.cache.generator = generator
+        response = self.request()
+        self.assertEqual(response.status, 500)
+        response.read()
+        self.assertIsNotNone(self.connection.sock)
+
+    def request(
+        self, method: str = "GET", headers: dict = {},
+        path: str = "/config.ign",
+    ):
+        self.connection.request(method, path, headers=headers)
+        return self.connection.getresponse()
+
+
+@patch('sys.stdout', Mock())
+class TestTls(TestCase):
+    @temp.dir
+    def test_resumption(self, secrets: Path):
+        with (
+            patch('pyromaniac.server.certs.ROOT_KEY', secrets / "root.key"),
+            patch('pyromaniac.server.certs.ROOT_CRT', secrets / "root.cert"),
+            patch('pyromaniac.server.certs.key_type', 'ecdsa'),
+        ):
+            server = Server('https', "127.0.0.1", None, lambda: "{}")
+        Thread(target=server.serve_forever, daemon=True).start()
+        context = ssl.create_default_context(cafile=secrets / "root.cert")
+        try:
+            session = None
+            for reused in [False, True]:
+                with (
+                    socket.create_connection(("127.0.0.1", 8000)) as sock,
+                    context.wrap_socket(
+                        sock, server_hostname="127.0.0.1", session=session,
+                    ) as tls,
+                ):
+                    tls.sendall(
+                        b"GET /config.ign HTTP/1.1\r\nHost: x\r\n"
+                        b"Connection: close\r\n\r\n"
+                    )
+                    self.assertTrue(tls.recv(1024).startswith(b"HTTP/1.1 200"))
+                    while tls.recv(1024) != b"":
+                        pass
+                    self.assertEqual(tls.session_reused, reused)
+                    session = tls.session
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+class TestInventory(TestCase):
+    @temp.file("arp", (
+        "IP address       HW type     Flags       HW address            "
+        "Mask     Device\n"
+        "192.168.0.12     0x1         0x2         52:54:00:AB:CD:EF     *"
+        "        eth0\n"
+    ))
+    def test_match(self, arp: Path):
+        inventory = Inventory({
+            '192.168.0.11': ((), {}), '52-54-00-ab-cd-ef': ((), {}),
+            'web': ((), {}), '::1': ((), {}),
+        })
+        with patch('pyromaniac.server.inventory.ARP', arp):
+            self.assertEqual(inventory.match("192.168.0.11"), "192.168.0.11")
+            self.assertEqual(
+                inventory.match("::ffff:192.168.0.11"), "192.168.0.11",
+            )
+            self.assertEqual(inventory.match("0::1"), "::1")
+            self.assertEqual(
+                inventory.match("192.168.0.12"), "52-54-00-ab-cd-ef",
+            )
+            self.assertIsNone(inventory.match("192.168.0.13"))
+
+
+class TestWatch(TestCase):
+    @temp.dir
+    def test_watchers(self, tmp: Path):
+        tmp.joinpath(".git").mkdir()
+        for watcher in [Inotify(tmp, [".git", "*.iso"]), Poll(tmp, [".git"])]:
+            with self.subTest(watcher=type(watcher).__name__):
+                self.assertTrue(watcher.changed())
+                self.assertFalse(watcher.changed())
+                tmp.joinpath(".git", "HEAD").write_text("foo")
+                self.assertFalse(watcher.changed())
+
+                tmp.joinpath("foo", "bar").mkdir(parents=True)
+                self.assertTrue(watcher.changed())
+                tmp.joinpath("foo", "bar", "baz.txt").write_text("baz")
+                self.assertTrue(watcher.changed())
+                tmp.joinpath("foo", "bar", "baz.txt").unlink()
+                self.assertTrue(watcher.changed())
+                self.assertFalse(watcher.changed())
+                tmp.joinpath("foo", "bar").rmdir()
+                tmp.joinpath("foo").rmdir()
+                watcher.changed()
+                watcher.close()
+
+    @temp.dir
+    def test_cache(self, tmp: Path):
+        values = ["foo", "bar"]
+        cache = Cache(lambda: values.pop(0), tmp)
+        self.assertEqual(cache.get(), "foo")
+        self.assertEqual(cache.get(), "foo")
+        tmp.joinpath("file.txt").write_text("changed")
+        self.assertEqual(cache.get(), "bar")
+
+        with self.assertRaises(IndexError):
+            tmp.joinpath("file.txt").write_text("again")
+            cache.get()
+        values.append("baz")
+        self.assertEqual(cache.get(), "baz")
+        cache.close()
+
+    @temp.dir
+    def test_cache_arguments(self, tmp: Path):
+        calls = []
+
+        def generator(*args: Any, **kwargs: Any) -> str:
+            calls.append((args, kwargs))
+            return f"{args}{kwargs}"
+
+        cache = Cache(generator, tmp, size=2)
+        self.assertEqual(cache.get((1,)), "(1,){}")
+        self.assertEqual(cache.get((), {'a': [1]}), "(){'a': [1]}")
+        self.assertEqual(cache.get((1,)), "(1,){}")
+        self.assertEqual(len(calls), 2)
+
+        cache.get((2,))
+        cache.get((1,))
+        self.assertEqual(len(calls), 3)
+        cache.get((), {'a': [1]})
+        self.assertEqual(len(calls), 4)
+
+        tmp.joinpath("file.txt").write_text("changed")
+        cache.get((1,))
+        self.assertEqual(len(calls), 5)
+        cache.close()